@@ -0,0 +1,117 @@
+"""
+Synthetic Sandbox Corpus for Refactoring Swarm benchmarks
+Purpose: Generate Python files of configurable size and defect density, whose
+intended behavior is readable from the code itself (so the fake LLM can
+audit, fix and test them deterministically).
+
+Every function looks like:
+
+    def op_3(a, b):
+        \"\"\"Return the product of a and b.\"\"\"
+        c = a
+        ...
+        return a * b
+
+A "logic" defect swaps the operator (the docstring keeps the intent), a
+"style" defect adds an unused import to the module header.
+
+Usage:
+    python -m benchmarks.corpus sandbox/bench_corpus --files 20 --functions 30
+"""
+import argparse
+import json
+import os
+import random
+from typing import Dict, List
+
+# docstring word -> operator; the fake LLM reads the same table
+OPERATIONS = {"sum": "+", "difference": "-", "product": "*"}
+UNUSED_IMPORTS = ["os", "sys", "json", "re", "math"]
+
+
+def generate_module(name: str, functions: int, lines_per_function: int,
+                    defect_density: float, rng: random.Random) -> Dict:
+    """
+    Source of one module plus the defects injected in it
+
+    Args:
+        name: Module name (file stem)
+        functions: Number of top-level functions
+        lines_per_function: Body lines per function (padding included)
+        defect_density: Probability that a function has a logic defect
+            (the module gets an unused import with the same probability)
+        rng: Random source (seeded by the caller)
+
+    Returns:
+        {"source": str, "defects": [{"line", "kind", "function"}]}
+    """
+    lines = [f'"""Generated benchmark module {name}."""']
+    defects = []
+    if rng.random() < defect_density:
+        module = rng.choice(UNUSED_IMPORTS)
+        lines.append(f"import {module}")
+        defects.append({"line": len(lines), "kind": "style", "function": None})
+
+    words = list(OPERATIONS)
+    for i in range(functions):
+        word = rng.choice(words)
+        operator = OPERATIONS[word]
+        if rng.random() < defect_density:
+            operator = rng.choice([op for op in OPERATIONS.values() if op != operator])
+            broken = True
+        else:
+            broken = False
+        lines += ["", "", f"def op_{i}(a, b):", f'    """Return the {word} of a and b."""']
+        for k in range(max(0, lines_per_function - 2)):
+            lines.append(f"    c{k} = a")
+        lines.append(f"    return a {operator} b")
+        if broken:
+            defects.append({"line": len(lines), "kind": "logic", "function": f"op_{i}"})
+    return {"source": "\n".join(lines) + "\n", "defects": defects}
+
+
+def generate_corpus(out_dir: str, files: int = 10, functions: int = 20,
+                    lines_per_function: int = 6, defect_density: float = 0.2,
+                    seed: int = 0) -> List[str]:
+    """
+    Write a corpus of modules (and manifest.json) into out_dir
+
+    Returns:
+        Paths of the generated modules
+    """
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    manifest = {
+        "files": files,
+        "functions": functions,
+        "lines_per_function": lines_per_function,
+        "defect_density": defect_density,
+        "seed": seed,
+        "modules": {}
+    }
+    for n in range(files):
+        name = f"bench_mod_{n:04d}"
+        module = generate_module(name, functions, lines_per_function, defect_density, rng)
+        path = os.path.join(out_dir, f"{name}.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(module["source"])
+        manifest["modules"][path] = module["defects"]
+        paths.append(path)
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic benchmark corpus")
+    parser.add_argument("out_dir")
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--functions", type=int, default=20)
+    parser.add_argument("--lines-per-function", type=int, default=6)
+    parser.add_argument("--defect-density", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    written = generate_corpus(args.out_dir, args.files, args.functions,
+                              args.lines_per_function, args.defect_density, args.seed)
+    print(f"✅ {len(written)} modules written to {args.out_dir}")
@@ -0,0 +1,211 @@
+"""
+Deterministic LLM stand-in for Refactoring Swarm benchmarks
+Purpose: Answer auditor, fixer (full / slices / patch) and judge prompts for
+the synthetic corpus (benchmarks/corpus.py) without calling Gemini, with
+configurable latency and a configurable share of invalid (non-JSON) answers.
+
+Same prompt + same seed -> same answer, same latency, same validity.
+
+Usage:
+    from benchmarks.fake_llm import FakeLLM, install
+    install(graph_module, FakeLLM(latency=0.5, validity=0.95))
+"""
+import asyncio
+import difflib
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from langchain_core.messages import AIMessage
+
+from benchmarks.corpus import OPERATIONS
+
+DOCSTRING = re.compile(r'^\s+"""Return the (\w+) of a and b\."""')
+RETURN = re.compile(r"^(\s+return a )([-+*]) b$")
+DEF = re.compile(r"^(?:async )?def (\w+)\(")
+IMPORT = re.compile(r"^import (\w+)$")
+SLICE = re.compile(r"# --- slice: (.+?) \(lines \d+-\d+\) ---\n(.*?)(?=\n\n# --- slice: |\Z)", re.S)
+
+
+class FakeLLM:
+    """Chat-model stand-in with invoke/ainvoke (plug in as CachedLLM.llm)."""
+
+    def __init__(self, latency: float = 0.0, per_kchar: float = 0.0, jitter: float = 0.0,
+                 validity: float = 1.0, seed: int = 0):
+        """
+        Args:
+            latency: Base seconds per call
+            per_kchar: Extra seconds per 1000 characters of prompt + answer
+            jitter: Latency varies by up to +/- this fraction
+            validity: Share of answers that are valid JSON (0..1)
+            seed: Changes which prompts get jitter / invalid answers
+        """
+        self.latency = latency
+        self.per_kchar = per_kchar
+        self.jitter = jitter
+        self.validity = validity
+        self.seed = seed
+        self.calls = Counter()
+        self.invalid = 0
+        self._lock = threading.Lock()
+
+    # ---------- chat model interface ----------
+
+    def invoke(self, prompt: str):
+        content, delay = self._answer(prompt)
+        if delay:
+            time.sleep(delay)
+        return AIMessage(content=content)
+
+    async def ainvoke(self, prompt: str):
+        content, delay = self._answer(prompt)
+        if delay:
+            await asyncio.sleep(delay)
+        return AIMessage(content=content)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": dict(self.calls), "invalid_answers": self.invalid}
+
+    # ---------- answers ----------
+
+    def _answer(self, prompt: str):
+        role, answer = self._respond(prompt)
+        content = json.dumps(answer)
+        roll = self._roll(prompt, "validity")
+        with self._lock:
+            self.calls[role] += 1
+            if roll >= self.validity:
+                self.invalid += 1
+                content = content[:len(content) // 2]
+        delay = self.latency + self.per_kchar * (len(prompt) + len(content)) / 1000
+        delay *= 1 + self.jitter * (2 * self._roll(prompt, "jitter") - 1)
+        return content, max(0.0, delay)
+
+    def _roll(self, prompt: str, purpose: str) -> float:
+        digest = hashlib.sha256(f"{self.seed}:{purpose}:{prompt}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+    def _respond(self, prompt: str):
+        if "You are the AUDITOR agent" in prompt:
+            return "auditor", self._audit(_between(prompt, r"the code :\n(.*);\n\n\s*the file : "))
+        if "You are the JUDGE agent" in prompt:
+            return "judge", self._tests(prompt)
+        if "You are the FIXER agent" in prompt:
+            if "Slices:\n" in prompt:
+                return "fixer", self._fix_slices(_between(prompt, r"Slices:\n\n(.*) \n\nfile:"))
+            code = _between(prompt, r"Original code:\n\n(.*) \n\nfile:")
+            if "unified diff" in prompt:
+                return "fixer", {"file": "", "patch": _diff(code, repair(code))}
+            return "fixer", {"file": "", "fixed_code": repair(code)}
+        return "unknown", {}
+
+    def _audit(self, code: str) -> dict:
+        issues = []
+        for line_no, kind, description in find_defects(code):
+            issues.append({"file": "", "line": line_no, "type": kind, "source": "code",
+                           "description": description})
+        plan = [{"step": i, "file": "", "action": f"Fix: {issue['description']}"}
+                for i, issue in enumerate(issues, start=1)]
+        return {"files_analyzed": [], "issues": issues, "refactoring_plan": plan,
+                "confidence": "high" if issues else "medium"}
+
+    def _fix_slices(self, context: str) -> dict:
+        slices = {}
+        for name, code in SLICE.findall(context):
+            fixed = repair(code)
+            if fixed.rstrip("\n") != code.rstrip("\n"):
+                slices[name] = fixed
+        return {"file": "", "slices": slices}
+
+    def _tests(self, prompt: str) -> dict:
+        code = _between(prompt, r"The current code to test:\n(.*)\n\n\s*file name:")
+        filename = _between(prompt, r"file name:(\S+)")
+        only = _between(prompt, r"Only write tests for: ([^\n]+)")
+        wanted = {name.strip() for name in only.split(",")} if only else None
+
+        functions = intended_operations(code)
+        names = [name for name in functions if wanted is None or name in wanted]
+        module = Path(filename).stem
+        lines = [f"from {module} import {', '.join(names)}"] if names else []
+        for name in names:
+            lines += ["", "", f"def test_{name}():", f"    assert {name}(7, 3) == 7 {functions[name]} 3"]
+        return {"test_file_name": f"test_{module}.py", "test_code": "\n".join(lines) + "\n",
+                "functions_tested": names}
+
+
+# ---------- code helpers (shared with the harness checks) ----------
+
+def intended_operations(code: str) -> dict:
+    """{function name: operator its docstring asks for}"""
+    result = {}
+    current = None
+    for line in code.splitlines():
+        match = DEF.match(line)
+        if match:
+            current = match.group(1)
+            continue
+        match = DOCSTRING.match(line)
+        if match and current and match.group(1) in OPERATIONS:
+            result[current] = OPERATIONS[match.group(1)]
+    return result
+
+
+def find_defects(code: str):
+    """(line, type, description) of every wrong operator and unused import"""
+    lines = code.splitlines()
+    expected = None
+    current = None
+    for number, line in enumerate(lines, start=1):
+        match = DEF.match(line)
+        if match:
+            current, expected = match.group(1), None
+            continue
+        match = DOCSTRING.match(line)
+        if match:
+            expected = OPERATIONS.get(match.group(1))
+            continue
+        match = RETURN.match(line)
+        if match and expected and match.group(2) != expected:
+            yield number, "bug", f"{current} uses '{match.group(2)}' but its docstring asks for '{expected}'"
+            continue
+        match = IMPORT.match(line)
+        if match and not re.search(rf"\b{match.group(1)}\.", code):
+            yield number, "style", f"unused import {match.group(1)}"
+
+
+def repair(code: str) -> str:
+    """Code with every defect reported by find_defects fixed"""
+    lines = code.splitlines()
+    drop = set()
+    expected = None
+    for index, line in enumerate(lines):
+        if DEF.match(line):
+            expected = None
+        elif DOCSTRING.match(line):
+            expected = OPERATIONS.get(DOCSTRING.match(line).group(1))
+        elif RETURN.match(line) and expected:
+            lines[index] = RETURN.sub(rf"\g<1>{expected} b", line)
+        elif IMPORT.match(line) and not re.search(rf"\b{IMPORT.match(line).group(1)}\.", code):
+            drop.add(index)
+    return "\n".join(line for i, line in enumerate(lines) if i not in drop) + "\n"
+
+
+def _diff(old: str, new: str) -> str:
+    diff = difflib.unified_diff(old.splitlines(), new.splitlines(), lineterm="", n=2)
+    return "\n".join(diff)
+
+
+def _between(prompt: str, pattern: str) -> str:
+    match = re.search(pattern, prompt, re.S)
+    return match.group(1) if match else ""
+
+
+def install(graph_module, llm: FakeLLM):
+    """Route the graph's auditor, fixer and judge agents to llm."""
+    for agent in (graph_module.auditor, graph_module.fixer, graph_module.judge_agent):
+        agent.llm.llm = llm
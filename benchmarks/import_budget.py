@@ -0,0 +1,105 @@
+"""
+Import-time budget check for Refactoring Swarm
+Purpose: Keep CLI startup cheap. Measures `import main` with
+`python -X importtime` and the wall time of `python main.py --help` in fresh
+interpreters, and fails when either exceeds its budget or when a heavy
+dependency (Gemini client, langgraph, pylint) is imported at startup.
+
+Usage:
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --import-budget-ms 200 --help-budget-ms 500
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# only needed once a file is processed; importing them at startup is a regression
+DEFERRED_MODULES = ["langchain_google_genai", "google.generativeai", "langgraph", "pylint"]
+
+
+def _env() -> Dict:
+    env = dict(os.environ)
+    # startup must not need credentials: no client may be built at import
+    env.pop("GOOGLE_API_KEY", None)
+    env.pop("SWARM_TRACE", None)
+    return env
+
+
+def import_times(module: str = "main") -> List[Dict]:
+    """
+    Per-module import times of `import module` in a fresh interpreter
+
+    Returns:
+        [{"module", "self_us", "cumulative_us"}] in import order
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_ROOT, env=_env(), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            rows.append({"module": parts[2].strip(), "self_us": int(parts[0]),
+                         "cumulative_us": int(parts[1])})
+        except ValueError:
+            continue  # header line
+    return rows
+
+
+def help_wall_time(repeat: int = 3) -> float:
+    """Best wall time (s) of `python main.py --help`."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "main.py", "--help"], cwd=REPO_ROOT, env=_env(),
+                       capture_output=True, check=True)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time budget check")
+    parser.add_argument("--import-budget-ms", type=float,
+                        default=float(os.getenv("SWARM_IMPORT_BUDGET_MS", "300")))
+    parser.add_argument("--help-budget-ms", type=float,
+                        default=float(os.getenv("SWARM_HELP_BUDGET_MS", "800")))
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list")
+    args = parser.parse_args(argv)
+
+    rows = import_times("main")
+    total_ms = next(r["cumulative_us"] for r in reversed(rows) if r["module"] == "main") / 1000
+    help_ms = help_wall_time() * 1000
+    imported = {r["module"].strip() for r in rows}
+    deferred = [m for m in DEFERRED_MODULES if m in imported]
+
+    print(f"{'module':<50} {'self ms':>9} {'cumul ms':>9}")
+    for r in sorted(rows, key=lambda r: r["self_us"], reverse=True)[:args.top]:
+        print(f"{r['module'][:50]:<50} {r['self_us'] / 1000:>9.1f} {r['cumulative_us'] / 1000:>9.1f}")
+    print(f"\n   import main: {total_ms:.1f} ms (budget {args.import_budget_ms:.0f} ms)")
+    print(f"   main.py --help: {help_ms:.1f} ms (budget {args.help_budget_ms:.0f} ms)")
+
+    failures = []
+    if total_ms > args.import_budget_ms:
+        failures.append("import main over budget")
+    if help_ms > args.help_budget_ms:
+        failures.append("main.py --help over budget")
+    if deferred:
+        failures.append(f"imported at startup: {', '.join(deferred)}")
+    if failures:
+        print(f"❌ {'; '.join(failures)}")
+        return 1
+    print("✅ Startup within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""
+Micro-benchmarks for Refactoring Swarm tool hot paths
+Purpose: Time the functions called many times per file at realistic sizes
+(10k-line files, 5k pylint messages, 100 MB pytest output, 50k log entries),
+compare against stored baselines and fail on regressions.
+
+Baselines (benchmarks/baselines.json) are machine-specific: refresh them
+with --update-baselines on the machine that runs the gate.
+
+Usage:
+    python -m benchmarks.micro                      # compare, exit 1 on regression
+    python -m benchmarks.micro --threshold 0.5      # allow +50%
+    python -m benchmarks.micro --only pytest_parse_100mb --update-baselines
+    python -m benchmarks.micro --scale 0.1          # smaller inputs (own baselines)
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+BASELINES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+# a case regresses when its best time is more than this much slower (0.25 = +25%)
+DEFAULT_THRESHOLD = float(os.getenv("SWARM_BENCH_THRESHOLD", "0.25"))
+
+PYLINT_TYPES = ["error", "warning", "convention", "refactor", "info"]
+
+
+class Case:
+    """
+    One micro-benchmark: setup() -> argument, fn(argument) is timed
+    `number` times per repeat (so that fast cases run long enough to time).
+    """
+
+    def __init__(self, name: str, setup: Callable, fn: Callable, repeat: int = 5, number: int = 1):
+        self.name = name
+        self.setup = setup
+        self.fn = fn
+        self.repeat = repeat
+        self.number = number
+
+
+# ============ INPUTS ============
+
+def make_source(lines: int) -> str:
+    from benchmarks.corpus import generate_module
+    functions = max(1, lines // 8)
+    return generate_module("micro", functions, 8, 0.1, random.Random(0))["source"]
+
+
+def make_pylint_messages(count: int) -> List[Dict]:
+    rng = random.Random(0)
+    return [{
+        "type": rng.choice(PYLINT_TYPES),
+        "module": "micro",
+        "obj": f"op_{i % 500}",
+        "line": i % 10000 + 1,
+        "column": i % 40,
+        "path": "sandbox/micro.py",
+        "symbol": "invalid-name",
+        "message": f'Variable name "c{i}" doesn\'t conform to snake_case naming style',
+        "message-id": "C0103"
+    } for i in range(count)]
+
+
+def make_pytest_output(megabytes: float) -> str:
+    lines = []
+    size = 0
+    target = int(megabytes * 1024 * 1024)
+    i = 0
+    while size < target:
+        if i % 997 == 0:
+            line = f"FAILED sandbox/test_micro.py::test_op_{i} - AssertionError: assert 4 == 10"
+        else:
+            line = f"sandbox/test_micro.py::test_op_{i} PASSED{' ' * 30}[ {i % 100:>2}%]"
+        lines.append(line)
+        size += len(line) + 1
+        i += 1
+    lines.append(f"===== {i // 997 + 1} failed, {i - i // 997 - 1} passed, 2 skipped in 12.34s =====")
+    return "\n".join(lines)
+
+
+# ============ CASES ============
+
+def build_cases(work_dir: str, scale: float) -> List[Case]:
+    from src.tools.analysis_tools import AnalysisTools
+    from src.tools.file_tools import FileTools
+    from src.tools.testing_tools import TestingTools
+    from src.utils import logger
+    from src.utils.logger import ActionType
+
+    fl = FileTools(sandbox_path=work_dir, prompts_path=work_dir)
+    analysis = AnalysisTools(sandbox_path=work_dir, use_cache=False)
+    testing = TestingTools(sandbox_path=work_dir, use_fork_server=False)
+    source_path = os.path.join(work_dir, "micro.py")
+    lines = max(100, int(10000 * scale))
+
+    def source_file():
+        with open(source_path, "w", encoding="utf-8") as f:
+            f.write(make_source(lines))
+        return source_path
+
+    def safe_paths():
+        return [os.path.join(work_dir, f"pkg_{i % 50}", f"mod_{i}.py") for i in range(10000)] \
+            + ["/etc/passwd", os.path.join(work_dir, "..", "outside.py")]
+
+    def check_paths(paths):
+        for path in paths:
+            fl._is_safe_path(path)
+
+    def source_tree():
+        # 20k files in 400 packages, a few excluded directories among them
+        tree = os.path.join(work_dir, "tree")
+        if not os.path.isdir(tree):
+            for i in range(max(10, int(20000 * scale))):
+                package = os.path.join(tree, f"pkg_{i % 400}", "__pycache__" if i % 40 == 0 else "")
+                os.makedirs(package, exist_ok=True)
+                open(os.path.join(package, f"mod_{i}.py"), "w").close()
+        return tree
+
+    def first_file(tree):
+        return next(fl.iter_python_files(fl, tree))
+
+    def all_files(tree):
+        return sum(1 for _ in fl.iter_python_files(fl, tree))
+
+    def log_entries(count):
+        # a private writer: keep benchmark entries out of logs/
+        logger._writer = logger.JsonlLogWriter(os.path.join(work_dir, "micro_log.jsonl"), legacy_path=None)
+        details = {"input_prompt": "x" * 200, "output_response": "y" * 400, "file": "sandbox/micro.py"}
+        return count, details
+
+    def write_logs(arguments):
+        count, details = arguments
+        for _ in range(count):
+            logger.log_experiment("Auditor", "gemini-2.5-flash", ActionType.ANALYSIS, details, "SUCCESS")
+
+    return [
+        Case("file_is_safe_path", safe_paths, check_paths),
+        Case("file_read_10k_lines", source_file, lambda path: fl.read_file(fl, path), number=200),
+        Case("file_write_10k_lines", lambda: (source_path, make_source(lines)),
+             lambda arguments: fl.write_file(fl, *arguments), number=100),
+        Case("pylint_categorize_5k", lambda: make_pylint_messages(max(10, int(5000 * scale))),
+             lambda issues: analysis._categorize_issues(issues), number=20),
+        Case("pylint_run_10k_lines", source_file,
+             lambda path: analysis.run_pylint(analysis, path, timeout=600), repeat=2),
+        Case("pytest_parse_100mb", lambda: make_pytest_output(100 * scale),
+             lambda output: testing.parse_pytest_output(output, 1), repeat=3),
+        Case("discover_first_file_20k", source_tree, first_file, number=20),
+        Case("discover_20k_files", source_tree, all_files, repeat=3),
+        Case("log_experiment_50k", lambda: log_entries(max(10, int(50000 * scale))), write_logs, repeat=3),
+    ]
+
+
+# ============ RUN / COMPARE ============
+
+def run_case(case: Case) -> Dict:
+    argument = case.setup()
+    timings = []
+    for _ in range(case.repeat):
+        # the tools print progress; time the work, not the terminal
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            for _ in range(case.number):
+                case.fn(argument)
+            timings.append((time.perf_counter() - started) / case.number)
+    return {
+        "median_s": round(statistics.median(timings), 7),
+        "min_s": round(min(timings), 7),
+        "repeat": case.repeat,
+        "number": case.number
+    }
+
+
+def load_baselines(path: str = BASELINES_FILE) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(results: Dict, baselines: Dict, threshold: float) -> List[Dict]:
+    """
+    Rows of (case, baseline, current, ratio, regressed)
+
+    Compares best-of-repeat times: the minimum is the least disturbed by
+    other load on the machine.
+    """
+    rows = []
+    for name, result in results.items():
+        baseline = baselines.get(name, {}).get("min_s")
+        ratio = result["min_s"] / baseline if baseline else None
+        rows.append({
+            "case": name,
+            "baseline_s": baseline,
+            "min_s": result["min_s"],
+            "median_s": result["median_s"],
+            "ratio": round(ratio, 3) if ratio is not None else None,
+            "regressed": ratio is not None and ratio > 1 + threshold
+        })
+    return rows
+
+
+def print_rows(rows: List[Dict], threshold: float):
+    header = f"{'case':<24} {'baseline s':>11} {'best s':>10} {'median s':>10} {'ratio':>7}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        baseline = f"{row['baseline_s']:.6f}" if row["baseline_s"] else "-"
+        ratio = f"{row['ratio']:.2f}x" if row["ratio"] is not None else "new"
+        flag = f"  ❌ > +{threshold:.0%}" if row["regressed"] else ""
+        print(f"{row['case']:<24} {baseline:>11} {row['min_s']:>10.6f} {row['median_s']:>10.6f} {ratio:>7}{flag}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of tool hot paths")
+    parser.add_argument("--only", nargs="*", help="Run only these cases")
+    parser.add_argument("--scale", type=float, default=1.0, help="Input size factor (default: 1)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown vs baseline (default: $SWARM_BENCH_THRESHOLD or 0.25)")
+    parser.add_argument("--baselines", default=BASELINES_FILE)
+    parser.add_argument("--update-baselines", action="store_true")
+    parser.add_argument("--out", help="Write the JSON result to this file")
+    args = parser.parse_args(argv)
+
+    from src.utils import metrics
+    metrics.set_enabled(False)
+
+    # baselines are kept per input scale
+    scale_key = f"scale={args.scale:g}"
+    work_dir = tempfile.mkdtemp(prefix="swarm_micro_")
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            cases = build_cases(work_dir, args.scale)
+        results = {}
+        for case in cases:
+            if args.only and case.name not in args.only:
+                continue
+            print(f"⏱️ {case.name}...", flush=True)
+            results[case.name] = run_case(case)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    stored = load_baselines(args.baselines)
+    rows = compare(results, stored.get(scale_key, {}), args.threshold)
+    print_rows(rows, args.threshold)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "scale": args.scale,
+                       "results": results, "comparison": rows}, f, indent=2)
+
+    if args.update_baselines:
+        stored.setdefault(scale_key, {}).update(results)
+        with open(args.baselines, "w", encoding="utf-8") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"✅ Baselines updated: {args.baselines}")
+        return 0
+
+    regressed = [row["case"] for row in rows if row["regressed"]]
+    if regressed:
+        print(f"❌ Regression beyond +{args.threshold:.0%}: {', '.join(regressed)}")
+        return 1
+    print("✅ No regression")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
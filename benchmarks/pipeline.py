@@ -0,0 +1,212 @@
+"""
+End-to-end throughput benchmark for Refactoring Swarm
+Purpose: Run the full auditor -> fixer -> judge graph (main.run_files /
+main.arun_files) on a synthetic corpus with the deterministic fake LLM, and
+report files/minute, per-node time and peak RSS as JSON that can be compared
+between commits.
+
+Everything the run writes (corpus, snapshots, workspaces, caches, logs,
+metrics) lives in a temporary directory with its own tools: the real
+sandbox/ and .swarm_cache/ are never read nor touched.
+
+Usage:
+    python -m benchmarks.pipeline --files 20 --workers 4 --latency 0.2 --out bench.json
+    python -m benchmarks.pipeline --async --fixer-mode patch --validity 0.9
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark (fake LLM)")
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--functions", type=int, default=20)
+    parser.add_argument("--lines-per-function", type=int, default=6)
+    parser.add_argument("--defect-density", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--async", dest="use_async", action="store_true")
+    parser.add_argument("--fixer-mode", choices=["auto", "full", "slice", "patch"], default="auto")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake LLM seconds per call")
+    parser.add_argument("--per-kchar", type=float, default=0.0,
+                        help="Fake LLM extra seconds per 1000 characters")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--validity", type=float, default=1.0,
+                        help="Share of fake LLM answers that are valid JSON")
+    parser.add_argument("--file-overlay", action="store_true",
+                        help="Run with the in-memory FileTools overlay")
+    parser.add_argument("--workspaces", action="store_true",
+                        help="Run each file in its own workspace (mirror of sandbox/)")
+    parser.add_argument("--warm-caches", action="store_true",
+                        help="Keep the LLM / lint caches and the test store on (off by default)")
+    parser.add_argument("--keep-corpus", action="store_true",
+                        help="Keep the temporary directory (its path is printed)")
+    parser.add_argument("--out", help="Write the JSON result to this file")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args):
+    """Must run before the graph is imported (agents and caches read env at import)."""
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+    os.environ["SWARM_FIXER_MODE"] = args.fixer_mode
+    os.environ["SWARM_FILE_OVERLAY"] = "1" if args.file_overlay else "0"
+    os.environ["SWARM_WORKSPACES"] = "1" if args.workspaces else "0"
+    if not args.warm_caches:
+        os.environ["SWARM_LLM_CACHE"] = "0"
+        os.environ["SWARM_LINT_CACHE"] = "0"
+        os.environ["SWARM_TEST_STORE"] = "0"
+
+
+def isolate(graph, work_dir: str) -> str:
+    """
+    Point the graph's tools, stores and caches at work_dir; must run before
+    any of them is built (the graph creates them on first use).
+
+    Returns:
+        The benchmark's sandbox directory
+    """
+    from src.tools import lint_cache, workspace
+    from src.tools.analysis_tools import AnalysisTools
+    from src.tools.file_tools import FileTools
+    from src.tools.snapshot_store import SnapshotStore
+    from src.tools.test_store import TestSuiteStore
+    from src.tools.testing_tools import TestingTools
+    from src.utils import llm_cache, logger, metrics
+
+    sandbox = os.path.join(work_dir, "sandbox")
+    cache_dir = os.path.join(work_dir, ".swarm_cache")
+    os.makedirs(sandbox)
+
+    metrics.METRICS_FILE = os.path.join(work_dir, "metrics.jsonl")
+    logger._writer = logger.JsonlLogWriter(os.path.join(work_dir, "experiment.jsonl"), legacy_path=None)
+    llm_cache._shared_cache = llm_cache.LLMCache(os.path.join(cache_dir, "llm_cache.sqlite"))
+    lint_cache.DEFAULT_CACHE_PATH = os.path.join(cache_dir, "lint_cache.sqlite")
+    workspace.DEFAULT_WORKSPACES_DIR = os.path.join(cache_dir, "workspaces")
+
+    graph.fl = FileTools(sandbox_path=sandbox)
+    graph.fa = AnalysisTools(sandbox_path=sandbox)
+    graph.ft = TestingTools(sandbox_path=sandbox)
+    graph.snapshots = SnapshotStore(os.path.join(sandbox, ".snapshots"))
+    graph.test_store = TestSuiteStore(os.path.join(cache_dir, "test_store.sqlite")) \
+        if os.getenv("SWARM_TEST_STORE", "1") != "0" else None
+    return sandbox
+
+
+def release(graph):
+    """Close the SQLite connections isolate() opened, before work_dir is removed"""
+    from src.utils import llm_cache
+
+    for name in ("fa", "test_store"):
+        opened = vars(graph).get(name)
+        if opened is not None:
+            opened.close()
+    if llm_cache._shared_cache is not None:
+        llm_cache._shared_cache.close()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def peak_rss_mb() -> dict:
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1)
+    }
+
+
+def run(args) -> dict:
+    configure_environment(args)
+    # imported here: the environment above must be set first
+    import main as swarm
+    from benchmarks.corpus import generate_corpus
+    from benchmarks.fake_llm import FakeLLM, install
+    from src.orcherstrateur import graph
+    from src.utils import metrics
+
+    work_dir = tempfile.mkdtemp(prefix="swarm_bench_")
+    try:
+        corpus_dir = os.path.join(isolate(graph, work_dir), "bench_corpus")
+        llm = FakeLLM(args.latency, args.per_kchar, args.jitter, args.validity, args.seed)
+        install(graph, llm)
+
+        generate_corpus(corpus_dir, args.files, args.functions, args.lines_per_function,
+                        args.defect_density, args.seed)
+        started = time.perf_counter()
+        # discovered while processing, as main() does
+        files = graph.fl.iter_python_files(graph.fl, corpus_dir)
+        if args.use_async:
+            results = asyncio.run(swarm.arun_files(files, args.workers))
+        else:
+            results = swarm.run_files(files, args.workers)
+        graph.fl.commit()
+        elapsed = time.perf_counter() - started
+
+        if metrics._writer is not None:
+            metrics._writer.sync()
+        rows = metrics.aggregate(metrics.iter_records(metrics.METRICS_FILE)) \
+            if os.path.exists(metrics.METRICS_FILE) else []
+    finally:
+        release(graph)
+        if args.keep_corpus:
+            print(f"📁 Benchmark files kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "keep_corpus")},
+        "files": len(results),
+        "succeeded": sum(1 for r in results if r["success"]),
+        "iterations": sum(r["iterations"] for r in results),
+        "elapsed_s": round(elapsed, 3),
+        "files_per_min": round(len(results) / elapsed * 60, 2) if elapsed else None,
+        "per_node": {r["name"]: {"count": r["count"], "total_s": r["total_s"], "p50_s": r["p50_s"],
+                                 "p95_s": r["p95_s"]}
+                     for r in rows if r["kind"] == "node"},
+        "tools": {r["name"]: {"count": r["count"], "total_s": r["total_s"]}
+                  for r in rows if r["kind"] == "tool"},
+        "llm": llm.stats(),
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def print_result(result: dict):
+    print(f"\n{'='*60}")
+    print(f"📊 BENCHMARK ({result['commit']})")
+    print(f"{'='*60}")
+    print(f"   Files: {result['files']} ({result['succeeded']} passing, {result['iterations']} iterations)")
+    print(f"   Elapsed: {result['elapsed_s']:.2f}s -> {result['files_per_min']} files/min")
+    for name, node in result["per_node"].items():
+        print(f"   node {name:<8} {node['count']:>4} calls {node['total_s']:>8.2f}s (p95 {node['p95_s']:.3f}s)")
+    for name, tool in result["tools"].items():
+        print(f"   tool {name:<8} {tool['count']:>4} runs  {tool['total_s']:>8.2f}s")
+    print(f"   Fake LLM: {result['llm']['calls']} ({result['llm']['invalid_answers']} invalid)")
+    rss = result["peak_rss_mb"]
+    print(f"   Peak RSS: {rss['self']} MB (children {rss['children']} MB)")
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    outcome = run(arguments)
+    print_result(outcome)
+    if arguments.out:
+        with open(arguments.out, "w", encoding="utf-8") as f:
+            json.dump(outcome, f, indent=2)
+        print(f"✅ Result written to {arguments.out}")
@@ -1,54 +1,262 @@
 import argparse
+import asyncio
 import sys
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 from src.orcherstrateur.State import state_flow
-from src.utils.logger import ActionType, log_experiment
-from src.orcherstrateur.graph import app
-from src.tools.file_tools import FileTools
-from dotenv import load_dotenv
-from src.tools.file_tools import FileTools
-from src.orcherstrateur.agents.auditor import AuditorAgent
-from src.orcherstrateur.agents.fixer import FixerAgent
+from src.utils.logger import ActionType, log_experiment, export_to_json
+from src.utils import llm_cache, metrics, tracing
+from src.tools.file_tools import FileTools, SecurityError
 
 load_dotenv()
-import os
-def main():
-    
 
+
+def get_graph():
+    """
+    The graph module, imported on first use: its agents and compiled apps are
+    built lazily too, so `--help` and argument errors return immediately.
+    """
+    from src.orcherstrateur import graph as graph_module
+    return graph_module
+
+
+def build_initial_state(file_path: str, workspace=None) -> state_flow:
+    """Etat initial du graphe pour un fichier (dans son workspace s'il y en a un)."""
+    return {
+        "file_path": workspace.target if workspace else str(file_path),
+        "issues": [],
+        "fix_plan": None,
+        "test_results": None,
+        "iteration": 0,
+        "max_iterations": 5,
+        "valid_judge": False,
+        "backup_path": None,
+        "test_path": None,
+        "fixer_mode": os.getenv("SWARM_FIXER_MODE", "auto"),
+        "patch_conflicts": None,
+        "workspace": str(workspace.root) if workspace else None,
+        "llm_keys": []
+    }
+
+
+def summarize_run(file_path: str, finalstate: dict, started: float, error: str = None) -> dict:
+    """Per-file summary entry used by print_summary."""
+    test_results = (finalstate or {}).get("test_results") or {}
+    return {
+        "file": str(file_path),
+        "success": error is None and bool(test_results.get("success")),
+        "iterations": (finalstate or {}).get("iteration", 0),
+        "duration": round(time.perf_counter() - started, 2),
+        "error": error
+    }
+
+
+def open_workspace(file_path: str):
+    """
+    Isolated workspace of a file when workspaces are on ($SWARM_WORKSPACES
+    or --workspaces), else None: the graph then works in its sandbox directly.
+    The workspace mirrors the sandbox of the graph's FileTools, the root its
+    files are published back into.
+    """
+    if os.getenv("SWARM_WORKSPACES", "0") != "1":
+        return None
+    from src.tools import workspace as workspaces
+    return workspaces.open_workspace(file_path, get_graph().fl.get_sandbox_path())
+
+
+def close_workspace(workspace, finalstate):
+    """
+    Drop a workflow's workspace; its files are published into the sandbox first
+    only if the workflow finished (finalstate is None after a failure).
+    """
+    if workspace is None:
+        return
+    from src.tools import workspace as workspaces
+    try:
+        if finalstate is not None:
+            workspace.commit()
+    finally:
+        workspaces.close_workspace(workspace)
+
+
+def process_file(file_path: str) -> dict:
+    """
+    Run the auditor -> fixer -> judge graph on one file.
+
+    Never raises: a failing workflow is reported in the returned summary
+    so that one bad file does not abort the other workers.
+    """
+    print(f"processing file {file_path}\n")
+    started = time.perf_counter()
+    workspace = None
+    try:
+        with tracing.span("workflow", "file", file=str(file_path)) as trace_span:
+            workspace = open_workspace(file_path)
+            finalstate = get_graph().app.invoke(build_initial_state(file_path, workspace))
+            trace_span.set(iterations=finalstate.get("iteration"))
+            close_workspace(workspace, finalstate)
+        return summarize_run(file_path, finalstate, started)
+    except Exception as e:
+        print(f"❌ Workflow failed for {file_path}: {e}")
+        close_workspace(workspace, None)
+        return summarize_run(file_path, None, started, str(e))
+
+
+async def aprocess_file(file_path: str, semaphore: asyncio.Semaphore) -> dict:
+    """Async counterpart of process_file, bounded by semaphore."""
+    async with semaphore:
+        print(f"processing file {file_path}\n")
+        started = time.perf_counter()
+        workspace = None
+        try:
+            with tracing.span("workflow", "file", file=str(file_path)) as trace_span:
+                workspace = open_workspace(file_path)
+                finalstate = await get_graph().async_app.ainvoke(build_initial_state(file_path, workspace))
+                trace_span.set(iterations=finalstate.get("iteration"))
+                close_workspace(workspace, finalstate)
+            return summarize_run(file_path, finalstate, started)
+        except Exception as e:
+            print(f"❌ Workflow failed for {file_path}: {e}")
+            close_workspace(workspace, None)
+            return summarize_run(file_path, None, started, str(e))
+
+
+def run_files(files, workers: int = 1) -> list:
+    """
+    Process files sequentially (workers=1) or with a bounded thread pool.
+
+    The workflow is dominated by LLM round trips and pylint/pytest
+    subprocesses, so threads are enough to overlap them. `files` may be a
+    generator (FileTools.iter_python_files): each file is submitted as soon
+    as it is found, while the walk goes on.
+    """
+    if workers <= 1:
+        return [process_file(file) for file in files]
+
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_file, file): file for file in files}
+        for future in as_completed(futures):
+            results.append(future.result())
+    return results
+
+
+async def arun_files(files, workers: int = 1) -> list:
+    """
+    Process files on one event loop, at most `workers` in flight.
+
+    `files` may be a generator: it is advanced in a worker thread, so the
+    walk doesn't block the loop and each file starts once it is found.
+    """
+    semaphore = asyncio.Semaphore(max(1, workers))
+    if isinstance(files, (list, tuple)):
+        return await asyncio.gather(*(aprocess_file(file, semaphore) for file in files))
+    tasks = []
+    files = iter(files)
+    while True:
+        file = await asyncio.to_thread(next, files, None)
+        if file is None:
+            break
+        tasks.append(asyncio.create_task(aprocess_file(file, semaphore)))
+    return await asyncio.gather(*tasks)
+
+
+def print_summary(results: list, elapsed: float):
+    """Affiche le résumé agrégé de tous les fichiers traités."""
+    succeeded = [r for r in results if r["success"]]
+    failed = [r for r in results if not r["success"]]
+    print(f"\n{'='*60}")
+    print("📊 RESUME")
+    print(f"{'='*60}")
+    print(f"   Files processed: {len(results)}")
+    print(f"   Tests passing: {len(succeeded)}")
+    print(f"   Tests failing / errors: {len(failed)}")
+    if results:
+        avg_iterations = sum(r["iterations"] for r in results) / len(results)
+        print(f"   Average iterations: {avg_iterations:.2f}")
+    print(f"   Wall-clock time: {elapsed:.2f}s")
+    for r in sorted(failed, key=lambda r: r["file"]):
+        reason = r["error"] or "tests failing"
+        print(f"   ❌ {r['file']} ({reason})")
+
+
+def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--target_dir", type=str, required=True)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of files processed concurrently (default: 1)")
+    parser.add_argument("--no-llm-cache", action="store_true",
+                        help="Always call the LLM, bypassing the on-disk response cache")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Run the async graph on a single event loop instead of threads")
+    parser.add_argument("--fixer-mode", choices=["auto", "full", "slice", "patch"],
+                        help="Send the fixer the whole file, only the affected functions/classes, "
+                             "ask it for a unified diff, or decide per file "
+                             "(default: $SWARM_FIXER_MODE or auto)")
+    parser.add_argument("--file-overlay", action="store_true",
+                        help="Keep files in memory during each workflow and write them "
+                             "only when pylint/pytest need them or at the end")
+    parser.add_argument("--workspaces", action="store_true",
+                        help="Run each file's workflow in its own mirror of sandbox/, "
+                             "published back into sandbox/ when the workflow ends")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Record spans of every file, node, LLM call and tool run "
+                             "as Chrome trace JSON (chrome://tracing, ui.perfetto.dev)")
     args = parser.parse_args()
 
     if not os.path.exists(args.target_dir):
         print(f"❌ Dossier {args.target_dir} introuvable.")
         sys.exit(1)
 
+    if args.no_llm_cache:
+        llm_cache.set_enabled(False)
+    if args.fixer_mode:
+        os.environ["SWARM_FIXER_MODE"] = args.fixer_mode
+    if args.file_overlay:
+        os.environ["SWARM_FILE_OVERLAY"] = "1"
+    if args.workspaces:
+        os.environ["SWARM_WORKSPACES"] = "1"
+    if args.trace:
+        tracing.enable(args.trace)
+
     print(f"🚀 DEMARRAGE SUR : {args.target_dir}")
    
     log_experiment("System","gemini-2.5-flash", ActionType.SYSTEM, f"Target: {args.target_dir}", "INFO")
-    initstate=state_flow()
     fl=FileTools()
-    all_files=fl.list_python_files(fl,"sandbox/")
-    print(all_files)
-    for file in all_files:
-        print(f"processing file {file}\n")
-        initstate = {
-        "file_path": str(file),
-        "issues": [],
-        "fix_plan": None,
-        "test_results": None,
-        "iteration": 0,
-        "max_iterations": 5,  
-        "valid_judge": False,
-        "backup_path": None,
-        "test_path":None
-    }
-        finalstate=app.invoke(initstate)
+    # processing starts with the first file found, the walk goes on meanwhile
+    try:
+        all_files=fl.iter_python_files(fl,args.target_dir)
+    except SecurityError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    started = time.perf_counter()
+    if args.use_async:
+        results = asyncio.run(arun_files(all_files, args.workers))
+    else:
+        results = run_files(all_files, args.workers)
+    # files of workflows that failed before their end are still buffered
+    get_graph().fl.commit()
+    get_graph().snapshots.gc(max_age_days=7)
+    print_summary(results, time.perf_counter() - started)
+    if llm_cache.is_enabled():
+        stats = llm_cache.get_cache().stats()
+        print(f"   LLM cache: {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']*100:.1f}%)")
+    test_store = get_graph().test_store
+    if test_store is not None:
+        stats = test_store.stats()
+        print(f"   Test store: {stats['reused']} suites reused / {stats['generated']} generated")
+    stats = get_graph().snapshots.stats()
+    print(f"   Snapshots: {stats['stored']} stored / {stats['deduplicated']} deduplicated")
+    print(f"   Metrics: {metrics.METRICS_FILE} (python -m src.utils.metrics report)")
+    if tracing.is_enabled():
+        print(f"   Trace: {tracing.export()} events -> {args.trace or os.getenv('SWARM_TRACE')}")
+    # validate_logs.py lit toujours le format liste
+    export_to_json()
         
     print("✅ MISSION_COMPLETE")
     
 
 if __name__ == "__main__":
-    main() 
-    pass
\ No newline at end of file
+    main()
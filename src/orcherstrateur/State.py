@@ -10,4 +10,8 @@ class state_flow(TypedDict):
     max_iterations: int
     valid_judge: bool
     backup_path: Optional[str]
-    test_path:str
\ No newline at end of file
+    test_path:str
+    fixer_mode: Optional[str]
+    patch_conflicts: Optional[List[str]]
+    workspace: Optional[str]
+    llm_keys: List[str]
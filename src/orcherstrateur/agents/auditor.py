@@ -1,35 +1,256 @@
+import asyncio
+import contextvars
+import json
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from ...tools.file_tools import FileTools
+from src.utils.llm_cache import CachedLLM
+from src.tools.ast_slicer import chunk_units, outline, parse_audit, top_level_units
+from src.utils.prompt_registry import get_prompt
+
+load_dotenv()
+
+# Files longer than this are audited in chunks of about this many lines
+AUDIT_CHUNK_LINES = int(os.getenv("SWARM_AUDIT_CHUNK_LINES", "400"))
+# At most this many chunk prompts in flight per file
+AUDIT_MAX_PARALLEL = 8
+
+PYLINT_CATEGORIES = ['errors', 'warnings', 'conventions', 'refactors']
+CONFIDENCE_LEVELS = ["low", "medium", "high"]
+
+
+@dataclass
+class AuditChunk:
+    """Part of a big file sent in its own prompt: module header + units."""
+    index: int
+    units: list
+    header_end: int
+    start: int
+    end: int
+
+    @property
+    def body_offset(self) -> int:
+        # chunk text = header lines, one blank line, then the units
+        return self.header_end + 2 if self.header_end else 1
+
+    def code(self, lines) -> str:
+        header = lines[:self.header_end] + ([""] if self.header_end else [])
+        return "\n".join(header + lines[self.start - 1:self.end])
+
+    def to_global(self, line):
+        """Line number in the chunk text -> line number in the file."""
+        if not isinstance(line, int) or line < 1:
+            return None
+        if line <= self.header_end:
+            return line
+        line = self.start + line - self.body_offset
+        return line if self.start <= line <= self.end else None
+
+    def to_local(self, line):
+        """Line number in the file -> line number in the chunk text."""
+        if line <= self.header_end:
+            return line
+        return line - self.start + self.body_offset
+
+    def owns(self, line) -> bool:
+        """File-level and header messages go to the first chunk."""
+        if not isinstance(line, int) or line <= self.header_end:
+            return self.index == 0
+        return self.start <= line <= self.end
+
 
-load_dotenv()      
 class AuditorAgent:
-    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",  
+    def __init__(self, chunk_lines=AUDIT_CHUNK_LINES):
+        # imported here: langchain_google_genai alone takes ~1s to import
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        self.llm = CachedLLM(ChatGoogleGenerativeAI(
+            model="gemini-2.5-flash",
             api_key=os.getenv("GOOGLE_API_KEY"),
-        )
-        self.fl=FileTools()
-        self.system_prompt=self.fl.read_file(self.fl,"prompts/auditor.txt")
+        ), "gemini-2.5-flash")
+        self.chunk_lines=chunk_lines
+
+    @property
+    def system_prompt(self):
+        return get_prompt("auditor")
+
+    def build_prompt(self,content,pylint_report,filepath):
 
-    def analyze(self,content,pylint_report,filepath):
-       
         prompt=self.system_prompt
-        
-        
+
+
         orchestre_additional_prompt= f"""
          the code :\n{content};\n
-        
+
          the file : {filepath};\n
          the pylint_report:\n {pylint_report}\n
         """
         prompt+=orchestre_additional_prompt
+        return prompt
 
+    def analyze(self,content,pylint_report,filepath):
+        units,chunks=self.plan_chunks(content)
+        if chunks:
+            prompts=self.build_chunk_prompts(content,pylint_report,filepath,units,chunks)
+            with ThreadPoolExecutor(max_workers=min(len(prompts),AUDIT_MAX_PARALLEL)) as executor:
+                # each call runs in a copy of this context (metrics tags)
+                futures=[executor.submit(contextvars.copy_context().run,self.llm.invoke,prompt) for prompt in prompts]
+                responses=[future.result() for future in futures]
+            merged=self.merge_chunks(chunks,prompts,responses,pylint_report,filepath)
+            if merged is not None:
+                return merged
+        prompt=self.build_prompt(content,pylint_report,filepath)
         response = self.llm.invoke(prompt)
-        
+
         # print(response.content)
+        return self.checked_content(prompt,response)
+
+    async def aanalyze(self,content,pylint_report,filepath):
+        """Async variant of analyze (uses llm.ainvoke, does not block the event loop)."""
+        units,chunks=self.plan_chunks(content)
+        if chunks:
+            prompts=self.build_chunk_prompts(content,pylint_report,filepath,units,chunks)
+            semaphore=asyncio.Semaphore(AUDIT_MAX_PARALLEL)
+
+            async def invoke(prompt):
+                async with semaphore:
+                    return await self.llm.ainvoke(prompt)
+
+            responses=await asyncio.gather(*(invoke(prompt) for prompt in prompts))
+            merged=self.merge_chunks(chunks,prompts,responses,pylint_report,filepath)
+            if merged is not None:
+                return merged
+        prompt=self.build_prompt(content,pylint_report,filepath)
+        response = await self.llm.ainvoke(prompt)
+        return self.checked_content(prompt,response)
+
+    def checked_content(self,prompt,response):
+        """The audit answer; dropped from the cache if it isn't an audit JSON."""
+        if parse_audit(response.content) is None:
+            # never replay an unparsable audit from the cache
+            self.llm.discard(prompt)
         return response.content
 
+    # ---------- chunked audit of big files ----------
+
+    def plan_chunks(self,content):
+        """(units, chunks) for a file too big for one prompt, else (None, None)."""
+        if len(content.splitlines())<=self.chunk_lines:
+            return None,None
+        units=top_level_units(content)
+        if units is None:
+            return None,None
+        groups=chunk_units(units,self.chunk_lines)
+        if len(groups)<2:
+            return None,None
+        header_end=units[0].end
+        chunks=[
+            AuditChunk(i,group,header_end,group[0].start,group[-1].end)
+            for i,group in enumerate(groups)
+        ]
+        print(f"🧩 Auditing in {len(chunks)} chunks")
+        return units,chunks
+
+    def build_chunk_prompts(self,content,pylint_report,filepath,units:list,chunks:list):
+        lines=content.splitlines()
+        prompts=[]
+        for chunk in chunks:
+            scope="this part and the module header" if chunk.index==0 else "this part"
+            prompt=self.system_prompt
+            prompt+=f"""
+         This is part {chunk.index+1}/{len(chunks)} of a large file (file lines {chunk.start}-{chunk.end}, after the module header).
+         Other definitions of the file, audited separately (read only):\n{outline(units,chunk.units)}\n
+         Report only issues in {scope}. Use the line numbers of the code below.
+         the code :\n{chunk.code(lines)};\n
+
+         the file : {filepath};\n
+         the pylint_report:\n {self.chunk_report(pylint_report,chunk)}\n
+        """
+            prompts.append(prompt)
+        return prompts
+
+    def chunk_report(self,pylint_report,chunk:AuditChunk):
+        """Pylint messages of the chunk, with chunk-local line numbers."""
+        if not isinstance(pylint_report,dict):
+            return pylint_report
+        report={k:v for k,v in pylint_report.items() if k not in PYLINT_CATEGORIES}
+        for key in PYLINT_CATEGORIES:
+            report[key]=[]
+            for message in pylint_report.get(key,[]):
+                if not chunk.owns(message.get('line')):
+                    continue
+                message=dict(message)
+                for field in ('line','endLine'):
+                    if isinstance(message.get(field),int):
+                        message[field]=chunk.to_local(message[field])
+                report[key].append(message)
+        report['total_issues']=sum(len(report[key]) for key in PYLINT_CATEGORIES)
+        return report
+
+    def merge_chunks(self,chunks:list,prompts:list,responses:list,pylint_report,filepath):
+        """
+        One audit JSON from the chunk audits: lines mapped back to the file,
+        duplicate issues/steps dropped, steps renumbered.
+
+        Returns None (and drops the cached answers) if a chunk answer isn't JSON.
+        """
+        audits=[parse_audit(response.content) for response in responses]
+        if any(audit is None for audit in audits):
+            for prompt,audit in zip(prompts,audits):
+                if audit is None:
+                    self.llm.discard(prompt)
+            print("⚠️ Chunk audit unusable, auditing the whole file")
+            return None
+
+        issues,seen_issues=[],set()
+        plan,seen_steps=[],set()
+        confidence="high"
+        for chunk,audit in zip(chunks,audits):
+            for issue in audit.get("issues") or []:
+                if not isinstance(issue,dict):
+                    continue
+                line=chunk.to_global(issue.get("line"))
+                if line is not None and line<=chunk.header_end and chunk.index>0:
+                    continue  # the header is audited by the first chunk
+                issue=dict(issue,file=filepath,line=line,
+                           description=self.renumber_text(issue.get("description",""),chunk))
+                key=(line,str(issue.get("type")),normalize(issue["description"]))
+                if key not in seen_issues:
+                    seen_issues.add(key)
+                    issues.append(issue)
+            for step in audit.get("refactoring_plan") or []:
+                if not isinstance(step,dict):
+                    continue
+                action=self.renumber_text(step.get("action",""),chunk)
+                if normalize(action) not in seen_steps:
+                    seen_steps.add(normalize(action))
+                    plan.append(dict(step,file=filepath,action=action))
+            level=audit.get("confidence")
+            if level in CONFIDENCE_LEVELS and CONFIDENCE_LEVELS.index(level)<CONFIDENCE_LEVELS.index(confidence):
+                confidence=level
+
+        issues.sort(key=lambda issue:(issue["line"] is None,issue["line"] or 0))
+        for number,step in enumerate(plan,start=1):
+            step["step"]=number
+        score=pylint_report.get("score") if isinstance(pylint_report,dict) else None
+        return json.dumps({
+            "files_analyzed":[{"file":filepath,"pylint_score":score,"total_issues":len(issues)}],
+            "issues":issues,
+            "refactoring_plan":plan,
+            "confidence":confidence
+        })
+
+    def renumber_text(self,text,chunk:AuditChunk):
+        """'line 12' / 'lines 3-5' written against the chunk -> file line numbers."""
+        def replace(match):
+            first=chunk.to_global(int(match.group(2)))
+            last=chunk.to_global(int(match.group(3))) if match.group(3) else None
+            if first is None:
+                return match.group(0)
+            return f"{match.group(1)}{first}"+(f"-{last}" if last is not None else "")
+        return re.sub(r"\b([Ll]ines? )(\d+)(?:-(\d+))?",replace,str(text))
 
 
+def normalize(text) -> str:
+    return " ".join(str(text).lower().split())
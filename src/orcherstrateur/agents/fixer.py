@@ -1,25 +1,35 @@
 import json
 import os
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-from ...tools.file_tools import FileTools
+from src.utils.llm_cache import CachedLLM
+from src.utils.prompt_registry import get_prompt
 
 load_dotenv()
 
 class FixerAgent:
    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        self.llm = CachedLLM(ChatGoogleGenerativeAI(
             model="gemini-2.5-flash",
             api_key=os.getenv("GOOGLE_API_KEY"),
-        )
+        ), "gemini-2.5-flash")
 
-        self.fl = FileTools()
-        self.first_prompt = self.fl.read_file(self.fl,"prompts/fixer.txt")
         # self.retry_prompt = "Fix ONLY what is needed to make the failing tests pass, without violating the refactoring plan"
 
+   @property
+   def first_prompt(self):
+       return get_prompt("fixer")
 
-   def fix(self,refactoring_plan,originalcode,filepath,test_results=None):
+   @property
+   def slice_prompt(self):
+       return get_prompt("fixer_slices")
+
+   @property
+   def patch_prompt(self):
+       return get_prompt("fixer_patch")
+
+
+   def build_prompt(self,refactoring_plan,originalcode,filepath,test_results=None):
        prompt=self.first_prompt
        prompt+= f"""Refactoring plan (JSON):\n
            {refactoring_plan}
@@ -36,12 +46,101 @@ file:{filepath}"""
            prompt+=f"""
            In case of Retry:\n
 PYTEST FAILURES:
-{test_results["failures"]}
+{self.format_failures(test_results)}
+           """
+       return prompt
+
+   def build_slice_prompt(self,refactoring_plan,context,filepath,test_results=None):
+       """Prompt with only the slices to fix (see src/tools/ast_slicer.py)."""
+       prompt=self.slice_prompt
+       prompt+= f"""Refactoring plan (JSON):\n
+           {refactoring_plan}
+
+Slices:\n
+{context} \n
+file:{filepath}"""
+       if test_results:
+           prompt+=f"""
+PYTEST FAILURES:
+{self.format_failures(test_results)}
+           """
+       return prompt
+
+   def build_patch_prompt(self,refactoring_plan,originalcode,filepath,test_results=None,conflicts=None):
+       """Prompt asking for a unified diff instead of the whole file."""
+       prompt=self.patch_prompt
+       prompt+= f"""Refactoring plan (JSON):\n
+           {refactoring_plan}
+
+Original code:\n
+{originalcode} \n
+file:{filepath}"""
+       if test_results:
+           prompt+=f"""
+PYTEST FAILURES:
+{self.format_failures(test_results)}
            """
-           
+       if conflicts:
+           prompt+=f"""
+YOUR PREVIOUS PATCH WAS REJECTED:
+{chr(10).join(conflicts)}
+Copy context lines exactly from the original code above.
+           """
+       return prompt
+
+   def format_failures(self,test_results,max_traceback=1500):
+       """Failed tests with their message and (truncated) traceback."""
+       details=test_results.get("failure_details")
+       if details is None:
+           return test_results["failures"]
+       res=[]
+       for d in details:
+           res.append(f"- {d['nodeid']} [{d['outcome']}]: {d['message']}\n{d['traceback'][-max_traceback:]}")
+       return "\n".join(res)
+
+   def fix(self,refactoring_plan,originalcode,filepath,test_results=None):
+       prompt=self.build_prompt(refactoring_plan,originalcode,filepath,test_results)
                
        response = self.llm.invoke(prompt)
  
-       return json.loads(response.content)
+       return self.parse_response(prompt,response)
+
+   async def afix(self,refactoring_plan,originalcode,filepath,test_results=None):
+       """Async variant of fix (uses llm.ainvoke)."""
+       prompt=self.build_prompt(refactoring_plan,originalcode,filepath,test_results)
+       response = await self.llm.ainvoke(prompt)
+       return self.parse_response(prompt,response)
+
+   def fix_slices(self,refactoring_plan,context,filepath,test_results=None):
+       """Like fix, but returns {"file", "slices": {name: code}}."""
+       prompt=self.build_slice_prompt(refactoring_plan,context,filepath,test_results)
+       response = self.llm.invoke(prompt)
+       return self.parse_response(prompt,response)
+
+   async def afix_slices(self,refactoring_plan,context,filepath,test_results=None):
+       """Async variant of fix_slices."""
+       prompt=self.build_slice_prompt(refactoring_plan,context,filepath,test_results)
+       response = await self.llm.ainvoke(prompt)
+       return self.parse_response(prompt,response)
+
+   def fix_patch(self,refactoring_plan,originalcode,filepath,test_results=None,conflicts=None):
+       """Like fix, but returns (prompt, {"file", "patch": unified diff})."""
+       prompt=self.build_patch_prompt(refactoring_plan,originalcode,filepath,test_results,conflicts)
+       response = self.llm.invoke(prompt)
+       return prompt,self.parse_response(prompt,response)
+
+   async def afix_patch(self,refactoring_plan,originalcode,filepath,test_results=None,conflicts=None):
+       """Async variant of fix_patch."""
+       prompt=self.build_patch_prompt(refactoring_plan,originalcode,filepath,test_results,conflicts)
+       response = await self.llm.ainvoke(prompt)
+       return prompt,self.parse_response(prompt,response)
+
+   def parse_response(self,prompt,response):
+       try:
+           return json.loads(response.content)
+       except json.JSONDecodeError:
+           # never replay an unparsable answer from the cache
+           self.llm.discard(prompt)
+           raise
 
 
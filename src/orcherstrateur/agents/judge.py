@@ -1,31 +1,57 @@
 import os
-from pathlib import Path
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
+from src.utils.llm_cache import CachedLLM
 import json
-from src.tools.file_tools import FileTools
+from src.utils.prompt_registry import get_prompt
 load_dotenv()
 
 class JudgeAgent:
     def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        self.llm = CachedLLM(ChatGoogleGenerativeAI(
             model="gemini-2.5-flash",
             api_key=os.getenv("GOOGLE_API_KEY"),
-        )
-        fl=FileTools()
-        self.prompt=fl.read_file(fl,"prompts/judgee.txt")
+        ), "gemini-2.5-flash")
 
-    def judge(self,current_code,filename):
+    @property
+    def prompt(self):
+        return get_prompt("judgee")
+
+    def build_prompt(self,current_code,filename,only_functions=None):
         prompt=self.prompt
         prompt+=f"""
         The current code to test:\n{current_code}\n
         file name:{filename}
         """
+        if only_functions:
+            # the other functions already have tests (kept in the test store)
+            prompt+=f"""
+        Only write tests for: {", ".join(only_functions)}
+        Each test must call the function it tests by name.
+        """
+        return prompt
+
+    def judge(self,current_code,filename,only_functions=None):
+        prompt=self.build_prompt(current_code,filename,only_functions)
         
         
       
         response = self.llm.invoke(prompt)
        
 
-        return json.loads(response.content)
-       
\ No newline at end of file
+        return self.parse_response(prompt,response)
+
+    async def ajudge(self,current_code,filename,only_functions=None):
+        """Async variant of judge (uses llm.ainvoke)."""
+        prompt=self.build_prompt(current_code,filename,only_functions)
+        response = await self.llm.ainvoke(prompt)
+        return self.parse_response(prompt,response)
+
+    def parse_response(self,prompt,response):
+        try:
+            return json.loads(response.content)
+        except json.JSONDecodeError:
+            # never replay an unparsable answer from the cache
+            self.llm.discard(prompt)
+            raise
+       
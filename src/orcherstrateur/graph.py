@@ -1,13 +1,24 @@
-import json
-from pylint import run_pylint
+import ast
+import atexit
+import functools
+import inspect
+import os
+import threading
+from pathlib import Path
 from .State import state_flow
 from .agents.auditor import AuditorAgent 
 from .agents.fixer import FixerAgent
 from .agents.judge import JudgeAgent
 from src.utils.logger import ActionType, log_experiment
+from src.utils import llm_cache, metrics
+from src.utils.prompt_registry import get_prompt, prompt_version
 from src.tools.file_tools import FileTools
 from src.tools.testing_tools import TestingTools
 from src.tools.analysis_tools import AnalysisTools
+from src.tools.test_store import TestSuiteStore, public_signatures
+from src.tools.snapshot_store import SnapshotStore
+from src.tools.workspace import get_workspace
+from src.tools.ast_slicer import build_context, parse_audit, select_units, should_slice, splice, top_level_units
 #here i will generate the graph 
 #i will have audit node fix node judge node
 '''
@@ -17,12 +28,89 @@ so that audit yroh le fixer apr fixer lel test and if there is error i will
 go to fixer again with the output of the judge that can be as and input to the fixer 
 
 '''
-fl=FileTools()
-fa=AnalysisTools()
-ft=TestingTools()
-auditor=AuditorAgent ()
-fixer=FixerAgent()
-judge_agent=JudgeAgent()
+# Tools, agents and the compiled apps are built on first use (lazy(name)),
+# not at import: `main.py --help` and tooling that only needs the logger
+# don't pay for the Gemini clients, the prompt files or graph compilation.
+# Outside code reads them as module attributes (graph.app, graph.auditor...)
+# and can replace them the same way (e.g. a fake LLM in benchmarks/).
+_lazy_lock=threading.RLock()
+
+# the shared tools and stores keep an SQLite connection open until exit
+def _build_analysis_tools():
+    fa=AnalysisTools()
+    atexit.register(fa.close)
+    return fa
+
+def _build_test_store():
+    # SWARM_TEST_STORE=0 regenerates the whole test file on every judge pass
+    if os.getenv("SWARM_TEST_STORE","1")=="0":
+        return None
+    store=TestSuiteStore()
+    atexit.register(store.close)
+    return store
+
+_FACTORIES={
+    "fl":FileTools,
+    "fa":_build_analysis_tools,
+    "ft":TestingTools,
+    "auditor":AuditorAgent,
+    "fixer":FixerAgent,
+    "judge_agent":JudgeAgent,
+    "test_store":_build_test_store,
+    "snapshots":SnapshotStore,
+    "app":lambda:build_workflow(),
+    "async_app":lambda:build_workflow(asynchronous=True),
+}
+
+def lazy(name:str):
+    """The shared instance `name` (see _FACTORIES), built on first use."""
+    namespace=globals()
+    if name in namespace:
+        return namespace[name]
+    with _lazy_lock:
+        if name not in namespace:
+            namespace[name]=_FACTORIES[name]()
+        return namespace[name]
+
+def __getattr__(name:str):
+    if name in _FACTORIES:
+        return lazy(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def tool(state:state_flow,name:str):
+    """
+    fl / fa / ft for a workflow: its workspace's own tools when it runs in
+    one (state["workspace"]), the shared instances otherwise.
+    """
+    if state.get("workspace"):
+        return getattr(get_workspace(state["workspace"]),name)
+    return lazy(name)
+
+def records_llm_keys(fn):
+    """
+    Node decorator: add the LLM cache keys of the answers the node used to
+    state["llm_keys"], so a workflow that fails can drop them all.
+    """
+    def keep(state,keys):
+        state["llm_keys"]=list(dict.fromkeys((state.get("llm_keys") or [])+keys))
+        return state
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(state):
+            with llm_cache.recording() as keys:
+                state=await fn(state)
+            return keep(state,keys)
+    else:
+        @functools.wraps(fn)
+        def wrapper(state):
+            with llm_cache.recording() as keys:
+                state=fn(state)
+            return keep(state,keys)
+    return wrapper
+
+# fixer_mode "patch": diffs tried (conflicts fed back) before a full rewrite
+PATCH_ATTEMPTS=2
 def get_issues(issues: list) -> str:
     res = []
     for i, item in enumerate(issues, start=1):
@@ -32,6 +120,18 @@ def get_issues(issues: list) -> str:
         )
     return "\n".join(res)
 
+def get_test_path(file_path: str) -> str:
+    """
+    Generated test file for a target file.
+
+    Named after the target (not after the judge's suggestion) and placed next
+    to it, so concurrent workflows never overwrite each other's tests. The
+    test_swarm_ prefix keeps it apart from the user's own test_<stem>.py,
+    which the workflow would otherwise overwrite and then delete.
+    """
+    path = Path(file_path)
+    return str(path.parent / f"test_swarm_{path.stem}.py")
+
 def get_study_plan(study_plan:list)->str:
     res=[]
     for i,item in enumerate(study_plan,start=1):
@@ -43,11 +143,32 @@ def get_study_plan(study_plan:list)->str:
 # i will use those func in order to get the issues and study plan from state passsed to fixer node
 #to pass it into the prompt of the fixer    
     
+@metrics.node("auditor")
+@records_llm_keys
 def auditor_node(state: state_flow) -> state_flow:
+    fl=tool(state,"fl")
+    fa=tool(state,"fa")
+    auditor=lazy("auditor")
     path=state["file_path"]
     content = fl.read_file(fl,path)
     pylint_report = fa.run_pylint(fa,state["file_path"])
     audit_result = auditor .analyze(content,pylint_report,state["file_path"])
+    return record_audit(state,audit_result)
+
+@metrics.node("auditor")
+@records_llm_keys
+async def aauditor_node(state: state_flow) -> state_flow:
+    """Async auditor node: pylint and the LLM call don't block the event loop."""
+    fl=tool(state,"fl")
+    fa=tool(state,"fa")
+    auditor=lazy("auditor")
+    path=state["file_path"]
+    content = fl.read_file(fl,path)
+    pylint_report = await fa.arun_pylint(fa,state["file_path"])
+    audit_result = await auditor.aanalyze(content,pylint_report,state["file_path"])
+    return record_audit(state,audit_result)
+
+def record_audit(state: state_flow, audit_result) -> state_flow:
     # if isinstance(audit_result, str):
     #     parsed_result = json.loads(audit_result)
     # else:
@@ -58,8 +179,10 @@ model_used = "gemini-2.5-flash",
 action = ActionType.ANALYSIS, 
 details = {
 "file_analyzed": state["file_path"],
-"input_prompt":fl.read_file(fl,"prompts/auditor.txt"), # MANDATORY
+"input_prompt":get_prompt("auditor"), # MANDATORY
+"prompt_version":prompt_version("auditor"),
 "output_response":f"{audit_result}",
+"metrics":metrics.node_summary(),
 # "issues_found": len(all_issues)
 },
 status="SUCCESS" )
@@ -75,46 +198,285 @@ status="SUCCESS" )
     
   
     return state
+@metrics.node("fixer")
+@records_llm_keys
 def fixer_node(state:state_flow)->state_flow:
     #issues=gestate["issues"])
+    fl=tool(state,"fl")
+    fixer=lazy("fixer")
     plan=state["fix_plan"]
     origin_code=fl.read_file(fl,state["file_path"])
-    fixer_response=fixer.fix(plan,origin_code,state["file_path"])
+    if state.get("fixer_mode")=="patch":
+        for attempt in range(1,PATCH_ATTEMPTS+1):
+            try:
+                with metrics.tagged(attempt=attempt):
+                    prompt,patch_response=fixer.fix_patch(plan,origin_code,state["file_path"],state["test_results"],state.get("patch_conflicts"))
+            except ValueError as e:
+                state["patch_conflicts"]=[f"answer is not valid JSON: {e}"]
+                continue
+            fixed=check_patch(state,prompt,patch_response)
+            if fixed is not None:
+                return apply_fix(state,fixed)
+        print(f"⚠️ Patch rejected {PATCH_ATTEMPTS} times, sending the whole file")
+        state["patch_conflicts"]=None
+    sliced=plan_slices(state,origin_code)
+    if sliced is not None:
+        context,selected=sliced
+        try:
+            slice_response=fixer.fix_slices(plan,context,state["file_path"],state["test_results"])
+            return apply_fix(state,splice_response(state,origin_code,selected,slice_response))
+        except (ValueError,KeyError,TypeError) as e:
+            print(f"⚠️ Slice fix unusable ({e}), sending the whole file")
+    with metrics.tagged(fallback=state.get("fixer_mode")=="patch" or sliced is not None):
+        fixer_response=fixer.fix(plan,origin_code,state["file_path"],state["test_results"])
+    return apply_fix(state,fixer_response)
+
+@metrics.node("fixer")
+@records_llm_keys
+async def afixer_node(state:state_flow)->state_flow:
+    """Async fixer node."""
+    fl=tool(state,"fl")
+    fixer=lazy("fixer")
+    plan=state["fix_plan"]
+    origin_code=fl.read_file(fl,state["file_path"])
+    if state.get("fixer_mode")=="patch":
+        for attempt in range(1,PATCH_ATTEMPTS+1):
+            try:
+                with metrics.tagged(attempt=attempt):
+                    prompt,patch_response=await fixer.afix_patch(plan,origin_code,state["file_path"],state["test_results"],state.get("patch_conflicts"))
+            except ValueError as e:
+                state["patch_conflicts"]=[f"answer is not valid JSON: {e}"]
+                continue
+            fixed=check_patch(state,prompt,patch_response)
+            if fixed is not None:
+                return apply_fix(state,fixed)
+        print(f"⚠️ Patch rejected {PATCH_ATTEMPTS} times, sending the whole file")
+        state["patch_conflicts"]=None
+    sliced=plan_slices(state,origin_code)
+    if sliced is not None:
+        context,selected=sliced
+        try:
+            slice_response=await fixer.afix_slices(plan,context,state["file_path"],state["test_results"])
+            return apply_fix(state,splice_response(state,origin_code,selected,slice_response))
+        except (ValueError,KeyError,TypeError) as e:
+            print(f"⚠️ Slice fix unusable ({e}), sending the whole file")
+    with metrics.tagged(fallback=state.get("fixer_mode")=="patch" or sliced is not None):
+        fixer_response=await fixer.afix(plan,origin_code,state["file_path"],state["test_results"])
+    return apply_fix(state,fixer_response)
+
+def check_patch(state:state_flow,prompt:str,patch_response)->dict:
+    """
+    Apply the fixer's diff in memory; None (and state["patch_conflicts"] set
+    for the next attempt) if a hunk doesn't match or the result doesn't parse.
+    """
+    fl=tool(state,"fl")
+    fixer=lazy("fixer")
+    patch=patch_response.get("patch") if isinstance(patch_response,dict) else None
+    result=fl.apply_patch(state["file_path"],str(patch or ""),write=False)
+    conflicts=result["conflicts"]
+    if result["applied"]:
+        try:
+            ast.parse(result["content"])
+        except SyntaxError as e:
+            conflicts=[f"patched code does not parse: {e}"]
+    if not conflicts:
+        state["patch_conflicts"]=None
+        return {"file":state["file_path"],"fixed_code":result["content"]}
+    print(f"⚠️ Patch conflicts: {conflicts}")
+    state["patch_conflicts"]=conflicts
+    # never replay a rejected patch from the cache
+    fixer.llm.discard(prompt)
+    return None
+
+def plan_slices(state:state_flow,source:str):
+    """
+    (context, selected units) when the fixer should only get the functions
+    and classes touched by the audit issues / failing tests, else None.
+
+    state["fixer_mode"]: "full" (whole file), "slice", or "auto" (slices
+    only for large files where they cover a small part of the code);
+    "patch" falls back here once its diffs were rejected.
+    """
+    mode=state.get("fixer_mode") or "auto"
+    if mode=="patch":
+        mode="auto"
+    if mode=="full":
+        return None
+    units=top_level_units(source)
+    if units is None:
+        return None
+    # audit line numbers refer to the original file: once the fixer has
+    # rewritten it, only the test failures locate what to fix
+    audit=parse_audit(state["fix_plan"]) if state["iteration"]==0 else None
+    selected=select_units(units,audit,state["test_results"],state["file_path"])
+    if not should_slice(mode,source,units,selected):
+        return None
+    print(f"✂️ Sending {len(selected)-1} slice(s) of {state['file_path']} to the fixer")
+    return build_context(source,units,selected),selected
+
+def splice_response(state:state_flow,source:str,selected,slice_response)->dict:
+    """Fixer slice answer turned into the usual {"file", "fixed_code"} shape."""
+    return {
+        "file":state["file_path"],
+        "fixed_code":splice(source,selected,slice_response["slices"])
+    }
+
+def apply_fix(state:state_flow,fixer_response)->state_flow:
+    fl=tool(state,"fl")
     log_experiment(
 agent_name = "Auditor_Agent",
 model_used = "gemini-2.5-flash",
 action = ActionType.FIX, 
 details = {
 "file_analyzed": state["file_path"],
-"input_prompt":fl.read_file(fl,"prompts/fixer.txt"),
+"input_prompt":get_prompt("fixer"),
+"prompt_version":prompt_version("fixer"),
 "output_response":fixer_response,
+"metrics":metrics.node_summary(),
 },
 status="SUCCESS" )
-    print("backup,,,")
-    backup_path= fl.backup_file(fl,state["file_path"])
-    state["backup_path"]=backup_path
+    if state["iteration"]==0:
+        # the original: rolled back to if the run fails
+        state["backup_path"]=snapshot_file(state)
     fl.write_file(fl,state["file_path"],fixer_response["fixed_code"])
     return state
+
+def snapshot_file(state:state_flow):
+    """Record the file's current version for this iteration; its snapshot path."""
+    fl=tool(state,"fl")
+    snapshots=lazy("snapshots")
+    # overlay mode: the current version may not be on disk yet
+    content=fl.read_file(fl,state["file_path"]) if fl.overlay else None
+    digest=snapshots.snapshot(state["file_path"],state["iteration"],content=content)
+    return snapshots.object_path(digest) if digest else None
   
  #i add the auditor output to the state and return it 
   
+@metrics.node("judge")
+@records_llm_keys
 def judge_node(state:state_flow)->state_flow:
+    fl=tool(state,"fl")
+    ft=tool(state,"ft")
+    judge_agent=lazy("judge_agent")
+    current_code=fl.read_file(fl,state["file_path"])
+    signatures,stale=plan_tests(state["file_path"],current_code)
+    if stale==[]:
+        test_code=reuse_tests(state["file_path"])
+    else:
+        with llm_cache.recording() as judge_keys:
+            judge_response=judge_agent.judge(current_code,state["file_path"],partial_only(signatures,stale))
+        test_code=store_tests(state["file_path"],signatures,stale,judge_response,judge_keys)
+    test_path=write_tests(state,test_code)
+    pytest_output=ft.run_pytest_incremental(test_path)
+    if stale==[]:
+        check_reused_tests(state["file_path"],pytest_output)
+    return record_test_results(state,pytest_output)
+
+@metrics.node("judge")
+@records_llm_keys
+async def ajudge_node(state:state_flow)->state_flow:
+    """Async judge node: test generation and pytest run are awaited."""
+    fl=tool(state,"fl")
+    ft=tool(state,"ft")
+    judge_agent=lazy("judge_agent")
     current_code=fl.read_file(fl,state["file_path"])
-    judge_response=judge_agent.judge(current_code,state["file_path"])
-    test_path=f"""sandbox/{judge_response["test_file_name"]}"""
+    signatures,stale=plan_tests(state["file_path"],current_code)
+    if stale==[]:
+        test_code=reuse_tests(state["file_path"])
+    else:
+        with llm_cache.recording() as judge_keys:
+            judge_response=await judge_agent.ajudge(current_code,state["file_path"],partial_only(signatures,stale))
+        test_code=store_tests(state["file_path"],signatures,stale,judge_response,judge_keys)
+    test_path=write_tests(state,test_code)
+    pytest_output=await ft.arun_pytest_incremental(test_path)
+    if stale==[]:
+        check_reused_tests(state["file_path"],pytest_output)
+    return record_test_results(state,pytest_output)
+
+def plan_tests(file_path:str,current_code:str):
+    """
+    Which functions need newly generated tests.
+
+    Returns (signatures, stale): stale is [] when the stored suite can be
+    reused as is, and None when the store can't be used (disabled, or the
+    code doesn't parse) so the whole file must be generated.
+    """
+    test_store=lazy("test_store")
+    if test_store is None:
+        return None,None
+    signatures=public_signatures(current_code)
+    if signatures is None:
+        return None,None
+    stale=test_store.stale_functions(file_path,signatures)
+    if not stale and not test_store.has_suite(file_path):
+        # no public function at all, and nothing generated yet
+        return signatures,None
+    return signatures,stale
+
+def partial_only(signatures,stale):
+    """Functions to restrict generation to (None = the whole file)."""
+    if not stale or len(stale)==len(signatures):
+        return None
+    return stale
+
+def reuse_tests(file_path:str)->str:
+    test_store=lazy("test_store")
+    print(f"♻️ Reusing stored tests for {file_path}")
+    test_store.reused+=1
+    return test_store.assemble(file_path)
+
+def check_reused_tests(file_path:str,pytest_output)->bool:
+    """
+    Drop a reused suite that doesn't even collect: the next judge pass
+    generates a new one instead of replaying it. True if it was dropped.
+    """
+    if not isinstance(pytest_output,dict) or not pytest_output.get("collect_errors"):
+        return False
+    forget_tests(file_path)
+    return True
+
+def forget_tests(file_path:str):
+    """
+    Drop the stored suite of a file and the cached judge answers it came
+    from, so its next judge pass asks the model for new tests.
+    """
+    test_store=lazy("test_store")
+    if test_store is not None:
+        print(f"🗑️ Stored tests of {file_path} dropped")
+        llm_cache.discard_keys(test_store.llm_keys(file_path))
+        test_store.invalidate(file_path)
+
+def store_tests(file_path:str,signatures,stale,judge_response,llm_keys=None)->str:
+    test_store=lazy("test_store")
+    test_code=judge_response["test_code"]
+    if signatures is None:
+        return test_code
+    test_store.generated+=1
+    if stale is None:
+        stale=list(signatures)
+    if not test_store.update(file_path,signatures,test_code,stale,llm_keys):
+        return test_code
+    return test_store.assemble(file_path)
+
+def write_tests(state:state_flow,test_code:str)->str:
+    fl=tool(state,"fl")
+    test_path=get_test_path(state["file_path"])
     state["test_path"]=test_path
-    fl.write_file(fl,test_path,judge_response["test_code"])
-    pytest_output=ft.run_pytest(test_path)
+    fl.write_file(fl,test_path,test_code)
+    # overlay mode: pytest reads the target and its tests from disk
+    fl.flush([state["file_path"],test_path])
+    return test_path
+
+def record_test_results(state:state_flow,pytest_output)->state_flow:
     state["test_results"]=pytest_output
+    state["iteration"]+=1
+    snapshot_file(state)
     return state
 def end_node(state):
     
     return state
 #////////////////////defining edges////////////
 
-from langgraph.graph import StateGraph,END
-from src.tools.file_tools import FileTools 
-fl=FileTools()
 def should_continue(state: state_flow) -> str:
     """
     Routing function: Decide whether to continue iterating or stop.
@@ -124,18 +486,32 @@ def should_continue(state: state_flow) -> str:
         "fixer": Loop back to fixer for another iteration
     """
     #  tests passed!
+    fl=tool(state,"fl")
+    ft=tool(state,"ft")
+    snapshots=lazy("snapshots")
     if state["test_results"]["success"]:
         
         print(f"SUCCESS: Tests passed! Stopping workflow.")
-        fl.delete_file(fl,state["backup_path"])
+        ft.forget_test_state(state["test_path"])
         fl.delete_file(fl,state["test_path"])
+        fl.commit([state["file_path"]])
+        snapshots.forget(state["file_path"])
         return "end"
     
     #  reached max iterations
     elif state["iteration"] >= state["max_iterations"]:
         print(f"Max iterations ({state['max_iterations']}) reached.")
         print(f"   Stopping workflow with failing tests.")
-        fl.restore_backup(fl,state["backup_path"],state["file_path"])
+        ft.forget_test_state(state["test_path"])
+        # the suite may be what is wrong: never replay it on the next run
+        forget_tests(state["file_path"])
+        # nor the audit and fixes: the next run asks the model again
+        llm_cache.discard_keys(state.get("llm_keys") or [])
+        # buffered writes first, so they can't overwrite the restored version
+        fl.commit([state["file_path"],state["test_path"]])
+        # no iteration passed: back to the original
+        snapshots.restore(state["file_path"],0)
+        snapshots.forget(state["file_path"])
         return "end"
     
     # go back to fixer
@@ -146,13 +522,26 @@ def should_continue(state: state_flow) -> str:
 
 
 
-def build_workflow() -> StateGraph:
+def build_workflow(asynchronous: bool = False) -> "StateGraph":
+    """
+    Compile the auditor -> fixer -> judge graph.
+
+    Args:
+        asynchronous: use the async node variants; the compiled app must
+            then be driven with ``await app.ainvoke(state)``.
+    """
+    from langgraph.graph import StateGraph, END
     graph = StateGraph(state_flow)
 
     # Ajouter tous les nœuds
-    graph.add_node("auditor", auditor_node)
-    graph.add_node("fixer", fixer_node)
-    graph.add_node("judge", judge_node)
+    if asynchronous:
+        graph.add_node("auditor", aauditor_node)
+        graph.add_node("fixer", afixer_node)
+        graph.add_node("judge", ajudge_node)
+    else:
+        graph.add_node("auditor", auditor_node)
+        graph.add_node("fixer", fixer_node)
+        graph.add_node("judge", judge_node)
     # graph.add_node("end", end_node)
 
     # Arêtes simples
@@ -170,6 +559,3 @@ def build_workflow() -> StateGraph:
     graph.set_entry_point("auditor")
 
     return graph.compile()
-
-
-app=build_workflow()
\ No newline at end of file
@@ -3,23 +3,40 @@ Code Analysis Tools for Refactoring Swarm
 Author: Toolsmith Team
 Purpose: Run static analysis (pylint) and extract code quality metrics
 """
+import ast
+import asyncio
+import os
 import subprocess
 import json
 import re
 from typing import Dict, List, Optional
 from pathlib import Path
 
+from src.utils import metrics
+from .file_discovery import DEFAULT_RULES, iter_python_files
+from .lint_cache import LintCache
+from .pylint_engine import LintRun, get_engine
+
 class AnalysisTools:
     """Tools for static code analysis using pylint"""
     
-    def __init__(self, sandbox_path: str = "./sandbox"):
+    def __init__(self, sandbox_path: str = "./sandbox", engine: Optional[str] = None,
+                 use_cache: Optional[bool] = None):
         """
         Initialize analysis tools
         
         Args:
             sandbox_path: Base directory for file operations
+            engine: "subprocess" (one pylint process per file) or "warm"
+                (long-lived pylint workers); defaults to $PYLINT_ENGINE
+            use_cache: Reuse results of unchanged files; defaults to
+                $SWARM_LINT_CACHE (on unless set to "0")
         """
         self.sandbox_path = Path(sandbox_path).resolve()
+        self.engine = engine or os.getenv("PYLINT_ENGINE", "subprocess")
+        if use_cache is None:
+            use_cache = os.getenv("SWARM_LINT_CACHE", "1") != "0"
+        self.lint_cache = LintCache() if use_cache else None
         print(f"🔍 AnalysisTools initialized")
     @staticmethod
     def run_pylint(self, file_path: str, timeout: int = 30) -> Dict:
@@ -46,6 +63,23 @@ class AnalysisTools:
         """
         print(f"🔍 Running pylint on: {file_path}")
         
+        with metrics.timed("tool", "pylint", engine=self.engine) as record:
+            cache_key = self._lint_cache_key(file_path, self.engine)
+            cached = self._get_cached(cache_key, file_path)
+            record["cached"] = cached is not None
+            if cached is not None:
+                return cached
+            
+            result = self._run_pylint_uncached(file_path, timeout)
+            record["pylint_status"] = result.get("status")
+            self._store_cached(cache_key, result)
+            return result
+    
+    def _run_pylint_uncached(self, file_path: str, timeout: int) -> Dict:
+        """run_pylint without the lint cache"""
+        if self.engine == "warm":
+            return self._run_pylint_warm(file_path, timeout)
+        
         try:
             # Run pylint with JSON output
             result = subprocess.run(
@@ -55,48 +89,238 @@ class AnalysisTools:
                 timeout=timeout
             )
             
-            # Parse JSON output
-            try:
-                issues = json.loads(result.stdout) if result.stdout else []
-            except json.JSONDecodeError:
-                print("⚠️ Could not parse pylint JSON output")
-                issues = []
+            return self._build_result(result.stdout, result.stderr)
             
-            # Extract score from stderr (pylint prints score there)
-            score, max_score = self._extract_score(result.stderr)
+        except subprocess.TimeoutExpired:
+            print(f"⏰ Pylint timeout for {file_path}")
+            return self._empty_result("timeout", f"Analysis timeout after {timeout}s")
+        
+        except FileNotFoundError:
+            print("❌ Pylint not installed")
+            return self._empty_result("not_installed", "Pylint not found. Run: pip install pylint")
+        
+        except Exception as e:
+            print(f"❌ Error running pylint: {e}")
+            return self._empty_result("error", str(e))
+    
+    @staticmethod
+    async def arun_pylint(self, file_path: str, timeout: int = 30) -> Dict:
+        """
+        Async variant of run_pylint (asyncio subprocess, same result dict)
+        
+        Args:
+            file_path: Path to Python file to analyze
+            timeout: Maximum execution time in seconds
             
-            # Categorize issues
-            categorized = self._categorize_issues(issues)
+        Returns:
+            Same dictionary as run_pylint
+        """
+        print(f"🔍 Running pylint on: {file_path}")
+        
+        with metrics.timed("tool", "pylint", engine=self.engine) as record:
+            cache_key = self._lint_cache_key(file_path, self.engine)
+            cached = self._get_cached(cache_key, file_path)
+            record["cached"] = cached is not None
+            if cached is not None:
+                return cached
             
-            analysis_result = {
-                'score': score,
-                'max_score': max_score,
-                'percentage': round((score / max_score * 100) if max_score > 0 else 0, 2),
-                'errors': categorized['errors'],
-                'warnings': categorized['warnings'],
-                'conventions': categorized['conventions'],
-                'refactors': categorized['refactors'],
-                'total_issues': len(issues),
-                'raw_output': result.stderr,
-                'status': 'success'
-            }
+            result = await self._arun_pylint_uncached(file_path, timeout)
+            record["pylint_status"] = result.get("status")
+            self._store_cached(cache_key, result)
+            return result
+    
+    async def _arun_pylint_uncached(self, file_path: str, timeout: int) -> Dict:
+        """arun_pylint without the lint cache"""
+        if self.engine == "warm":
+            return await self._arun_pylint_warm(file_path, timeout)
+        
+        try:
+            process = await asyncio.create_subprocess_exec(
+                'pylint', file_path, '--output-format=json', '--reports=y',
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                print(f"⏰ Pylint timeout for {file_path}")
+                return self._empty_result("timeout", f"Analysis timeout after {timeout}s")
             
-            print(f"Pylint analysis complete: Score {score}/{max_score} ({analysis_result['percentage']}%)")
-            print(f" Issues found: {len(issues)} (Errors: {len(categorized['errors'])}, Warnings: {len(categorized['warnings'])})")
+            return self._build_result(
+                stdout.decode('utf-8', errors='replace'),
+                stderr.decode('utf-8', errors='replace')
+            )
+        
+        except FileNotFoundError:
+            print("❌ Pylint not installed")
+            return self._empty_result("not_installed", "Pylint not found. Run: pip install pylint")
+        
+        except Exception as e:
+            print(f"❌ Error running pylint: {e}")
+            return self._empty_result("error", str(e))
+    
+    def _lint_cache_key(self, file_path: str, flavor: str) -> Optional[str]:
+        """Lint cache key of file_path, None when caching is off"""
+        if self.lint_cache is None:
+            return None
+        return self.lint_cache.key_for(file_path, flavor)
+    
+    def _get_cached(self, cache_key: Optional[str], file_path: str) -> Optional[Dict]:
+        if cache_key is None:
+            return None
+        cached = self.lint_cache.get(cache_key)
+        if cached is not None:
+            print(f"♻️ Pylint result reused (file unchanged): {file_path}")
+        return cached
+    
+    def _store_cached(self, cache_key: Optional[str], result: Dict):
+        # errors/timeouts are not cached, they may not happen next time;
+        # LintCache.put also skips results with cross-file messages
+        if cache_key is not None and result.get('status') == 'success':
+            self.lint_cache.put(cache_key, result)
+    
+    def invalidate_lint_cache(self, file_path: Optional[str] = None) -> int:
+        """
+        Drop cached pylint results
+        
+        Args:
+            file_path: Only results for this file's current content
+                (None = whole cache)
             
-            return analysis_result
+        Returns:
+            Number of entries removed
+        """
+        if self.lint_cache is None:
+            return 0
+        return self.lint_cache.invalidate(file_path)
+    
+    def lint_cache_stats(self) -> Dict:
+        """Hit/miss statistics of the lint cache"""
+        if self.lint_cache is None:
+            return {'hits': 0, 'misses': 0, 'hit_rate': 0.0, 'entries': 0}
+        return self.lint_cache.stats()
+    
+    def close(self):
+        """Close the lint cache (the pylint workers are shared and stay up)"""
+        if self.lint_cache is not None:
+            self.lint_cache.close()
+    
+    def _run_pylint_warm(self, file_path: str, timeout: int) -> Dict:
+        """
+        run_pylint through the warm engine (same result dict)
+        
+        Args:
+            file_path: Path to Python file to analyze
+            timeout: Maximum execution time in seconds
             
-        except subprocess.TimeoutExpired:
+        Returns:
+            Analysis result dictionary
+        """
+        try:
+            lint_run = get_engine(str(self.sandbox_path)).lint(file_path, timeout, str(self.sandbox_path))
+        except TimeoutError:
             print(f"⏰ Pylint timeout for {file_path}")
             return self._empty_result("timeout", f"Analysis timeout after {timeout}s")
-        
-        except FileNotFoundError:
+        except ImportError:
             print("❌ Pylint not installed")
             return self._empty_result("not_installed", "Pylint not found. Run: pip install pylint")
-        
         except Exception as e:
             print(f"❌ Error running pylint: {e}")
             return self._empty_result("error", str(e))
+        return self._build_result_from_run(lint_run)
+    
+    async def _arun_pylint_warm(self, file_path: str, timeout: int) -> Dict:
+        """Async variant of _run_pylint_warm"""
+        engine = get_engine(str(self.sandbox_path))
+        future = engine.submit(file_path, str(self.sandbox_path))
+        try:
+            lint_run = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            # given up: not resubmitted by the restart, unlike the other lints
+            future.cancel()
+            engine.restart()
+            print(f"⏰ Pylint timeout for {file_path}")
+            return self._empty_result("timeout", f"Analysis timeout after {timeout}s")
+        except ImportError:
+            print("❌ Pylint not installed")
+            return self._empty_result("not_installed", "Pylint not found. Run: pip install pylint")
+        except Exception as e:
+            print(f"❌ Error running pylint: {e}")
+            return self._empty_result("error", str(e))
+        return self._build_result_from_run(lint_run)
+    
+    def _build_result_from_run(self, lint_run: LintRun) -> Dict:
+        """
+        Build the run_pylint result dict from a warm-engine LintRun
+        
+        Args:
+            lint_run: Structured messages and score
+            
+        Returns:
+            Analysis result dictionary
+        """
+        issues = [message.to_dict() for message in lint_run.messages]
+        raw_output = f"Your code has been rated at {lint_run.score:.2f}/{lint_run.max_score:g}"
+        return self._make_result(issues, lint_run.score, lint_run.max_score, raw_output)
+    
+    def _build_result(self, stdout: str, stderr: str) -> Dict:
+        """
+        Build the run_pylint result dict from pylint's output
+        
+        Args:
+            stdout: Pylint JSON output
+            stderr: Pylint stderr text (contains the score)
+            
+        Returns:
+            Analysis result dictionary
+        """
+        # Parse JSON output
+        try:
+            issues = json.loads(stdout) if stdout else []
+        except json.JSONDecodeError:
+            print("⚠️ Could not parse pylint JSON output")
+            issues = []
+        
+        # Extract score from stderr (pylint prints score there)
+        score, max_score = self._extract_score(stderr)
+        
+        return self._make_result(issues, score, max_score, stderr)
+    
+    def _make_result(self, issues: List[Dict], score: float, max_score: float, raw_output: str) -> Dict:
+        """
+        Assemble the run_pylint result dict
+        
+        Args:
+            issues: Pylint messages (JSON reporter shape)
+            score: Pylint score
+            max_score: Maximum score
+            raw_output: Text kept as 'raw_output'
+            
+        Returns:
+            Analysis result dictionary
+        """
+        # Categorize issues
+        categorized = self._categorize_issues(issues)
+        
+        analysis_result = {
+            'score': score,
+            'max_score': max_score,
+            'percentage': round((score / max_score * 100) if max_score > 0 else 0, 2),
+            'errors': categorized['errors'],
+            'warnings': categorized['warnings'],
+            'conventions': categorized['conventions'],
+            'refactors': categorized['refactors'],
+            'total_issues': len(issues),
+            'raw_output': raw_output,
+            'status': 'success'
+        }
+        
+        print(f"Pylint analysis complete: Score {score}/{max_score} ({analysis_result['percentage']}%)")
+        print(f" Issues found: {len(issues)} (Errors: {len(categorized['errors'])}, Warnings: {len(categorized['warnings'])})")
+        
+        return analysis_result
     
     def _extract_score(self, stderr_output: str) -> tuple[float, float]:
         """
@@ -194,35 +418,163 @@ class AnalysisTools:
             'error': error_msg
         }
     
-    def analyze_directory(self, directory: str) -> Dict[str, Dict]:
+    def analyze_directory(self, directory: str, batched: bool = False, jobs: int = 0) -> Dict[str, Dict]:
         """
         Analyze all Python files in a directory
         
         Args:
             directory: Directory path
+            batched: Lint all files in a few parallel pylint runs
+                instead of one run per file
+            jobs: Pylint parallel jobs in batched mode (0 = all cores)
             
         Returns:
             Dictionary mapping file paths to analysis results
         """
         results = {}
-        python_files = []
         
         print(f" Analyzing directory: {directory}")
         
         # Find all Python files
-        for file_path in Path(directory).rglob("*.py"):
-            if self._should_analyze(file_path):
-                python_files.append(str(file_path))
+        python_files = list(iter_python_files(directory))
         
         print(f"   Found {len(python_files)} Python files to analyze")
         
+        if batched:
+            return self.run_pylint_batch(python_files, jobs=jobs)
+        
         # Analyze each file
         for i, file_path in enumerate(python_files, 1):
             print(f"   [{i}/{len(python_files)}] Analyzing {Path(file_path).name}...")
-            results[file_path] = self.run_pylint(file_path)
+            results[file_path] = self.run_pylint(self, file_path)
         
         return results
     
+    def run_pylint_batch(self, file_paths: List[str], jobs: int = 0,
+                         batch_size: int = 200, timeout: int = 300) -> Dict[str, Dict]:
+        """
+        Lint many files with one pylint invocation per batch, using
+        pylint's parallel mode (-j), then split the output per file
+        
+        Args:
+            file_paths: Python files to analyze
+            jobs: Pylint parallel jobs (0 = all cores)
+            batch_size: Maximum files per pylint invocation
+            timeout: Maximum execution time per batch in seconds
+            
+        Returns:
+            Dictionary mapping file paths to run_pylint-shaped results
+        """
+        results = {}
+        
+        # Only files whose content changed since their last lint are re-run
+        cache_keys = {f: self._lint_cache_key(f, "batch") for f in file_paths}
+        to_lint = []
+        for file_path in file_paths:
+            cached = self._get_cached(cache_keys[file_path], file_path)
+            if cached is not None:
+                results[file_path] = cached
+            else:
+                to_lint.append(file_path)
+        
+        for start in range(0, len(to_lint), batch_size):
+            batch = to_lint[start:start + batch_size]
+            print(f"🔍 Running pylint -j {jobs} on {len(batch)} files")
+            
+            try:
+                # Cross-module checks are disabled so every file gets the
+                # same messages as when linted alone by run_pylint
+                with metrics.timed("tool", "pylint_batch", files=len(batch), jobs=jobs):
+                    result = subprocess.run(
+                        ['pylint', f'--jobs={jobs}', '--output-format=json',
+                         '--disable=duplicate-code,cyclic-import', *batch],
+                        capture_output=True,
+                        text=True,
+                        timeout=timeout
+                    )
+            except subprocess.TimeoutExpired:
+                print(f"⏰ Pylint timeout for batch of {len(batch)} files")
+                results.update({f: self._empty_result("timeout", f"Analysis timeout after {timeout}s") for f in batch})
+                continue
+            except FileNotFoundError:
+                print("❌ Pylint not installed")
+                results.update({f: self._empty_result("not_installed", "Pylint not found. Run: pip install pylint") for f in batch})
+                continue
+            
+            try:
+                issues = json.loads(result.stdout) if result.stdout else []
+            except json.JSONDecodeError:
+                print("⚠️ Could not parse pylint JSON output")
+                results.update({f: self._empty_result("error", "Could not parse pylint JSON output") for f in batch})
+                continue
+            
+            # Split the combined output back per file
+            issues_by_file = {self._path_key(f): [] for f in batch}
+            for issue in issues:
+                issues_by_file.setdefault(self._path_key(issue.get('path', '')), []).append(issue)
+            
+            for file_path in batch:
+                file_issues = issues_by_file[self._path_key(file_path)]
+                score = self._compute_score(file_issues, self._count_statements(file_path))
+                raw_output = f"Your code has been rated at {score:.2f}/10"
+                results[file_path] = self._make_result(file_issues, score, 10.0, raw_output)
+                self._store_cached(cache_keys[file_path], results[file_path])
+        
+        return {file_path: results[file_path] for file_path in file_paths}
+    
+    def _path_key(self, file_path: str) -> str:
+        """Normalized absolute path used to match pylint's 'path' field"""
+        return os.path.normcase(os.path.abspath(file_path))
+    
+    def _count_statements(self, file_path: str) -> int:
+        """
+        Count statements the way pylint does (astroid statement nodes:
+        ast statements and except handlers, docstrings excluded)
+        
+        Args:
+            file_path: Python file
+            
+        Returns:
+            Number of statements, 0 if the file cannot be parsed
+        """
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                tree = ast.parse(f.read())
+        except (OSError, SyntaxError, ValueError, UnicodeDecodeError):
+            return 0
+        
+        count = 0
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.stmt, ast.ExceptHandler)):
+                count += 1
+            if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)) \
+                    and ast.get_docstring(node, clean=False) is not None:
+                count -= 1
+        return count
+    
+    def _compute_score(self, issues: List[Dict], statements: int) -> float:
+        """
+        Pylint's default evaluation formula applied to one file
+        
+        Args:
+            issues: Pylint messages of the file
+            statements: Statement count of the file
+            
+        Returns:
+            Score out of 10
+        """
+        if statements == 0:
+            return 0.0
+        counts = {'fatal': 0, 'error': 0, 'warning': 0, 'refactor': 0, 'convention': 0}
+        for issue in issues:
+            issue_type = issue.get('type', '')
+            if issue_type in counts:
+                counts[issue_type] += 1
+        if counts['fatal']:
+            return 0.0
+        weighted = 5 * counts['error'] + counts['warning'] + counts['refactor'] + counts['convention']
+        return round(max(0.0, 10.0 - (weighted / statements) * 10), 2)
+    
     def _should_analyze(self, file_path: Path) -> bool:
         """
         Check if file should be analyzed
@@ -233,18 +585,7 @@ class AnalysisTools:
         Returns:
             True if should analyze
         """
-        exclude_patterns = [
-            '__pycache__',
-            '.venv',
-            'venv',
-            '.git',
-            'node_modules',
-            '.backup',
-            '__init__.py'  # Usually empty
-        ]
-        
-        path_str = str(file_path)
-        return not any(pattern in path_str for pattern in exclude_patterns)
+        return not DEFAULT_RULES.excluded_path(str(file_path))
     
     def get_summary(self, analysis_results: Dict[str, Dict]) -> Dict:
         """
@@ -0,0 +1,270 @@
+"""
+AST Slicer for Refactoring Swarm
+Author: Toolsmith Team
+Purpose: Map auditor issues and pytest failures to the top-level functions and
+classes they belong to, build a small prompt context from those slices, and
+splice the fixed slices back into the file
+"""
+import ast
+import json
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+# Name of the slice holding the module docstring and leading imports
+HEADER = "<header>"
+
+# Below this many lines, "auto" mode sends the whole file
+SLICE_MIN_LINES = 200
+
+# "auto" mode sends the whole file when the slices cover more than this
+SLICE_MAX_RATIO = 0.5
+
+
+@dataclass
+class Unit:
+    """A top-level block of a module (1-based, inclusive line range)"""
+    name: str
+    kind: str  # "header", "function", "class" or "statement"
+    start: int
+    end: int
+    signature: str = ""
+    # slice label, unique in the file: the name, or "name@line" when the
+    # name is defined more than once (redefinitions, overloads)
+    key: str = ""
+
+    @property
+    def span(self):
+        return self.start, self.end
+
+    def contains(self, line: int) -> bool:
+        return self.start <= line <= self.end
+
+
+def top_level_units(source: str) -> Optional[List[Unit]]:
+    """
+    Split a module into its header and top-level units
+
+    Returns:
+        Units in file order, or None if the source does not parse
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+
+    units = []
+    body = list(tree.body)
+    header_end = 0
+    while body and (isinstance(body[0], (ast.Import, ast.ImportFrom)) or _is_docstring(body[0])):
+        header_end = body.pop(0).end_lineno
+    units.append(Unit(HEADER, "header", 1, header_end))
+
+    for node in body:
+        start = min([d.lineno for d in getattr(node, "decorator_list", [])] + [node.lineno])
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            units.append(Unit(node.name, "function", start, node.end_lineno, _signature(node)))
+        elif isinstance(node, ast.ClassDef):
+            units.append(Unit(node.name, "class", start, node.end_lineno, _class_outline(node)))
+        else:
+            units.append(Unit(f"<line {start}>", "statement", start, node.end_lineno))
+
+    counts = Counter(u.name for u in units)
+    for u in units:
+        u.key = u.name if counts[u.name] == 1 else f"{u.name}@{u.start}"
+    return units
+
+
+def chunk_units(units: List[Unit], max_lines: int) -> List[List[Unit]]:
+    """
+    Group consecutive units (header excluded) into chunks of about max_lines
+
+    A unit longer than max_lines gets a chunk of its own.
+    """
+    chunks = []
+    current = []
+    for unit in units:
+        if unit.kind == "header":
+            continue
+        if current and unit.end - current[0].start + 1 > max_lines:
+            chunks.append(current)
+            current = []
+        current.append(unit)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def outline(units: List[Unit], exclude: List[Unit]) -> str:
+    """Signatures of the units not in exclude (read-only context)"""
+    excluded = {u.span for u in exclude}
+    return "\n".join(u.signature for u in units if u.span not in excluded and u.signature)
+
+
+def _is_docstring(node) -> bool:
+    return isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)
+
+
+def _signature(node, indent: str = "") -> str:
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{indent}{prefix} {node.name}({ast.unparse(node.args)}){returns}: ..."
+
+
+def _class_outline(node: ast.ClassDef) -> str:
+    bases = ", ".join(ast.unparse(base) for base in node.bases)
+    lines = [f"class {node.name}({bases}):"]
+    for item in node.body:
+        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            lines.append(_signature(item, "    "))
+    if len(lines) == 1:
+        lines.append("    ...")
+    return "\n".join(lines)
+
+
+def parse_audit(audit_result) -> Optional[Dict]:
+    """
+    Auditor output as a dict (tolerates a ```json fence around it)
+
+    Returns:
+        Parsed audit, or None if it is not JSON
+    """
+    if isinstance(audit_result, dict):
+        return audit_result
+    text = str(audit_result).strip()
+    if text.startswith("```"):
+        text = re.sub(r"^```[a-zA-Z]*\s*|\s*```$", "", text)
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def select_units(units: List[Unit], audit: Optional[Dict], test_results: Optional[Dict],
+                 file_path: str) -> Optional[List[Unit]]:
+    """
+    Units touched by the audit issues and the failing tests
+
+    An issue selects the unit containing its line, or else the units its
+    description names. Failures select units named in their message or
+    traceback, and lines of file_path appearing in the traceback.
+
+    Returns:
+        Selected units in file order (the header always included), or None
+        if some issue could not be located (the whole file is needed)
+    """
+    # a name defined twice selects both definitions; units are then told apart by span
+    names = {u.name for u in units if u.kind != "statement"}
+    selected = {units[0].span} if units and units[0].kind == "header" else set()
+
+    for issue in (audit or {}).get("issues", []):
+        found = _units_for_issue(units, names, issue)
+        if not found:
+            return None
+        selected.update(u.span for u in found)
+
+    if test_results and not test_results.get("success"):
+        details = test_results.get("failure_details")
+        if not details:
+            # timeout/crash without per-test details
+            return None
+        file_name = re.escape(file_path.replace("\\", "/").split("/")[-1])
+        for d in details:
+            text = f"{d.get('message', '')}\n{d.get('traceback', '')}"
+            mentioned = {name for name in names if re.search(rf"\b{re.escape(name)}\b", text)}
+            selected.update(u.span for u in units if u.name in mentioned)
+            for line in re.findall(rf"(?<![\w.]){file_name}\"?(?::|, line )(\d+)", text):
+                selected.update(u.span for u in units if u.contains(int(line)))
+
+    return [u for u in units if u.span in selected]
+
+
+def _units_for_issue(units: List[Unit], names: set, issue: Dict) -> List[Unit]:
+    line = issue.get("line")
+    if isinstance(line, int) and line > 0:
+        found = [u for u in units if u.contains(line)]
+        if found:
+            return found
+    description = str(issue.get("description", ""))
+    mentioned = {name for name in names if re.search(rf"\b{re.escape(name)}\b", description)}
+    return [u for u in units if u.name in mentioned]
+
+
+def should_slice(mode: str, source: str, units: List[Unit], selected: Optional[List[Unit]]) -> bool:
+    """
+    Whether to send slices instead of the whole file
+
+    Args:
+        mode: "full", "slice" or "auto"
+    """
+    if mode == "full" or not units or selected is None:
+        return False
+    if len(selected) <= 1:
+        # only the header: nothing located
+        return False
+    if mode == "slice":
+        return True
+    total = len(source.splitlines())
+    covered = sum(u.end - u.start + 1 for u in selected)
+    return total >= SLICE_MIN_LINES and covered <= total * SLICE_MAX_RATIO
+
+
+def build_context(source: str, units: List[Unit], selected: List[Unit]) -> str:
+    """
+    Prompt context: outline of the untouched units plus the selected slices
+
+    The outline gives the signatures the slices may call; only the slices
+    are meant to be rewritten.
+    """
+    lines = source.splitlines()
+    others = outline(units, selected)
+
+    parts = []
+    if others:
+        parts.append("# Other definitions in this file (read only):\n" + others)
+    for u in selected:
+        code = "\n".join(lines[u.start - 1:u.end])
+        parts.append(f"# --- slice: {u.key} (lines {u.start}-{u.end}) ---\n{code}")
+    return "\n\n".join(parts)
+
+
+def splice(source: str, selected: List[Unit], replacements: Dict[str, str]) -> str:
+    """
+    Put fixed slices back into the file
+
+    Args:
+        source: Original file content
+        selected: Units that were sent to the fixer
+        replacements: {unit key: new code}; missing units are kept as is
+
+    Returns:
+        New file content
+
+    Raises:
+        ValueError: a replacement names an unknown slice, or the result does
+            not parse
+    """
+    known = {u.key for u in selected}
+    unknown = set(replacements) - known
+    if unknown:
+        raise ValueError(f"Unknown slices in fixer output: {sorted(unknown)}")
+
+    lines = source.splitlines()
+    # bottom-up, so earlier line numbers stay valid
+    for u in sorted(selected, key=lambda u: u.start, reverse=True):
+        if u.key not in replacements:
+            continue
+        new_lines = replacements[u.key].rstrip("\n").splitlines()
+        if u.kind == "header" and u.end == 0:
+            lines[0:0] = new_lines + [""] if new_lines else []
+        else:
+            lines[u.start - 1:u.end] = new_lines
+
+    result = "\n".join(lines) + "\n"
+    try:
+        ast.parse(result)
+    except SyntaxError as e:
+        raise ValueError(f"Spliced code does not parse: {e}") from e
+    return result
@@ -0,0 +1,168 @@
+"""
+File Discovery for Refactoring Swarm
+Author: Toolsmith Team
+Purpose: Find the Python files to work on with one os.scandir walk that
+yields each file as soon as its directory is read, so processing can start
+before the walk ends, and skip excluded paths with .gitignore-style rules
+(shared by FileTools and AnalysisTools).
+
+Rules follow .gitignore syntax: "#" comments, "!" to re-include, a trailing
+"/" for directories only, a "/" elsewhere anchors the pattern to the
+directory holding the rules, "**/" matches at any depth. The last matching
+rule wins, and an excluded directory is not entered. Every .gitignore met
+during the walk adds its rules for its own subtree.
+
+Usage:
+    for path in iter_python_files("sandbox/"):
+        ...
+"""
+import fnmatch
+import os
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+GITIGNORE = ".gitignore"
+
+DEFAULT_EXCLUDES = [
+    "__pycache__/",
+    ".pytest_cache/",
+    ".git/",
+    ".venv/",
+    "venv/",
+    "node_modules/",
+    ".snapshots/",
+    "*.backup*",
+    "__*.py",  # __init__.py, __main__.py: usually empty
+]
+
+
+class _Rule:
+    __slots__ = ("pattern", "negate", "dir_only", "anchored", "base")
+
+    def __init__(self, line: str, base: str):
+        self.negate = line.startswith("!")
+        if self.negate:
+            line = line[1:]
+        self.dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if line.startswith("**/"):
+            line = line[3:]
+        self.anchored = "/" in line
+        self.pattern = line.lstrip("/")
+        self.base = base
+
+    def matches(self, relative: str, name: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if not self.anchored:
+            return fnmatch.fnmatchcase(name, self.pattern)
+        if self.base:
+            if not relative.startswith(self.base + "/"):
+                return False
+            relative = relative[len(self.base) + 1:]
+        return fnmatch.fnmatchcase(relative, self.pattern)
+
+
+class ExcludeRules:
+    """Ordered .gitignore-style rules (immutable: with_lines returns a new set)"""
+
+    def __init__(self, lines: Iterable[str] = DEFAULT_EXCLUDES, base: str = ""):
+        """
+        Args:
+            lines: Rule lines (blank lines and comments are ignored)
+            base: Directory the rules are relative to ("/"-separated,
+                relative to the walk root; "" = the root itself)
+        """
+        self._rules: Tuple[_Rule, ...] = tuple(self._parse(lines, base))
+
+    @staticmethod
+    def _parse(lines: Iterable[str], base: str) -> List[_Rule]:
+        rules = []
+        for line in lines:
+            line = line.rstrip("\n").rstrip()
+            if line and not line.startswith("#"):
+                rules.append(_Rule(line, base))
+        return rules
+
+    def with_lines(self, lines: Iterable[str], base: str = "") -> "ExcludeRules":
+        """These rules followed (so overridden) by more lines"""
+        rules = ExcludeRules(())
+        rules._rules = self._rules + tuple(self._parse(lines, base))
+        return rules
+
+    def excluded(self, relative: str, is_dir: bool) -> bool:
+        """
+        Whether one entry is excluded (its parents are not checked)
+
+        Args:
+            relative: "/"-separated path relative to the walk root
+            is_dir: The entry is a directory
+        """
+        name = relative.rsplit("/", 1)[-1]
+        result = False
+        for rule in self._rules:
+            if rule.negate == result and rule.matches(relative, name, is_dir):
+                result = not rule.negate
+        return result
+
+    def excluded_path(self, path: str) -> bool:
+        """Whether a file, or one of the directories above it, is excluded"""
+        parts = [part for part in os.path.normpath(path).replace(os.sep, "/").split("/")
+                 if part not in ("", ".")]
+        for i in range(1, len(parts) + 1):
+            if self.excluded("/".join(parts[:i]), is_dir=i < len(parts)):
+                return True
+        return False
+
+
+DEFAULT_RULES = ExcludeRules()
+
+
+def _read_gitignore(directory: str) -> Optional[List[str]]:
+    try:
+        with open(os.path.join(directory, GITIGNORE), encoding="utf-8") as f:
+            return f.readlines()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def iter_python_files(directory: str, rules: ExcludeRules = DEFAULT_RULES,
+                      gitignore: bool = True) -> Iterator[str]:
+    """
+    Walk a directory and yield its Python files as they are found
+
+    Each directory is listed completely (and sorted) before its files are
+    yielded, so files written next to a yielded file while the walk goes on
+    (generated tests, backups) are never picked up.
+
+    Args:
+        directory: Directory to walk
+        rules: Exclusion rules
+        gitignore: Also apply the .gitignore files met during the walk
+
+    Yields:
+        Paths of the .py files, joined onto `directory` (as os.walk does)
+    """
+    # depth-first, in name order: (path, "/"-separated path relative to directory, rules)
+    pending = [(directory, "", rules)]
+    while pending:
+        path, relative, current = pending.pop()
+        if gitignore:
+            lines = _read_gitignore(path)
+            if lines:
+                current = current.with_lines(lines, relative)
+        try:
+            with os.scandir(path) as entries:
+                listing = sorted((e.name, e.is_dir(follow_symlinks=False), e.is_file()) for e in entries)
+        except OSError as e:
+            print(f" Error listing {path}: {e}")
+            continue
+
+        subdirectories = []
+        for name, is_dir, is_file in listing:
+            entry_relative = f"{relative}/{name}" if relative else name
+            if is_dir:
+                if not current.excluded(entry_relative, is_dir=True):
+                    subdirectories.append((os.path.join(path, name), entry_relative, current))
+            elif is_file and name.endswith(".py") and not current.excluded(entry_relative, is_dir=False):
+                yield os.path.join(path, name)
+        pending.extend(reversed(subdirectories))
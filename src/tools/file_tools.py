@@ -4,29 +4,52 @@ Author: Toolsmith Team
 Purpose: Safe file reading/writing operations within sandbox
 """
 import os
+import re
 import shutil
+import tempfile
+import threading
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import Iterator, List, Optional, Dict
 from datetime import datetime
 
+from .file_discovery import DEFAULT_RULES, ExcludeRules, iter_python_files
+
 class SecurityError(Exception):
     """Raised when trying to access files outside sandbox"""
     pass
 
+# mkstemp creates 0600 files; new files get the usual umask-based mode instead
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# @@ -old_start[,old_count] +new_start[,new_count] @@
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
 class FileTools:
     """Tools for safe file operations within sandbox"""
     
-    def __init__(self, sandbox_path: str = "./sandbox",prompts_path:str ="./prompts"):
+    def __init__(self, sandbox_path: str = "./sandbox",prompts_path:str ="./prompts",
+                 overlay: Optional[bool] = None):
         """
         Initialize with sandbox directory
         
         Args:
             sandbox_path: Base directory where agents can work
+            overlay: Keep file contents in memory: reads after the first
+                one are served from memory and writes are buffered until
+                flush()/commit(); defaults to $SWARM_FILE_OVERLAY ("1" = on)
         """
         self.sandbox_path = Path(sandbox_path).resolve()
         self.sandbox_path.mkdir(parents=True, exist_ok=True)
         self.prompts_path = Path(prompts_path).resolve()
         self.prompts_path.mkdir(parents=True, exist_ok=True)
+        if overlay is None:
+            overlay = os.getenv("SWARM_FILE_OVERLAY", "0") == "1"
+        self.overlay = overlay
+        # resolved path -> [content, dirty]; only paths that passed _is_safe_path
+        self._overlay: Dict[str, list] = {}
+        self._overlay_lock = threading.RLock()
+        self._resolved: Dict[str, str] = {}
       #  print(f"FileTools initialized with sandbox: {self.sandbox_path}")
     
     def _is_safe_path(self, file_path: str) -> bool:
@@ -61,11 +84,20 @@ class FileTools:
         """
         if not self._is_safe_path(file_path):
             raise SecurityError(f"🚫 Access denied: {file_path} is outside sandbox")
+        if self.overlay:
+            entry = self._overlay.get(self._overlay_key(file_path))
+            if entry is not None:
+                return entry[0]
         
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             print(f" Read file: {file_path} ({len(content)} chars)")
+            if self.overlay:
+                with self._overlay_lock:
+                    # a write may have landed meanwhile: it wins
+                    entry = self._overlay.setdefault(self._overlay_key(file_path), [content, False])
+                return entry[0]
             return content
         except FileNotFoundError:
             print(f" File not found: {file_path}")
@@ -94,48 +126,57 @@ class FileTools:
         if not self._is_safe_path(file_path):
             raise SecurityError(f" Access denied: {file_path} is outside sandbox")
         
+        if self.overlay:
+            with self._overlay_lock:
+                self._overlay[self._overlay_key(file_path)] = [content, True]
+            return True
+        
         try:
-            # Create parent directories if needed
-            Path(file_path).parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
+            self._atomic_write(file_path, content)
             print(f" Wrote file: {file_path} ({len(content)} chars)")
             return True
         except Exception as e:
             print(f" Error writing file: {e}")
             return False
     @staticmethod
-    def list_python_files(self, directory: str) -> List[str]:
+    def iter_python_files(self, directory: str, rules: ExcludeRules = DEFAULT_RULES) -> Iterator[str]:
         """
-        List all Python files in a directory
+        Yield the Python files of a directory while it is being walked
         
         Args:
             directory: Directory to scan
+            rules: .gitignore-style exclusions (the .gitignore files found
+                in the directory apply too)
             
-        Returns:
-            List of Python file paths
+        Yields:
+            Python file paths, as soon as their directory has been read
             
         Raises:
             SecurityError: If directory is outside sandbox
         """
         if not self._is_safe_path(directory):
             raise SecurityError(f" Access denied: {directory} is outside sandbox")
+        if self.overlay:
+            self.flush()
+        return iter_python_files(directory, rules)
+
+    @staticmethod
+    def list_python_files(self, directory: str) -> List[str]:
+        """
+        List all Python files in a directory
         
-        python_files = []
-        try:
-            for root, _, files in os.walk(directory):
-                for file in files:
-                    if file.endswith('.py') and not file.startswith('__'):
-                        full_path = os.path.join(root, file)
-                        python_files.append(full_path)
+        Args:
+            directory: Directory to scan
             
-            print(f" Found {len(python_files)} Python files in {directory}")
-            return python_files
-        except Exception as e:
-            print(f" Error listing files: {e}")
-            return []
+        Returns:
+            List of Python file paths
+            
+        Raises:
+            SecurityError: If directory is outside sandbox
+        """
+        python_files = list(self.iter_python_files(self, directory))
+        print(f" Found {len(python_files)} Python files in {directory}")
+        return python_files
     @staticmethod
     def backup_file(self, file_path: str) -> Optional[str]:
         """
@@ -178,9 +219,9 @@ class FileTools:
             True if successful
         """
         try:
-            content = self.read_file(backup_path)
+            content = self.read_file(self, backup_path)
             if content:
-                return self.write_file(original_path, content)
+                return self.write_file(self, original_path, content)
             return False
         except Exception as e:
             print(f"❌ Error restoring backup: {e}")
@@ -199,6 +240,14 @@ class FileTools:
         if not self._is_safe_path(file_path):
             raise SecurityError(f"🚫 Access denied: {file_path} is outside sandbox")
         
+        if self.overlay:
+            with self._overlay_lock:
+                entry = self._overlay.pop(self._overlay_key(file_path), None)
+            if entry is not None and entry[1] and not os.path.exists(file_path):
+                # buffered write never flushed: nothing on disk to remove
+                print(f" Deleted: {file_path}")
+                return True
+        
         try:
             if os.path.exists(file_path):
                 os.remove(file_path)
@@ -211,6 +260,241 @@ class FileTools:
             print(f"Error deleting file: {e}")
             return False
     
+    def apply_patch(self, file_path: str, patch: str, write: bool = True) -> Dict:
+        """
+        Apply a unified diff to a file, all hunks or nothing
+
+        Every context and removed line must match the current content
+        exactly (no fuzz, no whitespace folding). A hunk whose line numbers
+        are off is still applied if its old lines occur exactly once after
+        the previous hunk; otherwise it is reported as a conflict.
+
+        Args:
+            file_path: File to patch
+            patch: Unified diff (---/+++ headers optional)
+            write: Write the patched content to file_path
+
+        Returns:
+            {
+                'applied': bool,
+                'content': str or None (patched content),
+                'conflicts': List[str] (why hunks were rejected),
+                'hunks': int
+            }
+
+        Raises:
+            SecurityError: If path is outside sandbox
+        """
+        if not self._is_safe_path(file_path):
+            raise SecurityError(f" Access denied: {file_path} is outside sandbox")
+
+        def rejected(conflicts, hunks=0):
+            print(f" Patch rejected for {file_path}: {len(conflicts)} conflict(s)")
+            return {'applied': False, 'content': None, 'conflicts': conflicts, 'hunks': hunks}
+
+        content = self.read_file(self, file_path)
+        if content is None:
+            return rejected([f"cannot read {file_path}"])
+        try:
+            hunks = self._parse_patch(patch)
+        except ValueError as e:
+            return rejected([str(e)])
+        if not hunks:
+            return rejected(["patch contains no hunks"])
+
+        lines = content.splitlines()
+        result = []
+        cursor = 0  # first line of `lines` not yet copied to result
+        conflicts = []
+        for number, hunk in enumerate(hunks, start=1):
+            position = self._locate_hunk(lines, hunk, cursor)
+            if isinstance(position, str):
+                conflicts.append(f"hunk {number} ({hunk['header']}): {position}")
+                continue
+            result.extend(lines[cursor:position])
+            result.extend(hunk['new'])
+            cursor = position + len(hunk['old'])
+        if conflicts:
+            return rejected(conflicts, len(hunks))
+        result.extend(lines[cursor:])
+
+        patched = "\n".join(result)
+        if result and (content.endswith("\n") or not content):
+            patched += "\n"
+        if write and not self.write_file(self, file_path, patched):
+            return rejected(["cannot write patched file"], len(hunks))
+        print(f" Patched {file_path}: {len(hunks)} hunk(s)")
+        return {'applied': True, 'content': patched, 'conflicts': [], 'hunks': len(hunks)}
+
+    @staticmethod
+    def _parse_patch(patch: str) -> List[Dict]:
+        """
+        Hunks of a unified diff
+
+        Raises:
+            ValueError: malformed diff (stray lines, counts not matching the
+                @@ header)
+        """
+        hunks = []
+        current = None
+
+        def close(hunk):
+            if len(hunk['old']) != hunk['old_count'] or len(hunk['new']) != hunk['new_count']:
+                raise ValueError(
+                    f"hunk {len(hunks)} ({hunk['header']}): header counts do not match its body "
+                    f"({len(hunk['old'])} old / {len(hunk['new'])} new lines)"
+                )
+
+        for raw in patch.rstrip("\n").splitlines():
+            match = HUNK_HEADER.match(raw)
+            if match:
+                if current:
+                    close(current)
+                current = {
+                    'header': match.group(0),
+                    'old_start': int(match.group(1)),
+                    'old_count': int(match.group(2) or 1),
+                    'new_count': int(match.group(4) or 1),
+                    'old': [],
+                    'new': []
+                }
+                hunks.append(current)
+            elif raw.startswith(("--- ", "+++ ", "diff ", "index ")) and (
+                    current is None or len(current['old']) == current['old_count']):
+                continue
+            elif current is None:
+                if raw.strip():
+                    raise ValueError(f"unexpected line before the first hunk: {raw!r}")
+            elif raw.startswith("\\"):
+                continue  # "\ No newline at end of file"
+            elif raw.startswith("-"):
+                current['old'].append(raw[1:])
+            elif raw.startswith("+"):
+                current['new'].append(raw[1:])
+            elif raw.startswith(" ") or raw == "":
+                # an empty line is a blank context line that lost its space
+                current['old'].append(raw[1:])
+                current['new'].append(raw[1:])
+            else:
+                raise ValueError(f"unexpected line in hunk {len(hunks)}: {raw!r}")
+        if current:
+            close(current)
+        return hunks
+
+    @staticmethod
+    def _locate_hunk(lines: List[str], hunk: Dict, cursor: int):
+        """
+        Index where the hunk's old lines start, or a conflict message
+
+        Only positions at or after cursor (end of the previous hunk) count.
+        """
+        old = hunk['old']
+        if not old:
+            # pure insertion after line old_start
+            position = hunk['old_start']
+            if cursor <= position <= len(lines):
+                return position
+            return f"insertion point line {position} is outside the file or before the previous hunk"
+
+        expected = hunk['old_start'] - 1
+        if expected >= cursor and lines[expected:expected + len(old)] == old:
+            return expected
+        matches = [
+            i for i in range(cursor, len(lines) - len(old) + 1)
+            if lines[i] == old[0] and lines[i:i + len(old)] == old
+        ]
+        if len(matches) == 1:
+            return matches[0]
+        if not matches:
+            return f"context does not match the file at line {hunk['old_start']}"
+        return f"context is ambiguous ({len(matches)} matches, none at line {hunk['old_start']})"
+
+    @staticmethod
+    def _atomic_write(file_path: str, content: str):
+        """
+        Write to a temporary file next to file_path, then rename it over
+        file_path: readers never see a half-written file, and the old
+        inode (possibly hardlinked by the snapshot store) is left untouched
+        """
+        path = Path(file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            if path.exists():
+                shutil.copymode(path, tmp_path)
+            else:
+                os.chmod(tmp_path, 0o666 & ~_UMASK)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    # ---------- overlay ----------
+
+    def _overlay_key(self, file_path: str) -> str:
+        key = self._resolved.get(file_path)
+        if key is None:
+            key = self._resolved[file_path] = str(Path(file_path).resolve())
+        return key
+
+    def flush(self, paths: Optional[List[str]] = None) -> int:
+        """
+        Write buffered overlay writes to disk (before pylint/pytest read them)
+
+        Args:
+            paths: Files to flush (default: every buffered write)
+
+        Returns:
+            Number of files written
+        """
+        if not self.overlay:
+            return 0
+        written = 0
+        with self._overlay_lock:
+            if paths is None:
+                keys = list(self._overlay)
+            else:
+                keys = [self._overlay_key(path) for path in paths if path]
+            for key in keys:
+                entry = self._overlay.get(key)
+                if entry is None or not entry[1]:
+                    continue
+                try:
+                    self._atomic_write(key, entry[0])
+                except Exception as e:
+                    print(f" Error flushing file: {e}")
+                    continue
+                entry[1] = False
+                written += 1
+        if written:
+            print(f" Flushed {written} file(s) to disk")
+        return written
+
+    def commit(self, paths: Optional[List[str]] = None) -> int:
+        """
+        Flush buffered writes and drop the files from the overlay
+
+        Args:
+            paths: Files to commit (default: the whole overlay)
+
+        Returns:
+            Number of files written
+        """
+        if not self.overlay:
+            return 0
+        with self._overlay_lock:
+            written = self.flush(paths)
+            if paths is None:
+                self._overlay.clear()
+            else:
+                for path in paths:
+                    if path:
+                        self._overlay.pop(self._overlay_key(path), None)
+        return written
+
     def copy_file(self, source: str, destination: str) -> bool:
         """
         Copy a file within sandbox
@@ -224,6 +508,10 @@ class FileTools:
         """
         if not self._is_safe_path(source) or not self._is_safe_path(destination):
             raise SecurityError("🚫 Access denied: paths must be in sandbox")
+        if self.overlay:
+            self.flush([source])
+            with self._overlay_lock:
+                self._overlay.pop(self._overlay_key(destination), None)
         
         try:
             shutil.copy2(source, destination)
@@ -245,6 +533,8 @@ class FileTools:
         """
         if not self._is_safe_path(file_path):
             raise SecurityError(f" Access denied: {file_path} is outside sandbox")
+        if self.overlay:
+            self.flush([file_path])
         
         try:
             if not os.path.exists(file_path):
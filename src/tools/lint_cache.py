@@ -0,0 +1,253 @@
+"""
+Lint Result Cache for Refactoring Swarm
+Author: Toolsmith Team
+Purpose: Persistent cache of run_pylint results keyed by file content and
+location, so unchanged files are never re-linted
+
+A result only depends on the key's inputs (bytes, resolved path, pylint
+version, rcfile) for messages about the file itself. Messages that depend on
+other files (CROSS_FILE_SYMBOLS: imports resolved against siblings, members
+of imported modules, duplicate code...) would go stale when those files
+change, so results containing any are never stored. A stored result can
+still miss such a message that would appear today (e.g. a sibling module
+was deleted since): invalidate() the cache after moving or deleting modules.
+
+Entries expire after max_age_days, and the least recently used are dropped
+beyond max_entries.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(".swarm_cache", "lint_cache.sqlite")
+
+# pylint messages whose presence depends on files other than the linted one
+CROSS_FILE_SYMBOLS = {
+    "import-error",
+    "no-name-in-module",
+    "cyclic-import",
+    "relative-beyond-top-level",
+    "no-member",
+    "duplicate-code",
+    "wrong-import-order",
+}
+ISSUE_LISTS = ("errors", "warnings", "conventions", "refactors")
+
+# Files pylint reads its configuration from (current directory)
+RCFILE_CANDIDATES = ["pylintrc", ".pylintrc", "pyproject.toml", "setup.cfg"]
+
+
+class LintCache:
+    """Content-addressed store of run_pylint result dicts"""
+
+    def __init__(self, path: Optional[str] = None, rcfile: Optional[str] = None,
+                 max_entries: int = 20000, max_age_days: float = 30, evict_every: int = 50):
+        """
+        Open (or create) the cache
+
+        Args:
+            path: SQLite file (default: DEFAULT_CACHE_PATH)
+            rcfile: Pylint configuration file; defaults to the first of
+                RCFILE_CANDIDATES found in the current directory
+            max_entries: Maximum number of cached results
+            max_age_days: Entries older than this are dropped
+            evict_every: Run eviction after this many inserts
+        """
+        path = path or DEFAULT_CACHE_PATH
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self.pylint_version = self._pylint_version()
+        self.rcfile_hash = self._rcfile_hash(rcfile)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS lint_entries (
+                key TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                path_hash TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_lint_content ON lint_entries(content_hash, path_hash)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_lint_access ON lint_entries(last_access)"
+        )
+        self._conn.commit()
+        self.evict()
+
+    def _pylint_version(self) -> str:
+        try:
+            return metadata.version("pylint")
+        except metadata.PackageNotFoundError:
+            return "unknown"
+
+    def _rcfile_hash(self, rcfile: Optional[str]) -> str:
+        candidates = [rcfile] if rcfile else RCFILE_CANDIDATES
+        for candidate in candidates:
+            try:
+                with open(candidate, 'rb') as f:
+                    return hashlib.sha256(f.read()).hexdigest()
+            except OSError:
+                continue
+        return "default"
+
+    def content_hash(self, file_path: str) -> Optional[str]:
+        """sha256 of the file bytes, or None if it cannot be read"""
+        try:
+            with open(file_path, 'rb') as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+
+    @staticmethod
+    def path_hash(file_path: str) -> str:
+        """Short sha256 of the resolved path (the same bytes elsewhere lint differently)"""
+        return hashlib.sha256(str(Path(file_path).resolve()).encode("utf-8")).hexdigest()[:16]
+
+    def key_for(self, file_path: str, flavor: str = "subprocess") -> Optional[str]:
+        """
+        Cache key of a file in its current state and place
+
+        Args:
+            file_path: File to lint
+            flavor: How the result is produced (engine name); results
+                of different engines are kept apart
+
+        Returns:
+            Key, or None if the file cannot be read
+        """
+        content_hash = self.content_hash(file_path)
+        if content_hash is None:
+            return None
+        path_hash = self.path_hash(file_path)
+        return f"{content_hash}:{path_hash}:{self.pylint_version}:{self.rcfile_hash}:{flavor}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached result for key, or None (counts hit/miss)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created FROM lint_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE lint_entries SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    @staticmethod
+    def cacheable(result: Dict) -> bool:
+        """False when the result has messages that depend on other files"""
+        return not any(
+            issue.get("symbol") in CROSS_FILE_SYMBOLS
+            for name in ISSUE_LISTS for issue in result.get(name, [])
+        )
+
+    def put(self, key: str, result: Dict) -> bool:
+        """
+        Store a successful run_pylint result and evict periodically
+
+        Returns:
+            False if the result was not stored (see cacheable)
+        """
+        if not self.cacheable(result):
+            return False
+        content_hash, path_hash = key.split(":", 2)[:2]
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lint_entries VALUES (?, ?, ?, ?, ?, ?)",
+                (key, content_hash, path_hash, json.dumps(result), now, now)
+            )
+            self._conn.commit()
+            self._puts += 1
+            should_evict = self._puts % self.evict_every == 0
+        if should_evict:
+            self.evict()
+        return True
+
+    def evict(self) -> int:
+        """
+        Drop expired entries, then the least recently used ones beyond
+        max_entries
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM lint_entries WHERE created < ?", (time.time() - self.max_age,)
+            ).rowcount
+            count = self._conn.execute("SELECT COUNT(*) FROM lint_entries").fetchone()[0]
+            if count > self.max_entries:
+                removed += self._conn.execute(
+                    "DELETE FROM lint_entries WHERE key IN "
+                    "(SELECT key FROM lint_entries ORDER BY last_access ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                ).rowcount
+            self._conn.commit()
+            return removed
+
+    def invalidate(self, file_path: Optional[str] = None) -> int:
+        """
+        Drop cached results
+
+        Args:
+            file_path: Drop results for this file's current content at
+                its path; None drops everything
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            if file_path is None:
+                removed = self._conn.execute("DELETE FROM lint_entries").rowcount
+            else:
+                content_hash = self.content_hash(file_path)
+                if content_hash is None:
+                    return 0
+                removed = self._conn.execute(
+                    "DELETE FROM lint_entries WHERE content_hash = ? AND path_hash = ?",
+                    (content_hash, self.path_hash(file_path))
+                ).rowcount
+            self._conn.commit()
+            return removed
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process plus number of entries"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM lint_entries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'entries': entries
+        }
+
+    def close(self):
+        """Close the database connection (the cache is unusable afterwards)"""
+        with self._lock:
+            self._conn.close()
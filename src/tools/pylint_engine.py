@@ -0,0 +1,256 @@
+"""
+Warm Pylint Engine for Refactoring Swarm
+Author: Toolsmith Team
+Purpose: Run pylint through its Python API inside long-lived worker processes,
+so interpreter startup, plugin loading and the astroid cache are paid once
+instead of once per file
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# times a lint is resubmitted after its pool died or was restarted under it
+MAX_RETRIES = 2
+
+
+@dataclass
+class LintMessage:
+    """One pylint message (same fields as pylint's JSON reporter)"""
+    type: str
+    module: str
+    obj: str
+    line: int
+    column: int
+    end_line: Optional[int]
+    end_column: Optional[int]
+    path: str
+    symbol: str
+    message: str
+    message_id: str
+
+    def to_dict(self) -> Dict:
+        """Dictionary in pylint --output-format=json shape"""
+        return {
+            'type': self.type,
+            'module': self.module,
+            'obj': self.obj,
+            'line': self.line,
+            'column': self.column,
+            'endLine': self.end_line,
+            'endColumn': self.end_column,
+            'path': self.path,
+            'symbol': self.symbol,
+            'message': self.message,
+            'message-id': self.message_id
+        }
+
+
+@dataclass
+class LintRun:
+    """Result of linting one file"""
+    path: str
+    score: float
+    max_score: float = 10.0
+    messages: List[LintMessage] = field(default_factory=list)
+
+
+def _warm_up():
+    """Worker initializer: import pylint/astroid once per process"""
+    import pylint.lint  # noqa: F401
+    import astroid  # noqa: F401
+
+
+def _evict_stale_modules(root: str):
+    """
+    Drop astroid cache entries for files under root (the sandbox).
+
+    Those are the files the swarm rewrites; everything else (stdlib,
+    site-packages) stays cached, which is where the warm-up time goes.
+    """
+    import astroid
+
+    root = os.path.abspath(root)
+    cache = astroid.MANAGER.astroid_cache
+    for name, module in list(cache.items()):
+        module_file = getattr(module, 'file', None)
+        if not module_file:
+            continue
+        module_file = os.path.abspath(module_file)
+        if module_file == root or module_file.startswith(root + os.sep):
+            del cache[name]
+
+
+def _lint_in_worker(file_path: str, evict_root: str, extra_args: List[str]) -> LintRun:
+    """Lint one file with the pylint API (runs inside a worker process)"""
+    from pylint.lint import Run
+    from pylint.reporters import CollectingReporter
+
+    _evict_stale_modules(evict_root)
+    reporter = CollectingReporter()
+    run = Run([file_path, '--reports=n', '--score=y', *extra_args], reporter=reporter, exit=False)
+
+    messages = [
+        LintMessage(
+            type=msg.category,
+            module=msg.module,
+            obj=msg.obj,
+            line=msg.line,
+            column=msg.column,
+            end_line=msg.end_line,
+            end_column=msg.end_column,
+            path=msg.path,
+            symbol=msg.symbol,
+            message=msg.msg,
+            message_id=msg.msg_id
+        )
+        for msg in reporter.messages
+    ]
+    score = run.linter.stats.global_note or 0.0
+    return LintRun(path=file_path, score=round(float(score), 2), messages=messages)
+
+
+class PylintEngine:
+    """Pool of warm pylint worker processes"""
+
+    def __init__(self, workers: int = 2, sandbox_path: str = "./sandbox", extra_args: Optional[List[str]] = None):
+        """
+        Args:
+            workers: Number of long-lived pylint processes
+            sandbox_path: Files under this directory are re-parsed on every run
+            extra_args: Additional pylint command-line options
+        """
+        self.workers = workers
+        self.sandbox_path = str(Path(sandbox_path).resolve())
+        self.extra_args = list(extra_args or [])
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_up
+                )
+            return self._executor
+
+    def _discard(self, executor: ProcessPoolExecutor):
+        """Forget a broken pool (unless it was already replaced)"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, file_path: str, evict_root: Optional[str] = None) -> Future:
+        """
+        Schedule a lint run; the future resolves to a LintRun
+
+        A run lost because its pool died or was restarted (another lint
+        timed out) is resubmitted to the new pool, up to MAX_RETRIES times.
+        Cancelling the future gives the run up for good.
+
+        Args:
+            file_path: File to lint
+            evict_root: Directory whose modules are re-parsed (default: the
+                engine's sandbox; a per-file workspace passes its own)
+        """
+        outer = Future()
+        args = (file_path, evict_root or self.sandbox_path, self.extra_args)
+        self._attempt(outer, args, MAX_RETRIES)
+        return outer
+
+    def _attempt(self, outer: Future, args: Tuple, retries: int):
+        while True:
+            executor = self._get_executor()
+            try:
+                inner = executor.submit(_lint_in_worker, *args)
+                break
+            except (BrokenProcessPool, RuntimeError) as e:
+                # a worker died (crash, OOM kill), or restart() shut the pool down
+                self._discard(executor)
+                if retries <= 0:
+                    self._settle(outer, exception=e)
+                    return
+                retries -= 1
+        inner.add_done_callback(lambda done: self._on_done(outer, done, executor, args, retries))
+
+    def _on_done(self, outer: Future, inner: Future, executor: ProcessPoolExecutor,
+                 args: Tuple, retries: int):
+        if outer.cancelled():
+            return
+        lost = inner.cancelled() or isinstance(inner.exception(), BrokenProcessPool)
+        if lost and retries > 0:
+            self._discard(executor)
+            self._attempt(outer, args, retries - 1)
+        elif inner.cancelled():
+            self._settle(outer, exception=BrokenProcessPool("pylint pool restarted"))
+        elif inner.exception() is not None:
+            self._settle(outer, exception=inner.exception())
+        else:
+            self._settle(outer, result=inner.result())
+
+    @staticmethod
+    def _settle(outer: Future, result=None, exception: Optional[BaseException] = None):
+        try:
+            if exception is not None:
+                outer.set_exception(exception)
+            else:
+                outer.set_result(result)
+        except InvalidStateError:
+            pass  # cancelled by the caller meanwhile
+
+    def lint(self, file_path: str, timeout: int = 30, evict_root: Optional[str] = None) -> LintRun:
+        """
+        Lint one file in a warm worker
+
+        Raises:
+            TimeoutError: the run exceeded timeout (the pool is restarted;
+                the other lints in flight are resubmitted)
+        """
+        future = self.submit(file_path, evict_root)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            future.cancel()
+            self.restart()
+            raise TimeoutError(f"pylint timeout after {timeout}s")
+
+    def restart(self):
+        """
+        Kill the workers (e.g. one is stuck); a new pool starts on next use.
+        Cancel the stuck run's future first, or it is resubmitted too.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            for process in list(getattr(executor, '_processes', {}).values()):
+                process.kill()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine(sandbox_path: str = "./sandbox") -> PylintEngine:
+    """Process-wide engine, started lazily (PYLINT_WORKERS sets the pool size)"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = PylintEngine(int(os.getenv("PYLINT_WORKERS", "2")), sandbox_path)
+            atexit.register(_engine.close)
+        return _engine
@@ -0,0 +1,105 @@
+"""
+Pytest Report Plugin for Refactoring Swarm
+Author: Toolsmith Team
+Purpose: Collect per-test outcome, duration and failure details as JSON,
+instead of scraping pytest's terminal output
+
+A failing teardown is reported as its own error next to the test's outcome
+(as pytest counts it: "1 failed, 1 error"), so the call's failure is kept.
+
+Usage:
+    python -m pytest -p src.tools.pytest_report_plugin --swarm-report=report.json
+"""
+import json
+import time
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--swarm-report",
+        action="store",
+        default=None,
+        help="Write a structured JSON test report to this path"
+    )
+
+
+def pytest_configure(config):
+    path = config.getoption("swarm_report")
+    if path:
+        config.pluginmanager.register(SwarmReport(path), "swarm_report")
+
+
+class SwarmReport:
+    """Accumulates reports per test node and writes them at session end"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.tests = {}
+        self.collect_errors = []
+        self.teardown_errors = []
+        self.started = time.perf_counter()
+
+    def _entry(self, nodeid: str) -> dict:
+        if nodeid not in self.tests:
+            self.tests[nodeid] = {
+                "nodeid": nodeid,
+                "outcome": "passed",
+                "duration": 0.0,
+                "message": "",
+                "traceback": ""
+            }
+        return self.tests[nodeid]
+
+    def pytest_runtest_logreport(self, report):
+        entry = self._entry(report.nodeid)
+        entry["duration"] += report.duration
+
+        if report.failed and report.when == "teardown":
+            self.teardown_errors.append(_error_entry(report))
+        elif report.failed:
+            # a failing setup is an error, a failing call a failure
+            entry["outcome"] = "failed" if report.when == "call" else "error"
+            entry["message"] = _crash_message(report)
+            entry["traceback"] = report.longreprtext
+        elif report.skipped and entry["outcome"] == "passed":
+            entry["outcome"] = "skipped"
+            if isinstance(report.longrepr, tuple):
+                entry["message"] = str(report.longrepr[2])
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            self.collect_errors.append(_error_entry(report))
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        data = {
+            "exitstatus": int(exitstatus),
+            "duration": round(time.perf_counter() - self.started, 4),
+            "tests": [
+                dict(entry, duration=round(entry["duration"], 4))
+                for entry in self.tests.values()
+            ],
+            "collect_errors": self.collect_errors,
+            "teardown_errors": self.teardown_errors
+        }
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+
+def _error_entry(report) -> dict:
+    """Error entry of a failed collection or teardown"""
+    return {
+        "nodeid": report.nodeid,
+        "outcome": "error",
+        "duration": 0.0,
+        "message": _crash_message(report),
+        "traceback": report.longreprtext
+    }
+
+
+def _crash_message(report) -> str:
+    """One-line failure reason (e.g. 'assert 3 == 4')"""
+    crash = getattr(report.longrepr, "reprcrash", None)
+    if crash is not None:
+        return crash.message
+    text = report.longreprtext.strip()
+    return text.splitlines()[-1] if text else ""
@@ -0,0 +1,321 @@
+"""
+Pytest Fork Server for Refactoring Swarm
+Author: Toolsmith Team
+Purpose: Keep one process with pytest (and its plugins) already imported,
+and run each test file in a child forked from it. The child is thrown away
+after the run, so every run starts from the same clean, warm state.
+
+Protocol: JSON lines on stdin/stdout.
+    request:  {"id": int, "args": [...], "cwd": str, "timeout": float}
+    response: {"id": int, "return_code": int, "output": str, "timed_out": bool}
+
+The server sleeps in select() until a request arrives, a child exits
+(SIGCHLD, through a wakeup pipe) or a child's deadline passes; it exits when
+stdin closes or its parent is gone.
+"""
+import atexit
+import itertools
+import json
+import os
+import select
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from pathlib import Path
+from typing import Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+# longest idle sleep between two checks that the parent is still alive
+PARENT_CHECK_INTERVAL = 5.0
+
+
+# ============ SERVER SIDE ============
+
+def _preload():
+    """Import pytest and its installed plugins once, before any fork"""
+    import pytest  # noqa: F401
+    import _pytest.assertion.rewrite  # noqa: F401
+    import _pytest.python  # noqa: F401
+    import _pytest.terminal  # noqa: F401
+    from importlib import metadata
+
+    for entry_point in metadata.entry_points(group="pytest11"):
+        try:
+            entry_point.load()
+        except Exception:
+            pass
+
+
+def _run_child(request: Dict, output_path: str, wakeup_fds):
+    """Body of the forked child: run pytest and exit with its code"""
+    code = 1
+    try:
+        # the tests get a default SIGCHLD, not the server's wakeup pipe
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        for fd in wakeup_fds:
+            os.close(fd)
+        fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.dup2(fd, 1)
+        os.dup2(fd, 2)
+        os.close(fd)
+        os.chdir(request["cwd"])
+        # same sys.path[0] as `python -m pytest` started in cwd
+        sys.path[0] = request["cwd"]
+
+        import pytest
+        # plugins were imported by _preload, before pytest could rewrite
+        # their asserts; that is expected here, not worth a warning per run
+        args = ["-W", "ignore::pytest.PytestAssertRewriteWarning", *request["args"]]
+        code = int(pytest.main(args))
+    except BaseException as e:  # never return into the server loop
+        print(f"pytest fork server child error: {e!r}", file=sys.stderr)
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def serve():
+    """Server loop: fork one child per request, reap children, enforce timeouts"""
+    _preload()
+
+    # stdout is reserved for the protocol; stray prints go to stderr
+    protocol_out = os.fdopen(os.dup(1), "w", buffering=1, encoding="utf-8")
+    os.dup2(2, 1)
+    stdin_fd = sys.stdin.fileno()
+    parent = os.getppid()
+
+    # SIGCHLD writes a byte to wake_w, which wakes up the select() below
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_r, False)
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+    work_dir = tempfile.mkdtemp(prefix="pytest_server_")
+    children = {}  # pid -> (request id, deadline, output path)
+    buffer = b""
+    stdin_open = True
+
+    def respond(request_id, return_code, output_path, timed_out):
+        try:
+            with open(output_path, "r", encoding="utf-8", errors="replace") as f:
+                output = f.read()
+            os.remove(output_path)
+        except OSError:
+            output = ""
+        protocol_out.write(json.dumps({
+            "id": request_id,
+            "return_code": return_code,
+            "output": output,
+            "timed_out": timed_out
+        }) + "\n")
+
+    while stdin_open or children:
+        wait = PARENT_CHECK_INTERVAL
+        if children:
+            nearest = min(deadline for _, deadline, _ in children.values())
+            wait = min(wait, max(0.0, nearest - time.monotonic()))
+        ready, _, _ = select.select([stdin_fd, wake_r] if stdin_open else [wake_r], [], [], wait)
+        if wake_r in ready:
+            try:
+                while os.read(wake_r, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+        if os.getppid() != parent:
+            # orphaned: nobody reads the responses any more
+            for pid in children:
+                os.kill(pid, signal.SIGKILL)
+            break
+        if stdin_open and stdin_fd in ready:
+            chunk = os.read(stdin_fd, 65536)
+            if not chunk:
+                stdin_open = False
+            buffer += chunk
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                output_path = os.path.join(work_dir, f"{request['id']}.out")
+                pid = os.fork()
+                if pid == 0:
+                    _run_child(request, output_path, (wake_r, wake_w))
+                children[pid] = (request["id"], time.monotonic() + request["timeout"], output_path)
+
+        # reap finished children
+        while children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            request_id, _, output_path = children.pop(pid)
+            respond(request_id, os.waitstatus_to_exitcode(status), output_path, False)
+
+        # kill children past their deadline
+        now = time.monotonic()
+        for pid, (request_id, deadline, output_path) in list(children.items()):
+            if now > deadline:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+                children.pop(pid)
+                respond(request_id, -1, output_path, True)
+
+    protocol_out.close()
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+
+# ============ CLIENT SIDE ============
+
+class PytestForkServer:
+    """Client for a pytest fork server process"""
+
+    def __init__(self):
+        self._process = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        # bumped on every start; futures carry the one that ran them
+        self.generation = 0
+
+    @staticmethod
+    def is_supported() -> bool:
+        """Forking is POSIX only"""
+        return hasattr(os, "fork")
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._process is not None and self._process.poll() is None:
+                return
+            env = dict(os.environ)
+            env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+            self._process = subprocess.Popen(
+                [sys.executable, "-m", "src.tools.pytest_server"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                cwd=str(REPO_ROOT),
+                env=env,
+                text=True,
+                bufsize=1,
+                # own process group: restart() kills the forked children too
+                start_new_session=True
+            )
+            self.generation += 1
+            threading.Thread(target=self._read_responses, args=(self._process, self.generation),
+                             daemon=True).start()
+
+    def _read_responses(self, process, generation: int):
+        for line in process.stdout:
+            response = json.loads(line)
+            with self._lock:
+                future = self._pending.pop(response["id"], None)
+            if future is not None:
+                _settle(future, result=response)
+        # server gone: fail whatever is still waiting on it (not on its successor)
+        with self._lock:
+            lost = [request_id for request_id, future in self._pending.items()
+                    if future.generation == generation]
+            pending = [self._pending.pop(request_id) for request_id in lost]
+        for future in pending:
+            _settle(future, exception=RuntimeError("pytest fork server exited"))
+
+    def submit(self, args: List[str], cwd: str, timeout: float) -> Future:
+        """
+        Schedule one pytest run
+
+        Returns:
+            Future resolving to {"return_code", "output", "timed_out"},
+            or failing with RuntimeError if the server dies; its
+            `generation` attribute identifies the server for restart()
+        """
+        self._ensure_started()
+        future = Future()
+        request_id = next(self._ids)
+        request = {"id": request_id, "args": list(args), "cwd": str(cwd), "timeout": timeout}
+        with self._lock:
+            future.generation = self.generation
+            if self._process is None:
+                # restarted by another thread since _ensure_started
+                future.set_exception(RuntimeError("pytest fork server restarting"))
+                return future
+            self._pending[request_id] = future
+            try:
+                self._process.stdin.write(json.dumps(request) + "\n")
+                self._process.stdin.flush()
+            except OSError as e:
+                self._pending.pop(request_id, None)
+                future.set_exception(RuntimeError(f"pytest fork server exited ({e})"))
+        return future
+
+    def run(self, args: List[str], cwd: str, timeout: float) -> Dict:
+        """Blocking variant of submit"""
+        # the server enforces the timeout; the margin only covers transport
+        return self.submit(args, cwd, timeout).result(timeout + 10)
+
+    def restart(self, generation: int):
+        """
+        Kill a dead or stuck server (and its children); the next submit
+        starts a new one. No-op if that server was already replaced.
+
+        Args:
+            generation: `generation` of a future the server failed
+        """
+        with self._lock:
+            if generation != self.generation or self._process is None:
+                return
+            process, self._process = self._process, None
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        process.wait()
+
+    def close(self):
+        with self._lock:
+            process, self._process = self._process, None
+        if process is not None:
+            try:
+                process.stdin.close()
+                process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                process.kill()
+
+
+def _settle(future: Future, result=None, exception: Optional[BaseException] = None):
+    """Resolve a future unless its caller gave up on it (cancelled on timeout)"""
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+_server: Optional[PytestForkServer] = None
+_server_lock = threading.Lock()
+
+
+def get_server() -> PytestForkServer:
+    """Process-wide fork server client, started on first use"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = PytestForkServer()
+            atexit.register(_server.close)
+        return _server
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,231 @@
+"""
+Snapshot Store for Refactoring Swarm
+Author: Toolsmith Team
+Purpose: Keep every version of a target file the workflow produces, once per
+distinct content, so a failed run can roll back without writing a full
+backup copy per iteration
+
+Objects live under sandbox/.snapshots/objects/<sha256[:2]>/<sha256>.
+Storing a file hardlinks it into the store when the filesystem allows it
+(reflink, then a plain copy otherwise); restoring hardlinks the object back
+into place, so both are O(1) whatever the file size. This is safe because
+FileTools.write_file replaces files (new inode) instead of rewriting them
+in place.
+
+The index (file, iteration) -> object is a SQLite table next to the objects.
+Iteration 0 is the original: a run that passes stops there, so a failed run
+has no version known to be better and goes back to it.
+"""
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+DEFAULT_SNAPSHOT_DIR = os.path.join("sandbox", ".snapshots")
+# ioctl request of Linux FICLONE (copy-on-write clone: btrfs, xfs...)
+FICLONE = 0x40049409
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class SnapshotStore:
+    """Content-addressed versions of target files, indexed per iteration"""
+
+    def __init__(self, root: str = DEFAULT_SNAPSHOT_DIR):
+        """
+        Open (or create) the store
+
+        Args:
+            root: Directory holding objects/ and index.sqlite
+        """
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.stored = 0
+        self.deduplicated = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS snapshots (
+                file_path TEXT NOT NULL,
+                iteration INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                created REAL NOT NULL,
+                PRIMARY KEY (file_path, iteration)
+            )"""
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _key(file_path: str) -> str:
+        return os.path.normpath(file_path)
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    # ---------- store ----------
+
+    def snapshot(self, file_path: str, iteration: int,
+                 content: Optional[str] = None) -> Optional[str]:
+        """
+        Record the current version of a file for an iteration
+
+        Args:
+            file_path: Target file
+            iteration: Workflow iteration the version belongs to
+            content: The version's text, when it isn't on disk yet
+                (FileTools overlay mode); otherwise the file is read
+
+        Returns:
+            Digest (sha256) of the version, or None if the file can't be read
+        """
+        try:
+            if content is None:
+                with open(file_path, "rb") as f:
+                    data = f.read()
+            else:
+                data = content.encode("utf-8")
+        except OSError as e:
+            print(f" Error creating snapshot: {e}")
+            return None
+        digest = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            target = self.object_path(digest)
+            if os.path.exists(target):
+                self.deduplicated += 1
+            else:
+                self._store_object(target, file_path if content is None else None, data)
+                self.stored += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots (file_path, iteration, digest, created) "
+                "VALUES (?, ?, ?, ?)",
+                (self._key(file_path), iteration, digest, time.time())
+            )
+            self._conn.commit()
+        return digest
+
+    def _store_object(self, target: str, source: Optional[str], data: bytes):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".tmp-")
+        os.close(fd)
+        try:
+            if source is None or not self._link_or_clone(source, tmp_path):
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _link_or_clone(source: str, destination: str) -> bool:
+        """Hardlink, else reflink source onto destination; False if neither works."""
+        try:
+            os.remove(destination)
+            os.link(source, destination)
+            return True
+        except OSError:
+            pass
+        if fcntl is None:
+            return False
+        try:
+            with open(source, "rb") as src, open(destination, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return True
+        except OSError:
+            return False
+
+    # ---------- restore ----------
+
+    def history(self, file_path: str) -> List[Dict]:
+        """Recorded versions of a file: [{'iteration', 'digest'}], oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT iteration, digest FROM snapshots WHERE file_path = ? ORDER BY iteration",
+                (self._key(file_path),)
+            ).fetchall()
+        return [{"iteration": i, "digest": d} for i, d in rows]
+
+    def restore(self, file_path: str, iteration: int = 0) -> Optional[Dict]:
+        """
+        Put a recorded version back in place (atomic replace)
+
+        Args:
+            file_path: Target file
+            iteration: Iteration to restore (default: 0, the original)
+
+        Returns:
+            The restored entry, or None if there is nothing to restore
+        """
+        entry = next((h for h in self.history(file_path) if h["iteration"] == iteration), None)
+        if entry is None:
+            return None
+        source = self.object_path(entry["digest"])
+        directory = os.path.dirname(os.path.abspath(file_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".restore-")
+        os.close(fd)
+        try:
+            if not self._link_or_clone(source, tmp_path):
+                shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, file_path)
+        except OSError as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            print(f"❌ Error restoring snapshot: {e}")
+            return None
+        print(f" Restored {file_path} from iteration {entry['iteration']}")
+        return entry
+
+    # ---------- cleanup ----------
+
+    def forget(self, file_path: str):
+        """Drop a file's history (its objects go at the next gc)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM snapshots WHERE file_path = ?", (self._key(file_path),))
+            self._conn.commit()
+
+    def gc(self, max_age_days: Optional[float] = None) -> int:
+        """
+        Delete histories older than max_age_days, then every object no
+        history references
+
+        Returns:
+            Number of objects deleted
+        """
+        with self._lock:
+            if max_age_days is not None:
+                self._conn.execute("DELETE FROM snapshots WHERE created < ?",
+                                   (time.time() - max_age_days * 86400,))
+                self._conn.commit()
+            referenced = {row[0] for row in self._conn.execute("SELECT DISTINCT digest FROM snapshots")}
+            deleted = 0
+            for prefix in os.listdir(self.objects_dir):
+                folder = os.path.join(self.objects_dir, prefix)
+                if not os.path.isdir(folder):
+                    continue
+                for name in os.listdir(folder):
+                    if name in referenced or name.startswith(".tmp-"):
+                        continue
+                    os.remove(os.path.join(folder, name))
+                    deleted += 1
+                if not os.listdir(folder):
+                    os.rmdir(folder)
+        if deleted:
+            print(f"🧹 Snapshot gc: {deleted} object(s) removed")
+        return deleted
+
+    def stats(self) -> Dict:
+        with self._lock:
+            versions = self._conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+        return {"stored": self.stored, "deduplicated": self.deduplicated, "versions": versions}
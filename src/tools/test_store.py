@@ -0,0 +1,308 @@
+"""
+Test Suite Store for Refactoring Swarm
+Author: Toolsmith Team
+Purpose: Keep the judge's generated tests per target file and per public
+function, so a suite is reused across iterations and runs and only the
+functions whose signature is new or changed get new tests
+
+Each suite also keeps the LLM cache keys of the judge answers it was built
+from: dropping a bad suite must drop those answers too, or the next run
+reads the same tests back from the LLM cache.
+"""
+import ast
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+DEFAULT_STORE_PATH = os.path.join(".swarm_cache", "test_store.sqlite")
+
+def public_signatures(source: str) -> Optional[Dict[str, str]]:
+    """
+    Public API surface of a module
+
+    Args:
+        source: Python source code
+
+    Returns:
+        {qualname: signature} for public top-level functions, public
+        classes and their public methods (plus __init__), or None if the
+        source does not parse
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+
+    signatures = {}
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and not node.name.startswith("_"):
+            signatures[node.name] = _signature(node)
+        elif isinstance(node, ast.ClassDef) and not node.name.startswith("_"):
+            bases = ", ".join(ast.unparse(base) for base in node.bases)
+            signatures[node.name] = f"class {node.name}({bases})"
+            for item in node.body:
+                if not isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    continue
+                if item.name == "__init__" or not item.name.startswith("_"):
+                    signatures[f"{node.name}.{item.name}"] = _signature(item)
+    return signatures
+
+
+def _signature(node) -> str:
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"
+
+
+def split_test_code(test_code: str, functions: List[str]) -> Optional[Dict]:
+    """
+    Split a generated test file into per-function chunks
+
+    A top-level test node (function, class, fixture...) belongs to every
+    target function it mentions by name; nodes mentioning none are shared.
+
+    Args:
+        test_code: Generated pytest file
+        functions: Qualnames the tests were generated for
+
+    Returns:
+        {"imports": [str], "chunks": {qualname: [str]}, "shared": {name: str}},
+        or None if the test code does not parse
+    """
+    try:
+        tree = ast.parse(test_code)
+    except SyntaxError:
+        return None
+
+    lines = test_code.splitlines()
+    imports = []
+    chunks = {qualname: [] for qualname in functions}
+    shared = {}
+
+    for node in tree.body:
+        start = min([d.lineno for d in getattr(node, "decorator_list", [])] + [node.lineno])
+        segment = "\n".join(lines[start - 1:node.end_lineno])
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            imports.append(segment)
+            continue
+
+        names = _referenced_names(node)
+        owners = [q for q in functions if q.split(".")[-1] in names or q in names]
+        # a method is tested through its class: prefer the most specific owner
+        methods = [q for q in owners if "." in q]
+        for qualname in methods or owners:
+            chunks[qualname].append(segment)
+        if not owners:
+            shared[_node_name(node, segment)] = segment
+
+    return {"imports": imports, "chunks": chunks, "shared": shared}
+
+
+def _referenced_names(node) -> set:
+    names = set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name):
+            names.add(child.id)
+        elif isinstance(child, ast.Attribute):
+            names.add(child.attr)
+    return names
+
+
+def _node_name(node, segment: str) -> str:
+    return getattr(node, "name", None) or segment
+
+
+class TestSuiteStore:
+    """Persistent per-function store of generated tests"""
+
+    __test__ = False  # not a pytest test class
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        """
+        Open (or create) the store
+
+        Args:
+            path: SQLite file
+        """
+        self.path = path
+        self.reused = 0
+        self.generated = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS suites (
+                file_path TEXT PRIMARY KEY,
+                imports TEXT NOT NULL,
+                shared TEXT NOT NULL,
+                llm_keys TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS test_chunks (
+                file_path TEXT NOT NULL,
+                qualname TEXT NOT NULL,
+                signature TEXT NOT NULL,
+                code TEXT NOT NULL,
+                PRIMARY KEY (file_path, qualname)
+            )"""
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _key(file_path: str) -> str:
+        return os.path.normpath(file_path)
+
+    def stale_functions(self, file_path: str, signatures: Dict[str, str]) -> List[str]:
+        """
+        Functions that need (new) tests
+
+        Args:
+            file_path: Target file
+            signatures: Its current public_signatures
+
+        Returns:
+            Qualnames that have no stored tests or whose signature changed
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT qualname, signature FROM test_chunks WHERE file_path = ?",
+                (self._key(file_path),)
+            ).fetchall()
+        stored = dict(rows)
+        return [q for q, sig in signatures.items() if stored.get(q) != sig]
+
+    def has_suite(self, file_path: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM suites WHERE file_path = ?", (self._key(file_path),)
+            ).fetchone()
+        return row is not None
+
+    def update(self, file_path: str, signatures: Dict[str, str], test_code: str,
+               functions: List[str], llm_keys: Optional[List[str]] = None) -> bool:
+        """
+        Store tests generated for some functions of a file
+
+        Chunks of functions that are no longer part of the API are dropped.
+
+        Args:
+            file_path: Target file
+            signatures: Its current public_signatures
+            test_code: Generated pytest file
+            functions: Qualnames the tests were generated for
+            llm_keys: LLM cache keys of the judge answer(s) test_code
+                comes from
+
+        Returns:
+            False if test_code does not parse (nothing stored)
+        """
+        parts = split_test_code(test_code, functions)
+        if parts is None:
+            return False
+
+        key = self._key(file_path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT imports, shared, llm_keys FROM suites WHERE file_path = ?", (key,)
+            ).fetchone()
+            imports = json.loads(row[0]) if row else []
+            shared = json.loads(row[1]) if row else {}
+            keys = json.loads(row[2]) if row else []
+
+            imports.extend(i for i in parts["imports"] if i not in imports)
+            shared.update(parts["shared"])
+            keys.extend(k for k in llm_keys or [] if k not in keys)
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO suites VALUES (?, ?, ?, ?)",
+                (key, json.dumps(imports), json.dumps(shared), json.dumps(keys))
+            )
+            for qualname in functions:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO test_chunks VALUES (?, ?, ?, ?)",
+                    (key, qualname, signatures[qualname], json.dumps(parts["chunks"][qualname]))
+                )
+            placeholders = ",".join("?" * len(signatures))
+            self._conn.execute(
+                f"DELETE FROM test_chunks WHERE file_path = ? AND qualname NOT IN ({placeholders})",
+                (key, *signatures)
+            )
+            self._conn.commit()
+        return True
+
+    def assemble(self, file_path: str) -> Optional[str]:
+        """
+        Full test file from the stored imports, shared code and chunks
+
+        Returns:
+            Test code, or None if nothing is stored for file_path
+        """
+        key = self._key(file_path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT imports, shared FROM suites WHERE file_path = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            chunks = self._conn.execute(
+                "SELECT code FROM test_chunks WHERE file_path = ? ORDER BY rowid", (key,)
+            ).fetchall()
+
+        imports = json.loads(row[0])
+        parts = ["\n".join(imports)] if imports else []
+        parts.extend(json.loads(row[1]).values())
+        for (code,) in chunks:
+            # a test mentioning two functions is stored with both
+            parts.extend(s for s in json.loads(code) if s not in parts)
+        return "\n\n\n".join(parts) + "\n"
+
+    def llm_keys(self, file_path: str) -> List[str]:
+        """LLM cache keys of the judge answers a file's suite was built from"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT llm_keys FROM suites WHERE file_path = ?", (self._key(file_path),)
+            ).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def invalidate(self, file_path: Optional[str] = None) -> int:
+        """
+        Drop stored suites
+
+        Args:
+            file_path: Drop this file's suite; None drops everything
+
+        Returns:
+            Number of function chunks removed
+        """
+        with self._lock:
+            if file_path is None:
+                removed = self._conn.execute("DELETE FROM test_chunks").rowcount
+                self._conn.execute("DELETE FROM suites")
+            else:
+                key = self._key(file_path)
+                removed = self._conn.execute(
+                    "DELETE FROM test_chunks WHERE file_path = ?", (key,)
+                ).rowcount
+                self._conn.execute("DELETE FROM suites WHERE file_path = ?", (key,))
+            self._conn.commit()
+            return removed
+
+    def stats(self) -> Dict:
+        """Reuse/generation counters for this process plus number of suites"""
+        with self._lock:
+            suites = self._conn.execute("SELECT COUNT(*) FROM suites").fetchone()[0]
+        return {
+            'reused': self.reused,
+            'generated': self.generated,
+            'suites': suites
+        }
+
+    def close(self):
+        """Close the database connection (the store is unusable afterwards)"""
+        with self._lock:
+            self._conn.close()
@@ -1,18 +1,44 @@
+import asyncio
+import hashlib
+from concurrent.futures import TimeoutError as FutureTimeout
+import json
+import os
 from pathlib import Path
 import re
 import subprocess
 import sys
-from typing import Dict
+import tempfile
+import threading
+from typing import Dict, List, Optional, Union
+
+from src.utils import metrics
+from .file_discovery import iter_python_files
+from .pytest_server import REPO_ROOT, PytestForkServer, get_server
+
+REPORT_PLUGIN = "src.tools.pytest_report_plugin"
 
 
 class TestingTools:
     """Tools for running and analyzing unit tests"""
     
-    def __init__(self, sandbox_path: str = "./sandbox"):
+    def __init__(self, sandbox_path: str = "./sandbox", use_fork_server: Optional[bool] = None):
+        """
+        Args:
+            sandbox_path: Base directory of the files under test
+            use_fork_server: Run tests in children forked from a warm pytest
+                process instead of a fresh interpreter; defaults to
+                $PYTEST_FORK_SERVER ("1" to enable). POSIX only.
+        """
         self.sandbox_path = Path(sandbox_path).resolve()
+        if use_fork_server is None:
+            use_fork_server = os.getenv("PYTEST_FORK_SERVER", "0") == "1"
+        self.use_fork_server = use_fork_server and PytestForkServer.is_supported()
+        # per test file: content hash + node ids that failed on the last run
+        self._last_failed: Dict[str, Dict] = {}
+        self._last_failed_lock = threading.Lock()
         print(" TestingTools initialized")
 
-    def run_pytest(self, test_target: str, timeout: int = 60, verbose: bool = True) -> Dict:
+    def _build_command(self, test_target: Union[str, List[str]], verbose: bool, report_path: str) -> list:
         cmd = [sys.executable, "-m", "pytest"]
 
         if verbose:
@@ -20,58 +46,346 @@ class TestingTools:
         else:
             cmd.append("-q")
 
-        cmd.append(test_target)
+        # structured per-test results (see pytest_report_plugin.py)
+        cmd += ["-p", REPORT_PLUGIN, f"--swarm-report={report_path}"]
+
+        if isinstance(test_target, str):
+            cmd.append(test_target)
+        else:
+            cmd.extend(test_target)
+        return cmd
+
+    def _new_report_path(self) -> str:
+        fd, report_path = tempfile.mkstemp(prefix="pytest_report_", suffix=".json")
+        os.close(fd)
+        return report_path
+
+    def _subprocess_env(self) -> Dict:
+        # the report plugin is imported by module name from the repo root
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+        return env
+
+    def run_pytest(self, test_target: Union[str, List[str]], timeout: int = 60, verbose: bool = True) -> Dict:
+        with metrics.timed("tool", "pytest", fork_server=self.use_fork_server) as record:
+            result = self._run_pytest(test_target, timeout, verbose)
+            record.update(self._metrics_fields(test_target, result))
+            return result
+
+    async def arun_pytest(self, test_target: Union[str, List[str]], timeout: int = 60, verbose: bool = True) -> Dict:
+        """Async variant of run_pytest (asyncio subprocess, same result dict)."""
+        with metrics.timed("tool", "pytest", fork_server=self.use_fork_server) as record:
+            result = await self._arun_pytest(test_target, timeout, verbose)
+            record.update(self._metrics_fields(test_target, result))
+            return result
+
+    def _metrics_fields(self, test_target: Union[str, List[str]], result: Dict) -> Dict:
+        return {
+            "targets": 1 if isinstance(test_target, str) else len(test_target),
+            "tests": result.get("total"),
+            "success": result.get("success"),
+            "pytest_status": result.get("status")
+        }
+
+    def _run_pytest(self, test_target: Union[str, List[str]], timeout: int, verbose: bool) -> Dict:
+        report_path = self._new_report_path()
+        cmd = self._build_command(test_target, verbose, report_path)
 
         project_root = self.sandbox_path.parent 
 
+        if self.use_fork_server:
+            return self._run_in_fork_server(cmd, project_root, timeout, report_path, test_target, verbose)
+
         try:
             result = subprocess.run(
                 cmd,
                 capture_output=True,
                 text=True,
                 timeout=timeout,
-                cwd=str(project_root)
+                cwd=str(project_root),
+                env=self._subprocess_env()
             )
 
-            parsed = self.parse_pytest_output(result.stdout + "\n" + result.stderr, result.returncode)
-            # parsed["raw_stdout"] = result.stdout
-            # parsed["raw_stderr"] = result.stderr
-            parsed["return_code"] = result.returncode
-
-            return parsed
+            return self._collect_results(result.stdout + "\n" + result.stderr, result.returncode, report_path)
 
         except subprocess.TimeoutExpired as e:
-            return {
-                "status": "timeout",
-                "success": False,
-                "passed": 0,
-                "failed": 0,
-                "errors": 0,
-                "skipped": 0,
-                "total": 0,
-                "duration": 0.0,
-                "failures": [],
-                "raw_stdout": e.stdout or "",
-                "raw_stderr": e.stderr or "",
-                "return_code": -1
-            }
+            self._remove_report(report_path)
+            return self._error_result("timeout", e.stdout or "", e.stderr or "")
 
         except FileNotFoundError:
-            return {
-                "status": "pytest_not_installed",
-                "success": False,
-                "passed": 0,
-                "failed": 0,
-                "errors": 0,
-                "skipped": 0,
-                "total": 0,
-                "duration": 0.0,
-                "failures": [],
-                "raw_stdout": "",
-                "raw_stderr": "pytest not found",
-                "return_code": -1
+            self._remove_report(report_path)
+            return self._error_result("pytest_not_installed", "", "pytest not found")
+
+    async def _arun_pytest(self, test_target: Union[str, List[str]], timeout: int, verbose: bool) -> Dict:
+        report_path = self._new_report_path()
+        cmd = self._build_command(test_target, verbose, report_path)
+
+        project_root = self.sandbox_path.parent
+
+        if self.use_fork_server:
+            server = get_server()
+            for attempt in range(2):
+                future = self._submit_to_fork_server(server, cmd, project_root, timeout)
+                if future is None:
+                    break
+                try:
+                    response = await asyncio.wait_for(asyncio.wrap_future(future), timeout + 10)
+                except (RuntimeError, asyncio.TimeoutError) as e:
+                    if not self._restart_fork_server(server, future, e, attempt):
+                        break
+                    continue
+                return self._parse_server_response(response, report_path)
+            # the server cannot start or failed twice: a plain subprocess
+            self._remove_report(report_path)
+            return await self._arun_pytest(test_target, timeout, verbose)
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=str(project_root),
+                env=self._subprocess_env()
+            )
+        except FileNotFoundError:
+            self._remove_report(report_path)
+            return self._error_result("pytest_not_installed", "", "pytest not found")
+
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            self._remove_report(report_path)
+            return self._error_result("timeout", "", "")
+
+        stdout = stdout.decode("utf-8", errors="replace")
+        stderr = stderr.decode("utf-8", errors="replace")
+        return self._collect_results(stdout + "\n" + stderr, process.returncode, report_path)
+
+    def run_pytest_incremental(self, test_target: str, timeout: int = 60, verbose: bool = True) -> Dict:
+        """
+        Last-failed-first run of a test file across fixer/judge iterations.
+
+        If the same test file (same content) failed last time, only the
+        tests that failed are rerun first. While any of them still fails,
+        that partial result is returned (success is False either way). Once
+        they pass, the whole file is run, so success is still only ever
+        reported from a full run.
+
+        The result dict carries "rerun": "failed_first" or "full".
+        """
+        previous = self._previous_failures(test_target)
+        if previous:
+            print(f" Rerunning {len(previous)} previously failing test(s) first")
+            subset = self.run_pytest(previous, timeout, verbose)
+            if not subset["success"]:
+                self._remember_failures(test_target, subset)
+                subset["rerun"] = "failed_first"
+                return subset
+
+        result = self.run_pytest(test_target, timeout, verbose)
+        self._remember_failures(test_target, result)
+        result["rerun"] = "full"
+        return result
+
+    async def arun_pytest_incremental(self, test_target: str, timeout: int = 60, verbose: bool = True) -> Dict:
+        """Async variant of run_pytest_incremental."""
+        previous = self._previous_failures(test_target)
+        if previous:
+            print(f" Rerunning {len(previous)} previously failing test(s) first")
+            subset = await self.arun_pytest(previous, timeout, verbose)
+            if not subset["success"]:
+                self._remember_failures(test_target, subset)
+                subset["rerun"] = "failed_first"
+                return subset
+
+        result = await self.arun_pytest(test_target, timeout, verbose)
+        self._remember_failures(test_target, result)
+        result["rerun"] = "full"
+        return result
+
+    def discover_tests(self, directory: str) -> List[str]:
+        """Test files under directory (test_*.py and *_test.py, as pytest collects them)"""
+        return [
+            path for path in iter_python_files(directory)
+            if os.path.basename(path).startswith("test_") or path.endswith("_test.py")
+        ]
+
+    def forget_test_state(self, test_target: str):
+        """Drop the last-failed state of a test file (end of its workflow)."""
+        with self._last_failed_lock:
+            self._last_failed.pop(test_target, None)
+
+    def _previous_failures(self, test_target: str) -> List[str]:
+        with self._last_failed_lock:
+            state = self._last_failed.get(test_target)
+        # a regenerated test file invalidates the node ids
+        if not state or state["hash"] != self._file_hash(test_target):
+            return []
+        return state["failed"]
+
+    def _remember_failures(self, test_target: str, result: Dict):
+        failed = [d["nodeid"] for d in result.get("failure_details", [])]
+        # timeouts/crashes have no node ids: next run is a full run
+        with self._last_failed_lock:
+            self._last_failed[test_target] = {
+                "hash": self._file_hash(test_target),
+                "failed": failed,
             }
 
+    def _file_hash(self, test_target: str) -> Optional[str]:
+        path = Path(test_target)
+        if not path.is_absolute():
+            path = self.sandbox_path.parent / path
+        try:
+            return hashlib.sha256(path.read_bytes()).hexdigest()
+        except OSError:
+            return None
+
+    def _run_in_fork_server(self, cmd: list, project_root: Path, timeout: int, report_path: str,
+                            test_target: Union[str, List[str]], verbose: bool) -> Dict:
+        """Run pytest in a child of the warm fork server (same result dict)"""
+        server = get_server()
+        for attempt in range(2):
+            future = self._submit_to_fork_server(server, cmd, project_root, timeout)
+            if future is None:
+                break
+            try:
+                # the server enforces the timeout; the margin only covers transport
+                response = future.result(timeout + 10)
+            except (RuntimeError, FutureTimeout) as e:
+                if not self._restart_fork_server(server, future, e, attempt):
+                    break
+                continue
+            return self._parse_server_response(response, report_path)
+        self._remove_report(report_path)
+        return self._run_pytest(test_target, timeout, verbose)
+
+    def _submit_to_fork_server(self, server: PytestForkServer, cmd: list, project_root: Path, timeout: int):
+        """The run's future, or None (fork server off) if the server cannot start"""
+        try:
+            # cmd is [python, -m, pytest, ...]: the server only needs the pytest args
+            return server.submit(cmd[3:], str(project_root), timeout)
+        except OSError as e:
+            # restarting it would not help
+            print(f"⚠️ pytest fork server unavailable ({e!r}), using a subprocess")
+            self.use_fork_server = False
+            return None
+
+    def _restart_fork_server(self, server: PytestForkServer, future, error: Exception, attempt: int) -> bool:
+        """
+        After a run the fork server failed (died, hung): restart it for one
+        more try, or stop using it after the second failure
+
+        Returns:
+            True if the run should be retried on the restarted server
+        """
+        if attempt == 0:
+            print(f"⚠️ pytest fork server failed ({error!r}), restarting it")
+            server.restart(future.generation)
+            return True
+        print(f"⚠️ pytest fork server unavailable ({error!r}), using a subprocess")
+        self.use_fork_server = False
+        return False
+
+    def _parse_server_response(self, response: Dict, report_path: str) -> Dict:
+        if response["timed_out"]:
+            self._remove_report(report_path)
+            return self._error_result("timeout", response["output"], "")
+        return self._collect_results(response["output"], response["return_code"], report_path)
+
+    def _collect_results(self, raw_output: str, return_code: int, report_path: str) -> Dict:
+        """
+        Result dict of a finished run: from the JSON report when pytest
+        wrote one, from the terminal output otherwise (e.g. pytest crashed
+        before the session finished)
+        """
+        report = self._read_report(report_path)
+        if report is not None:
+            parsed = self.results_from_report(report, return_code)
+        else:
+            parsed = self.parse_pytest_output(raw_output, return_code)
+        # parsed["raw_stdout"] = result.stdout
+        # parsed["raw_stderr"] = result.stderr
+        parsed["return_code"] = return_code
+        return parsed
+
+    def _read_report(self, report_path: str) -> Optional[Dict]:
+        try:
+            with open(report_path, "r", encoding="utf-8") as f:
+                content = f.read()
+            return json.loads(content) if content else None
+        except (OSError, json.JSONDecodeError):
+            return None
+        finally:
+            self._remove_report(report_path)
+
+    def _remove_report(self, report_path: str):
+        try:
+            os.remove(report_path)
+        except OSError:
+            pass
+
+    def results_from_report(self, report: Dict, return_code: int) -> Dict:
+        """
+        Build the result dict from a pytest_report_plugin JSON report.
+
+        On top of the summary counts it carries:
+            tests: every test with nodeid, outcome, duration, message, traceback
+            failure_details: the failed/errored entries of tests, then the
+                collection and teardown errors
+            slowest: the 5 slowest tests (nodeid, duration)
+        """
+        tests = report.get("tests", [])
+        details = [t for t in tests if t["outcome"] in ("failed", "error")]
+        extra_errors = report.get("collect_errors", []) + report.get("teardown_errors", [])
+        details += extra_errors
+
+        counts = {"passed": 0, "failed": 0, "error": 0, "skipped": 0}
+        for test in tests:
+            counts[test["outcome"]] = counts.get(test["outcome"], 0) + 1
+        counts["error"] += len(extra_errors)
+
+        result = {
+            "passed": counts["passed"],
+            "failed": counts["failed"],
+            "errors": counts["error"],
+            "collect_errors": len(report.get("collect_errors", [])),
+            "skipped": counts["skipped"],
+            "total": counts["passed"] + counts["failed"] + counts["error"] + counts["skipped"],
+            "duration": report.get("duration", 0.0),
+            "success": return_code == 0,
+            "status": "success" if return_code == 0 else "failed",
+            "failures": [
+                f"{'FAILED' if d['outcome'] == 'failed' else 'ERROR'} {d['nodeid']} - {d['message']}"
+                for d in details
+            ],
+            "tests": tests,
+            "failure_details": details,
+            "slowest": [
+                {"nodeid": t["nodeid"], "duration": t["duration"]}
+                for t in sorted(tests, key=lambda t: t["duration"], reverse=True)[:5]
+            ],
+        }
+        return result
+
+    def _error_result(self, status: str, stdout: str, stderr: str) -> Dict:
+        return {
+            "status": status,
+            "success": False,
+            "passed": 0,
+            "failed": 0,
+            "errors": 0,
+            "skipped": 0,
+            "total": 0,
+            "duration": 0.0,
+            "failures": [],
+            "raw_stdout": stdout,
+            "raw_stderr": stderr,
+            "return_code": -1
+        }
+
     def parse_pytest_output(self, raw_output: str, return_code: int) -> Dict:
         result = {
             "passed": 0,
@@ -85,10 +399,15 @@ class TestingTools:
             "failures": [],
         }
 
-        summary_match = re.search(r"=+\s*(\d+)\s+passed\s+in\s+([\d.]+)s", raw_output)
-        if summary_match:
-            result["passed"] = int(summary_match.group(1))
-            result["duration"] = float(summary_match.group(2))
+        # counts are matched independently: with mixed results the summary
+        # reads "1 failed, 2 passed in 0.10s"
+        passed_match = re.search(r"(\d+)\s+passed", raw_output)
+        if passed_match:
+            result["passed"] = int(passed_match.group(1))
+
+        duration_match = re.search(r"\s+in\s+([\d.]+)s", raw_output)
+        if duration_match:
+            result["duration"] = float(duration_match.group(1))
 
         failed_match = re.search(r"(\d+)\s+failed", raw_output)
         if failed_match:
@@ -102,6 +421,9 @@ class TestingTools:
         if skipped_match:
             result["skipped"] = int(skipped_match.group(1))
 
+        collect_match = re.search(r"(\d+)\s+errors?\s+during collection", raw_output)
+        result["collect_errors"] = int(collect_match.group(1)) if collect_match else 0
+
         result["total"] = (
             result["passed"]
             + result["failed"]
@@ -36,33 +36,33 @@ class ToolsManager:
     
     def read_file(self, file_path: str) -> Optional[str]:
         """Read a file safely"""
-        return self.files.read_file(file_path)
+        return self.files.read_file(self.files, file_path)
     
     def write_file(self, file_path: str, content: str) -> bool:
         """Write to a file safely"""
-        return self.files.write_file(file_path, content)
+        return self.files.write_file(self.files, file_path, content)
     
     def list_python_files(self, directory: str) -> List[str]:
         """List all Python files in directory"""
-        return self.files.list_python_files(directory)
+        return self.files.list_python_files(self.files, directory)
     
     def backup_file(self, file_path: str) -> Optional[str]:
         """Create backup before modification"""
-        return self.files.backup_file(file_path)
+        return self.files.backup_file(self.files, file_path)
     
     def restore_backup(self, backup_path: str, original_path: str) -> bool:
         """Restore from backup"""
-        return self.files.restore_backup(backup_path, original_path)
+        return self.files.restore_backup(self.files, backup_path, original_path)
     
     # ============ CODE ANALYSIS ============
     
     def analyze_file(self, file_path: str) -> Dict:
         """Run pylint analysis on a single file"""
-        return self.analysis.run_pylint(file_path)
+        return self.analysis.run_pylint(self.analysis, file_path)
     
-    def analyze_directory(self, directory: str) -> Dict[str, Dict]:
-        """Analyze all Python files in directory"""
-        return self.analysis.analyze_directory(directory)
+    def analyze_directory(self, directory: str, batched: bool = True) -> Dict[str, Dict]:
+        """Analyze all Python files in directory (batched parallel pylint by default)"""
+        return self.analysis.analyze_directory(directory, batched=batched)
     
     def get_analysis_summary(self, analysis_results: Dict[str, Dict]) -> Dict:
         """Get summary of analysis results"""
@@ -75,8 +75,8 @@ class ToolsManager:
     # ============ TESTING ============
     
     def run_tests(self, target_path: str, test_file: Optional[str] = None) -> Dict:
-        """Run pytest on target"""
-        return self.testing.run_pytest(target_path, test_file)
+        """Run pytest on target (or only on test_file)"""
+        return self.testing.run_pytest(test_file or target_path)
     
     def discover_tests(self, directory: str) -> List[str]:
         """Find all test files"""
@@ -0,0 +1,312 @@
+"""
+Workspaces for Refactoring Swarm
+Author: Toolsmith Team
+Purpose: Give each file's workflow its own copy of the sandbox, so concurrent
+workflows never see each other's half-fixed files or generated tests, and a
+workflow that crashes leaves sandbox/ untouched.
+
+A workspace is a mirror of sandbox/ under .swarm_cache/workspaces/<slug>/
+(the target's name plus a hash of its path); <slug>.lock marks it as in use:
+the directories from sandbox/ down to the target are real directories whose
+files are hardlinks of the originals (copies across filesystems); every other
+subdirectory is a symlink to the original, since the workflow only writes
+next to its target. Mirroring costs one link per entry on the target's path,
+not one copy per file of the sandbox. Hardlinks are safe because FileTools
+and the snapshot store replace files (new inode) instead of rewriting them.
+
+commit() publishes what the workflow created, changed or deleted back into
+sandbox/ (each file with an atomic rename, after every new version is
+staged), skipping files whose original changed meanwhile; close() removes the
+workspace.
+
+Usage:
+    workspace = open_workspace("sandbox/calc.py")
+    state["file_path"] = workspace.target        # run the graph on the mirror
+    workspace.commit()
+    close_workspace(workspace)
+"""
+import errno
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .analysis_tools import AnalysisTools
+from .file_tools import FileTools
+from .testing_tools import TestingTools
+
+DEFAULT_SANDBOX_PATH = "./sandbox"
+DEFAULT_WORKSPACES_DIR = os.path.join(".swarm_cache", "workspaces")
+# never mirrored nor committed: caches and the snapshot store
+EXCLUDED_NAMES = {".snapshots", "__pycache__", ".pytest_cache", ".mypy_cache"}
+
+_open_workspaces: Dict[str, "Workspace"] = {}
+_open_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    """Whether workflows run in workspaces ($SWARM_WORKSPACES, "1" = on)"""
+    return os.getenv("SWARM_WORKSPACES", "0") == "1"
+
+
+def _stat_key(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.lstat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class Workspace:
+    """Isolated mirror of the sandbox for one target file"""
+
+    def __init__(self, file_path: str, sandbox_path: Optional[str] = None,
+                 root_dir: Optional[str] = None):
+        """
+        Create the mirror (an old workspace of the same file is wiped)
+
+        Args:
+            file_path: Target file, inside sandbox_path
+            sandbox_path: Directory to mirror (default: DEFAULT_SANDBOX_PATH)
+            root_dir: Directory holding the workspaces
+                (default: DEFAULT_WORKSPACES_DIR)
+
+        Raises:
+            ValueError: If file_path is not inside sandbox_path
+        """
+        self.sandbox_path = Path(sandbox_path or DEFAULT_SANDBOX_PATH).resolve()
+        self.source = Path(file_path).resolve()
+        try:
+            relative = self.source.relative_to(self.sandbox_path)
+        except ValueError:
+            raise ValueError(f"🚫 {file_path} is outside {self.sandbox_path}") from None
+
+        # stable per target: test store, lint and LLM cache keys stay the same
+        # between runs; the hash keeps a/b.py and a__b.py apart
+        digest = hashlib.sha256(str(self.source).encode("utf-8")).hexdigest()[:16]
+        slug = re.sub(r"[^\w.-]", "_", relative.name) + f"-{digest}"
+        self.root = Path(root_dir or DEFAULT_WORKSPACES_DIR).resolve() / slug
+        self.lock_path = self.root.with_name(f"{slug}.lock")
+        self.mirror = self.root / self.sandbox_path.name
+        self.target = str(self.mirror / relative)
+        # mirrored file -> (original stat, mirror stat) at creation time
+        self._mirrored: Dict[str, Tuple] = {}
+        self._real_dirs: List[Path] = []
+
+        self._acquire()
+        try:
+            # leftover of a run that died: nobody holds its lock any more
+            shutil.rmtree(self.root, ignore_errors=True)
+            self.mirror.mkdir(parents=True)
+            self._build(relative)
+        except BaseException:
+            self._release()
+            raise
+
+        self.fl = FileTools(sandbox_path=str(self.mirror))
+        self.fa = AnalysisTools(sandbox_path=str(self.mirror))
+        self.ft = TestingTools(sandbox_path=str(self.mirror))
+
+    # ---------- lock ----------
+
+    def _acquire(self):
+        """
+        Take the workspace's lock file (O_EXCL), or take over a stale one
+
+        Raises:
+            RuntimeError: If a live workflow (this process or another) uses it
+        """
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        for _ in range(2):
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                owner = self._lock_owner()
+                if owner is not None and _pid_alive(owner):
+                    raise RuntimeError(f"🔒 Workspace {self.root} is in use (pid {owner})") from None
+                os.remove(self.lock_path)
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(str(os.getpid()))
+            return
+        raise RuntimeError(f"🔒 Workspace {self.root} is in use")
+
+    def _lock_owner(self) -> Optional[int]:
+        try:
+            return int(self.lock_path.read_text().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _release(self):
+        try:
+            os.remove(self.lock_path)
+        except FileNotFoundError:
+            pass
+
+    # ---------- mirror ----------
+
+    def _build(self, relative: Path):
+        source_dir, mirror_dir = self.sandbox_path, self.mirror
+        path_dirs = list(relative.parts[:-1])
+        while True:
+            self._real_dirs.append(mirror_dir)
+            descend = path_dirs.pop(0) if path_dirs else None
+            with os.scandir(source_dir) as entries:
+                for entry in entries:
+                    if entry.name in EXCLUDED_NAMES or entry.name == descend:
+                        continue
+                    destination = mirror_dir / entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        self._link_dir(entry.path, destination)
+                    elif entry.is_file(follow_symlinks=False):
+                        self._link_file(entry.path, destination)
+            if descend is None:
+                return
+            source_dir, mirror_dir = source_dir / descend, mirror_dir / descend
+            mirror_dir.mkdir()
+
+    def _link_file(self, source: str, destination: Path):
+        try:
+            os.link(source, destination)
+        except OSError:
+            # other filesystem (EXDEV) or no hardlinks: a real copy
+            shutil.copy2(source, destination)
+        self._mirrored[str(destination)] = (_stat_key(source), _stat_key(str(destination)))
+
+    @staticmethod
+    def _link_dir(source: str, destination: Path):
+        try:
+            os.symlink(source, destination, target_is_directory=True)
+        except OSError:
+            # no symlinks (Windows without privilege): copy the subtree
+            shutil.copytree(source, destination, copy_function=shutil.copy2,
+                            ignore=shutil.ignore_patterns(*EXCLUDED_NAMES))
+
+    # ---------- commit ----------
+
+    def original_path(self, path: str) -> Path:
+        """Sandbox path of a path inside the mirror"""
+        return self.sandbox_path / Path(path).resolve().relative_to(self.mirror)
+
+    def changes(self) -> Dict[str, List[str]]:
+        """
+        What the workflow did to the mirror
+
+        Returns:
+            {"written": [mirror paths created or replaced],
+             "deleted": [mirror paths removed]}
+        """
+        written, deleted = [], []
+        for directory in self._real_dirs:
+            for entry in os.scandir(directory):
+                if entry.name in EXCLUDED_NAMES or not entry.is_file(follow_symlinks=False):
+                    continue
+                recorded = self._mirrored.get(entry.path)
+                if recorded is None or recorded[1] != _stat_key(entry.path):
+                    written.append(entry.path)
+        for path in self._mirrored:
+            if not os.path.lexists(path):
+                deleted.append(path)
+        return {"written": sorted(written), "deleted": sorted(deleted)}
+
+    def _conflict(self, path: str) -> bool:
+        """The sandbox original changed (or appeared) since the mirror was made."""
+        recorded = self._mirrored.get(path)
+        current = _stat_key(str(self.original_path(path)))
+        return current != (recorded[0] if recorded else None)
+
+    def commit(self) -> Dict:
+        """
+        Publish the workflow's changes into the sandbox
+
+        New versions are staged as temporary files next to their destination
+        first, then renamed over the originals one by one (atomic per file).
+
+        Returns:
+            {"written": [sandbox paths], "deleted": [sandbox paths],
+             "conflicts": [sandbox paths left as they were]}
+        """
+        # overlay mode: buffered writes must reach the mirror first
+        self.fl.commit()
+        changes = self.changes()
+        result = {"written": [], "deleted": [], "conflicts": []}
+        staged = []
+        try:
+            for path in changes["written"]:
+                destination = self.original_path(path)
+                if self._conflict(path):
+                    result["conflicts"].append(str(destination))
+                    continue
+                fd, tmp_path = tempfile.mkstemp(dir=destination.parent, prefix=".ws-")
+                os.close(fd)
+                staged.append((tmp_path, destination))
+                try:
+                    os.remove(tmp_path)
+                    os.link(path, tmp_path)
+                except OSError:
+                    shutil.copy2(path, tmp_path)
+            for tmp_path, destination in staged:
+                os.replace(tmp_path, destination)
+                result["written"].append(str(destination))
+            staged = []
+        finally:
+            for tmp_path, _ in staged:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        for path in changes["deleted"]:
+            destination = self.original_path(path)
+            if self._conflict(path):
+                result["conflicts"].append(str(destination))
+                continue
+            try:
+                os.remove(destination)
+                result["deleted"].append(str(destination))
+            except FileNotFoundError:
+                pass
+
+        if result["conflicts"]:
+            print(f"⚠️ Changed in the sandbox during the workflow, not overwritten: {result['conflicts']}")
+        return result
+
+    def close(self):
+        """Remove the workspace (uncommitted changes are discarded)."""
+        self.fa.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+        self._release()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM
+    return True
+
+
+def open_workspace(file_path: str, sandbox_path: Optional[str] = None) -> Workspace:
+    """Create the workspace of a file and register it for get_workspace()"""
+    workspace = Workspace(file_path, sandbox_path)
+    with _open_lock:
+        _open_workspaces[str(workspace.root)] = workspace
+    return workspace
+
+
+def get_workspace(root: str) -> Workspace:
+    """
+    Open workspace by root directory (what the graph state carries)
+
+    Raises:
+        KeyError: If no open workspace has this root
+    """
+    return _open_workspaces[root]
+
+
+def close_workspace(workspace: Workspace):
+    with _open_lock:
+        _open_workspaces.pop(str(workspace.root), None)
+    workspace.close()
@@ -0,0 +1,309 @@
+"""
+LLM Response Cache for Refactoring Swarm
+Purpose: Content-addressed on-disk cache of LLM responses, so that re-running
+the swarm on an unchanged sandbox does not pay for identical prompts again.
+
+Entries are keyed by sha256(model name + full prompt) and stored in SQLite.
+Eviction is LRU on last access, bounded by entry count, total size and age.
+
+Inside recording(), the keys of the answers used are collected, so the
+answers behind a bad result can be dropped later with discard_keys().
+"""
+import asyncio
+import atexit
+import contextvars
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+from src.utils import metrics
+
+CACHE_DIR = ".swarm_cache"
+DEFAULT_CACHE_PATH = os.path.join(CACHE_DIR, "llm_cache.sqlite")
+
+# Toggled by main.py --no-llm-cache (or SWARM_LLM_CACHE=0)
+_enabled = os.getenv("SWARM_LLM_CACHE", "1") != "0"
+_shared_cache = None
+_shared_lock = threading.Lock()
+# keys of the answers used inside the current recording() block (or None)
+_used_keys = contextvars.ContextVar("llm_cache_used_keys", default=None)
+
+
+class CachedResponse:
+    """Minimal stand-in for an AIMessage: agents only read `.content`."""
+
+    def __init__(self, content: str):
+        self.content = content
+
+
+class LLMCache:
+    """SQLite-backed response cache with LRU eviction and hit/miss counters"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = 5000,
+                 max_bytes: int = 200 * 1024 * 1024, max_age_days: float = 30,
+                 evict_every: int = 50):
+        """
+        Open (or create) the cache database
+
+        Args:
+            path: SQLite file
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum total size of cached responses
+            max_age_days: Entries older than this are dropped
+            evict_every: Run eviction after this many inserts
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                content TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)"
+        )
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(model: str, prompt: str) -> str:
+        """Content address of a request: sha256(model + NUL + prompt)"""
+        digest = hashlib.sha256()
+        digest.update(model.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None (counts hit/miss)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, model: str, content: str):
+        """Store a response and evict periodically"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, content, len(content.encode("utf-8")), now, now)
+            )
+            self._conn.commit()
+            self._puts += 1
+            should_evict = self._puts % self.evict_every == 0
+        if should_evict:
+            self.evict()
+
+    def discard(self, key: str):
+        """Drop one entry (e.g. a response the agent could not parse)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def evict(self) -> int:
+        """
+        Drop expired entries, then least recently used ones until the
+        count and size limits hold
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - self.max_age,)
+            ).rowcount
+
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            if count > self.max_entries or total > self.max_bytes:
+                rows = self._conn.execute(
+                    "SELECT key, size FROM responses ORDER BY last_access ASC"
+                ).fetchall()
+                victims = []
+                for key, size in rows:
+                    if count <= self.max_entries and total <= self.max_bytes:
+                        break
+                    victims.append((key,))
+                    count -= 1
+                    total -= size
+                self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+                removed += len(victims)
+
+            self._conn.commit()
+            return removed
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process plus current cache size"""
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'entries': count,
+            'size_bytes': total
+        }
+
+    def close(self):
+        """Close the database connection (the cache is unusable afterwards)"""
+        with self._lock:
+            self._conn.close()
+
+
+def set_enabled(enabled: bool):
+    """Globally enable/disable the cache (checked on every call)"""
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def get_cache() -> LLMCache:
+    """Process-wide cache instance, opened on first use"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = LLMCache()
+            atexit.register(_shared_cache.close)
+        return _shared_cache
+
+
+@contextmanager
+def recording():
+    """
+    Collect the cache keys of the answers CachedLLM returns inside the block
+    (cached or fresh; also from threads/tasks started with a copy of this
+    context)
+
+    Yields:
+        The list of keys, filled in as calls are made
+    """
+    keys: List[str] = []
+    token = _used_keys.set(keys)
+    try:
+        yield keys
+    finally:
+        _used_keys.reset(token)
+
+
+def _note_key(key: str):
+    keys = _used_keys.get()
+    if keys is not None and key not in keys:
+        keys.append(key)
+
+
+def discard_keys(keys: Iterable[str]) -> int:
+    """
+    Drop the answers behind a bad result (e.g. a test suite that never
+    passed), so the next run asks the model again
+
+    Returns:
+        Number of keys discarded (0 when the cache is disabled)
+    """
+    if not is_enabled():
+        return 0
+    cache = get_cache()
+    keys = list(dict.fromkeys(keys))
+    for key in keys:
+        cache.discard(key)
+    return len(keys)
+
+
+class CachedLLM:
+    """
+    Wraps a chat model so that invoke/ainvoke go through the cache.
+
+    Only `.content` of a cached response is kept, which is all the agents use.
+    """
+
+    def __init__(self, llm, model_name: str, cache: Optional[LLMCache] = None):
+        self.llm = llm
+        self.model_name = model_name
+        self._cache = cache
+
+    @property
+    def cache(self) -> LLMCache:
+        return self._cache or get_cache()
+
+    def invoke(self, prompt: str):
+        with metrics.timed("llm", self.model_name) as record:
+            if not is_enabled():
+                response = self.llm.invoke(prompt)
+                record.update(metrics.token_usage(prompt, response), cached=False)
+                return response
+            key = LLMCache.make_key(self.model_name, prompt)
+            _note_key(key)
+            content = self.cache.get(key)
+            if content is not None:
+                record.update(cached=True, prompt_tokens=0, completion_tokens=0)
+                return CachedResponse(content)
+            response = self.llm.invoke(prompt)
+            record.update(metrics.token_usage(prompt, response), cached=False)
+            self.cache.put(key, self.model_name, response.content)
+            return response
+
+    async def ainvoke(self, prompt: str):
+        with metrics.timed("llm", self.model_name) as record:
+            if not is_enabled():
+                response = await self.llm.ainvoke(prompt)
+                record.update(metrics.token_usage(prompt, response), cached=False)
+                return response
+            key = LLMCache.make_key(self.model_name, prompt)
+            _note_key(key)
+            # sqlite calls block: keep them off the event loop
+            content = await asyncio.to_thread(self.cache.get, key)
+            if content is not None:
+                record.update(cached=True, prompt_tokens=0, completion_tokens=0)
+                return CachedResponse(content)
+            response = await self.llm.ainvoke(prompt)
+            record.update(metrics.token_usage(prompt, response), cached=False)
+            await asyncio.to_thread(self.cache.put, key, self.model_name, response.content)
+            return response
+
+    def discard(self, prompt: str):
+        """Forget the cached response for prompt (no-op when disabled)"""
+        if is_enabled():
+            self.cache.discard(LLMCache.make_key(self.model_name, prompt))
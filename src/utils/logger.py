@@ -1,11 +1,27 @@
+import atexit
 import json
 import os
+import sys
+import threading
+import time
 import uuid
 from datetime import datetime
 from enum import Enum
 
-# Chemin du fichier de logs
+try:
+    import fcntl
+except ImportError:  # Windows : verrou inter-processus indisponible
+    fcntl = None
+
+# Chemin du fichier de logs (format liste attendu par validate_logs.py)
 LOG_FILE = os.path.join("logs", "experiment_data.json")
+# Journal append-only, une entrée JSON par ligne
+JSONL_LOG_FILE = os.path.join("logs", "experiment_data.jsonl")
+# "jsonl" (défaut) ou "json" pour l'ancien read-modify-write
+LOG_BACKEND = os.getenv("SWARM_LOG_BACKEND", "jsonl")
+# Sérialise le read-modify-write quand plusieurs workflows tournent en parallèle
+_LOG_LOCK = threading.Lock()
+_writer = None
 
 class ActionType(str, Enum):
     """
@@ -95,7 +111,16 @@ def log_experiment(agent_name: str, model_used: str, action: ActionType, details
         "status": status
     }
 
-    # --- 4. LECTURE & ÉCRITURE ROBUSTE ---
+    # --- 4. ÉCRITURE ---
+    if LOG_BACKEND == "json":
+        with _LOG_LOCK:
+            _append_entry(entry)
+    else:
+        get_writer().write(entry)
+
+
+def _append_entry(entry: dict):
+    """Ajoute une entrée au fichier de logs (appelé sous _LOG_LOCK)."""
     data = []
     if os.path.exists(LOG_FILE):
         try:
@@ -114,6 +139,130 @@ def log_experiment(agent_name: str, model_used: str, action: ActionType, details
     with open(LOG_FILE, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
 
+
+class JsonlLogWriter:
+    """
+    Écriture append-only des entrées, une par ligne (JSON Lines).
+
+    Chaque entrée coûte un seul write() en fin de fichier, quel que soit le
+    nombre d'entrées déjà écrites. Les fsync sont regroupés (toutes les
+    `fsync_every` entrées ou `fsync_interval` secondes) et un verrou
+    (thread + flock) protège les écrivains concurrents.
+    """
+
+    def __init__(self, path: str = JSONL_LOG_FILE, fsync_every: int = 20,
+                 fsync_interval: float = 2.0, legacy_path: str = LOG_FILE):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        is_new = not os.path.exists(path)
+        self._file = open(path, "ab")
+        if is_new and legacy_path and os.path.exists(legacy_path):
+            self._import_legacy(legacy_path)
+
+    def _import_legacy(self, legacy_path: str):
+        """Reprend une seule fois les entrées de l'ancien fichier JSON."""
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                content = f.read().strip()
+            entries = json.loads(content) if content else []
+        except (OSError, json.JSONDecodeError):
+            print(f"⚠️ Attention : {legacy_path} illisible, non importé dans {self.path}.")
+            return
+        for entry in entries:
+            self.write(entry)
+        self.sync()
+
+    def write(self, entry: dict):
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            try:
+                self._file.write(line)
+                self._file.flush()
+            finally:
+                if fcntl:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._pending += 1
+            if (self._pending >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync_locked()
+
+    def sync(self):
+        with self._lock:
+            self._sync_locked()
+
+    def _sync_locked(self):
+        if self._pending and not self._file.closed:
+            os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._sync_locked()
+                self._file.close()
+
+
+def get_writer() -> JsonlLogWriter:
+    """Writer JSONL partagé par le processus (ouvert au premier log)."""
+    global _writer
+    with _LOG_LOCK:
+        if _writer is None:
+            _writer = JsonlLogWriter()
+            atexit.register(_writer.close)
+        return _writer
+
+
+def iter_jsonl_entries(jsonl_path: str = JSONL_LOG_FILE):
+    """Parcourt les entrées d'un fichier JSONL sans tout charger en mémoire."""
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # ligne tronquée (ex: crash pendant l'écriture)
+                print(f"⚠️ Ligne {line_no} ignorée dans {jsonl_path} (JSON invalide).")
+
+
+def export_to_json(jsonl_path: str = JSONL_LOG_FILE, json_path: str = LOG_FILE) -> int:
+    """
+    Convertit le journal JSONL vers le format liste attendu par validate_logs.py.
+
+    L'export est fait en streaming puis remplacé atomiquement.
+
+    Returns:
+        int: nombre d'entrées exportées.
+    """
+    if _writer is not None and _writer.path == jsonl_path:
+        _writer.sync()
+    if not os.path.exists(jsonl_path):
+        return 0
+
+    count = 0
+    tmp_path = json_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        out.write("[")
+        for entry in iter_jsonl_entries(jsonl_path):
+            out.write(",\n" if count else "\n")
+            body = json.dumps(entry, indent=4, ensure_ascii=False)
+            out.write("\n".join("    " + line for line in body.splitlines()))
+            count += 1
+        out.write("\n]" if count else "]")
+    os.replace(tmp_path, json_path)
+    return count
+
+
 # ✅ ADDED: Helper function for backward compatibility
 def log_system_message(message: str, status: str = "INFO", **extra_details):
     """
@@ -129,4 +278,14 @@ def log_system_message(message: str, status: str = "INFO", **extra_details):
         action=ActionType.SYSTEM,
         details=details,
         status=status
-    )
\ No newline at end of file
+    )
+
+
+if __name__ == "__main__":
+    # python -m src.utils.logger export [jsonl_path] [json_path]
+    if len(sys.argv) >= 2 and sys.argv[1] == "export":
+        exported = export_to_json(*sys.argv[2:4])
+        print(f"✅ {exported} entrées exportées.")
+    else:
+        print("Usage: python -m src.utils.logger export [jsonl_path] [json_path]")
+        sys.exit(1)
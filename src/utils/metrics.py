@@ -0,0 +1,262 @@
+"""
+Run Metrics for Refactoring Swarm
+Purpose: Time every LLM call and tool run (pylint, pytest) and count tokens,
+tagged with the graph node, file and iteration they ran for.
+
+Records go to logs/metrics.jsonl (one JSON object per line) and are also
+collected per node, so auditor/fixer log entries can carry a summary.
+
+Usage:
+    python -m src.utils.metrics report [metrics_path]
+"""
+import contextvars
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List
+
+from src.utils import tracing
+
+METRICS_FILE = os.path.join("logs", "metrics.jsonl")
+
+# SWARM_METRICS=0 turns recording off (timing still costs ~1µs per call)
+_enabled = os.getenv("SWARM_METRICS", "1") != "0"
+_writer = None
+_writer_lock = threading.Lock()
+
+# node / file / iteration (and attempt...) of the code currently running
+_tags = contextvars.ContextVar("metrics_tags", default={})
+# records of the node currently running (None outside of a node)
+_records = contextvars.ContextVar("metrics_records", default=None)
+
+# rough chars-per-token ratio, used when the model reports no usage
+CHARS_PER_TOKEN = 4
+
+
+def set_enabled(enabled: bool):
+    global _enabled
+    _enabled = enabled
+
+
+def _get_writer():
+    # the logger's JSONL writer: batched fsync, safe across threads/processes
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            import atexit
+            from src.utils.logger import JsonlLogWriter
+            _writer = JsonlLogWriter(METRICS_FILE, legacy_path=None)
+            atexit.register(_writer.close)
+        return _writer
+
+
+@contextmanager
+def tagged(**tags):
+    """Add tags (e.g. attempt=2) to every record made inside the block."""
+    token = _tags.set({**_tags.get(), **tags})
+    try:
+        yield
+    finally:
+        _tags.reset(token)
+
+
+@contextmanager
+def timed(kind: str, name: str, **fields):
+    """
+    Time a block and record it
+
+    Args:
+        kind: "llm", "tool" or "node" (also the trace span category)
+        name: Model or tool name
+        fields: Extra fields; the yielded dict can be filled in the block
+            (tokens, cache hit...)
+
+    Yields:
+        The record (a dict) before it is written
+    """
+    record = {"kind": kind, "name": name, **fields}
+    # the same block is also a trace span (a no-op unless tracing is on)
+    with tracing.span(f"{kind}:{name}", kind, **fields) as trace_span:
+        started = time.perf_counter()
+        try:
+            yield record
+            record.setdefault("status", "ok")
+        except BaseException:
+            record["status"] = "error"
+            raise
+        finally:
+            record["duration_s"] = round(time.perf_counter() - started, 4)
+            if tracing.is_enabled():
+                trace_span.set(**{**_tags.get(), **record})
+            _record(record)
+
+
+def _record(record: Dict):
+    if not _enabled:
+        return
+    entry = {"timestamp": datetime.now().isoformat(), **_tags.get(), **record}
+    collected = _records.get()
+    if collected is not None:
+        collected.append(entry)
+    _get_writer().write(entry)
+
+
+def node(name: str):
+    """
+    Decorator for graph nodes (sync or async): tags records made by the node
+    with its name, file and iteration, and records the node's own duration.
+    """
+    def decorate(fn):
+        def scope(state):
+            return {"node": name, "file": state.get("file_path"), "iteration": state.get("iteration")}
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(state):
+                with _node_scope(scope(state)), timed("node", name, file=state.get("file_path")):
+                    return await fn(state)
+        else:
+            @functools.wraps(fn)
+            def wrapper(state):
+                with _node_scope(scope(state)), timed("node", name, file=state.get("file_path")):
+                    return fn(state)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def _node_scope(tags: Dict):
+    tags_token = _tags.set({**_tags.get(), **tags})
+    records_token = _records.set([])
+    try:
+        yield
+    finally:
+        _records.reset(records_token)
+        _tags.reset(tags_token)
+
+
+def node_summary() -> Dict:
+    """Totals of the records made so far by the running node (for log details)."""
+    records = _records.get() or []
+    llm = [r for r in records if r["kind"] == "llm"]
+    tools = [r for r in records if r["kind"] == "tool"]
+    return {
+        "llm_calls": len(llm),
+        "llm_cache_hits": sum(1 for r in llm if r.get("cached")),
+        "llm_retries": sum(1 for r in llm if r.get("attempt", 1) > 1 or r.get("fallback")),
+        "llm_time_s": round(sum(r["duration_s"] for r in llm), 4),
+        "prompt_tokens": sum(r.get("prompt_tokens", 0) for r in llm),
+        "completion_tokens": sum(r.get("completion_tokens", 0) for r in llm),
+        "tokens_estimated": any(r.get("tokens_estimated") for r in llm),
+        "tool_time_s": {
+            name: round(sum(r["duration_s"] for r in tools if r["name"] == name), 4)
+            for name in sorted({r["name"] for r in tools})
+        }
+    }
+
+
+def token_usage(prompt: str, response) -> Dict:
+    """
+    Prompt/completion tokens of an LLM response
+
+    Uses the usage the model reports when there is one, otherwise an
+    estimate from the text length (flagged with tokens_estimated).
+    """
+    usage = getattr(response, "usage_metadata", None)
+    metadata = getattr(response, "response_metadata", None) or {}
+    usage = usage or metadata.get("usage_metadata") or metadata.get("token_usage")
+    if usage:
+        prompt_tokens = usage.get("input_tokens", usage.get("prompt_token_count", usage.get("prompt_tokens")))
+        completion_tokens = usage.get("output_tokens", usage.get("candidates_token_count", usage.get("completion_tokens")))
+        if prompt_tokens is not None and completion_tokens is not None:
+            return {"prompt_tokens": int(prompt_tokens), "completion_tokens": int(completion_tokens)}
+    content = getattr(response, "content", "") or ""
+    return {
+        "prompt_tokens": len(prompt) // CHARS_PER_TOKEN,
+        "completion_tokens": len(str(content)) // CHARS_PER_TOKEN,
+        "tokens_estimated": True
+    }
+
+
+# ============ REPORT ============
+
+def iter_records(path: str = METRICS_FILE):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # truncated last line
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def aggregate(records) -> List[Dict]:
+    """
+    Latency percentiles and token totals per (kind, agent/tool)
+
+    LLM calls are grouped by the node (agent) that made them, tools and
+    nodes by name.
+    """
+    groups = {}
+    for r in records:
+        label = (r.get("node") or r["name"]) if r["kind"] == "llm" else r["name"]
+        groups.setdefault((r["kind"], label), []).append(r)
+
+    rows = []
+    for (kind, label), items in sorted(groups.items()):
+        durations = sorted(r["duration_s"] for r in items)
+        rows.append({
+            "kind": kind,
+            "name": label,
+            "count": len(items),
+            "errors": sum(1 for r in items if r.get("status") == "error"),
+            "total_s": round(sum(durations), 3),
+            "p50_s": percentile(durations, 50),
+            "p95_s": percentile(durations, 95),
+            "p99_s": percentile(durations, 99),
+            "prompt_tokens": sum(r.get("prompt_tokens", 0) for r in items),
+            "completion_tokens": sum(r.get("completion_tokens", 0) for r in items),
+            "cache_hits": sum(1 for r in items if r.get("cached"))
+        })
+    return rows
+
+
+def print_report(path: str = METRICS_FILE):
+    rows = aggregate(iter_records(path))
+    if not rows:
+        print(f"No metrics in {path}")
+        return
+    header = f"{'kind':<5} {'name':<22} {'count':>6} {'err':>4} {'total s':>9} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'tok in':>9} {'tok out':>9} {'cached':>6}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['kind']:<5} {str(r['name'])[:22]:<22} {r['count']:>6} {r['errors']:>4} {r['total_s']:>9.2f} "
+              f"{r['p50_s']:>8.3f} {r['p95_s']:>8.3f} {r['p99_s']:>8.3f} "
+              f"{r['prompt_tokens']:>9} {r['completion_tokens']:>9} {r['cache_hits']:>6}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "report":
+        report_path = sys.argv[2] if len(sys.argv) > 2 else METRICS_FILE
+        if not os.path.exists(report_path):
+            print(f"❌ {report_path} introuvable.")
+            sys.exit(1)
+        print_report(report_path)
+    else:
+        print("Usage: python -m src.utils.metrics report [metrics_path]")
+        sys.exit(1)
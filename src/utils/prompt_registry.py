@@ -0,0 +1,137 @@
+"""
+Prompt Registry for Refactoring Swarm
+Purpose: Load prompts/*.txt once and hand the same (interned) string to the
+agents and the logger, instead of re-reading the files on every node run.
+
+A prompt is reloaded when its file's mtime changes (checked at most every
+`check_interval` seconds), and each prompt has a version hash of its text
+that logs can record. LLM cache keys hash the full prompt, so a changed
+template never reuses answers given to the old one.
+
+Usage:
+    from src.utils.prompt_registry import get_prompt, prompt_version
+    template = get_prompt("auditor")          # prompts/auditor.txt
+    version = prompt_version("auditor")       # e.g. "3f2a9c1b7d04"
+"""
+import hashlib
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+PROMPTS_DIR = "prompts"
+# seconds between two mtime checks of the same prompt ($SWARM_PROMPT_CHECK_S)
+CHECK_INTERVAL = float(os.getenv("SWARM_PROMPT_CHECK_S", "1.0"))
+
+_shared_registry = None
+_shared_lock = threading.Lock()
+
+
+class _Entry:
+    __slots__ = ("text", "version", "mtime_ns", "size", "checked")
+
+    def __init__(self, text: str, mtime_ns: int, size: int):
+        self.text = sys.intern(text)
+        self.version = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.checked = time.monotonic()
+
+
+class PromptRegistry:
+    """Memoized prompt templates, reloaded when their file changes"""
+
+    def __init__(self, prompts_dir: str = PROMPTS_DIR, check_interval: float = CHECK_INTERVAL):
+        """
+        Args:
+            prompts_dir: Directory holding the <name>.txt templates
+            check_interval: Minimum seconds between two stat() of a prompt
+                file (0 = check on every get)
+        """
+        self.prompts_dir = Path(prompts_dir).resolve()
+        self.check_interval = check_interval
+        self.loads = 0
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> Path:
+        path = (self.prompts_dir / f"{name}.txt").resolve()
+        if path.parent != self.prompts_dir:
+            raise ValueError(f"🚫 Prompt {name!r} is outside {self.prompts_dir}")
+        return path
+
+    def _entry(self, name: str) -> _Entry:
+        if name.endswith(".txt"):
+            name = name[:-len(".txt")]
+        entry = self._entries.get(name)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked < self.check_interval:
+            return entry
+        with self._lock:
+            entry = self._entries.get(name)
+            path = self._path(name)
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Prompt not found: {path}") from None
+            if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+                entry.checked = now
+                return entry
+            text = path.read_text(encoding="utf-8")
+            if entry is not None:
+                print(f"🔄 Prompt reloaded: {path.name}")
+            entry = self._entries[name] = _Entry(text, stat.st_mtime_ns, stat.st_size)
+            self.loads += 1
+            return entry
+
+    def get(self, name: str) -> str:
+        """
+        Template text of prompts/<name>.txt
+
+        Args:
+            name: Prompt name, with or without ".txt" (e.g. "auditor")
+
+        Returns:
+            The template; the same string object until the file changes
+
+        Raises:
+            FileNotFoundError: If the prompt file does not exist
+        """
+        return self._entry(name).text
+
+    def version(self, name: str) -> str:
+        """Short sha256 of the template text (changes when the file does)."""
+        return self._entry(name).version
+
+    def versions(self) -> Dict[str, str]:
+        """Versions of every prompt loaded so far"""
+        with self._lock:
+            return {name: entry.version for name, entry in sorted(self._entries.items())}
+
+    def clear(self, name: Optional[str] = None):
+        """Forget one (or every) prompt; the next get reads the file again."""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+
+def get_registry() -> PromptRegistry:
+    """Process-wide registry, created on first use"""
+    global _shared_registry
+    if _shared_registry is None:
+        with _shared_lock:
+            if _shared_registry is None:
+                _shared_registry = PromptRegistry()
+    return _shared_registry
+
+
+def get_prompt(name: str) -> str:
+    return get_registry().get(name)
+
+
+def prompt_version(name: str) -> str:
+    return get_registry().version(name)
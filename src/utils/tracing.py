@@ -0,0 +1,158 @@
+"""
+Span Tracing for Refactoring Swarm
+Purpose: Optional nested spans around workflows, graph nodes, LLM calls and
+tool runs, exported as Chrome trace-event JSON (chrome://tracing, Perfetto).
+
+Off by default. When off, span() returns a shared no-op object, so the
+instrumented code pays one function call and one flag check.
+
+Usage:
+    python main.py --target_dir sandbox --trace trace.json
+    (or SWARM_TRACE=trace.json)
+"""
+import atexit
+import contextvars
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+_enabled = False
+_output_path: Optional[str] = None
+_events = []
+_events_lock = threading.Lock()
+_pid = os.getpid()
+_origin_ns = time.perf_counter_ns()
+
+# one track (Chrome "thread") per file, so concurrent workflows on the
+# same thread or event loop don't interleave their spans
+_track = contextvars.ContextVar("trace_track", default=None)
+_tracks: Dict[str, int] = {}
+
+
+class _NoopSpan:
+    """Returned by span() when tracing is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("name", "cat", "args", "tid", "start", "token")
+
+    def __init__(self, name: str, cat: str, args: Dict):
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.token = None
+
+    def __enter__(self):
+        file = self.args.get("file")
+        if file is not None and _track.get() is None:
+            self.token = _track.set(_track_for(str(file)))
+        self.tid = _track.get() or threading.get_ident()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def set(self, **attrs):
+        """Add attributes to the span (shown under "args" in the viewer)."""
+        self.args.update(attrs)
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        event = {
+            "name": self.name,
+            "cat": self.cat,
+            "ph": "X",
+            "ts": (self.start - _origin_ns) / 1000,
+            "dur": (end - self.start) / 1000,
+            "pid": _pid,
+            "tid": self.tid,
+            "args": {k: _jsonable(v) for k, v in self.args.items()}
+        }
+        with _events_lock:
+            _events.append(event)
+        if self.token is not None:
+            _track.reset(self.token)
+        return False
+
+
+def _track_for(file: str) -> int:
+    with _events_lock:
+        if file not in _tracks:
+            _tracks[file] = len(_tracks) + 1
+            _events.append({
+                "name": "thread_name", "ph": "M", "pid": _pid, "tid": _tracks[file],
+                "args": {"name": file}
+            })
+        return _tracks[file]
+
+
+def _jsonable(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def span(name: str, cat: str = "swarm", **attrs):
+    """
+    Context manager timing a block as a trace span
+
+    Args:
+        name: Span name (e.g. "node:fixer")
+        cat: Category ("file", "node", "llm", "tool")
+        attrs: Attributes; file=... puts the span (and everything nested in
+            it) on that file's track
+    """
+    if not _enabled:
+        return _NOOP
+    return _Span(name, cat, attrs)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable(output_path: str):
+    """Start recording spans; they are written to output_path at exit."""
+    global _enabled, _output_path
+    if _output_path is None:
+        atexit.register(export)
+    _output_path = output_path
+    _enabled = True
+
+
+def export(output_path: Optional[str] = None) -> int:
+    """
+    Write the recorded spans as Chrome trace-event JSON
+
+    Returns:
+        Number of events written
+    """
+    path = output_path or _output_path
+    if not path:
+        return 0
+    with _events_lock:
+        events = list(_events)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    os.replace(tmp_path, path)
+    return len(events)
+
+
+if os.getenv("SWARM_TRACE"):
+    enable(os.environ["SWARM_TRACE"])
@@ -0,0 +1,79 @@
+"""Unified diffs applied by FileTools.apply_patch: all hunks or nothing."""
+import pytest
+
+from src.tools.file_tools import FileTools
+
+SOURCE = "def add(a, b):\n    return a - b\n\n\ndef sub(a, b):\n    return a + b\n"
+
+
+@pytest.fixture
+def fl(tmp_path):
+    return FileTools(sandbox_path=str(tmp_path / "sandbox"), prompts_path=str(tmp_path / "prompts"))
+
+
+@pytest.fixture
+def target(fl):
+    path = fl.sandbox_path / "calc.py"
+    path.write_text(SOURCE)
+    return path
+
+
+def test_clean_apply(fl, target):
+    patch = (
+        "--- a/calc.py\n+++ b/calc.py\n"
+        "@@ -1,2 +1,2 @@\n def add(a, b):\n-    return a - b\n+    return a + b\n"
+    )
+    result = fl.apply_patch(str(target), patch)
+    assert result["applied"] and result["hunks"] == 1
+    assert target.read_text() == SOURCE.replace("a - b", "a + b", 1)
+
+
+def test_offset_hunk(fl, target):
+    # line numbers off by 3, context found once after the previous hunk
+    patch = "@@ -8,2 +8,2 @@\n def sub(a, b):\n-    return a + b\n+    return a - b\n"
+    result = fl.apply_patch(str(target), patch)
+    assert result["applied"]
+    assert target.read_text().endswith("def sub(a, b):\n    return a - b\n")
+
+
+def test_ambiguous_context_is_rejected(fl, target):
+    target.write_text("x = 1\ny = 2\n\nx = 1\ny = 2\n\nz = 3\n")
+    patch = "@@ -6,2 +6,2 @@\n x = 1\n-y = 2\n+y = 3\n"
+    result = fl.apply_patch(str(target), patch)
+    assert not result["applied"]
+    assert "ambiguous" in result["conflicts"][0]
+    assert target.read_text() == "x = 1\ny = 2\n\nx = 1\ny = 2\n\nz = 3\n"
+
+
+def test_no_newline_at_end_of_file(fl, target):
+    target.write_text("x = 1\ny = 2")
+    patch = "@@ -1,2 +1,2 @@\n x = 1\n-y = 2\n\\ No newline at end of file\n+y = 3\n\\ No newline at end of file\n"
+    result = fl.apply_patch(str(target), patch)
+    assert result["applied"]
+    assert target.read_text() == "x = 1\ny = 3"
+
+
+def test_earlier_hunk_shifts_later_ones(fl, target):
+    # hunk 1 adds two lines; hunk 2 gives its line numbers in the old file
+    patch = (
+        "@@ -1,2 +1,4 @@\n def add(a, b):\n-    return a - b\n+    \"\"\"Sum.\"\"\"\n"
+        "+    total = a + b\n+    return total\n"
+        "@@ -5,2 +7,2 @@\n def sub(a, b):\n-    return a + b\n+    return a - b\n"
+    )
+    result = fl.apply_patch(str(target), patch)
+    assert result["applied"] and result["hunks"] == 2
+    assert target.read_text() == (
+        "def add(a, b):\n    \"\"\"Sum.\"\"\"\n    total = a + b\n    return total\n\n\n"
+        "def sub(a, b):\n    return a - b\n"
+    )
+
+
+@pytest.mark.parametrize("patch", [
+    "@@ -1,2 @@\n def add(a, b):\n-    return a - b\n+    return a + b\n",
+    "@@ -1,3 +1,3 @@\n def add(a, b):\n-    return a - b\n+    return a + b\n",
+])
+def test_malformed_header_is_a_conflict(fl, target, patch):
+    result = fl.apply_patch(str(target), patch)
+    assert not result["applied"] and result["conflicts"]
+    assert result["content"] is None
+    assert target.read_text() == SOURCE
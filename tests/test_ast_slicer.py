@@ -0,0 +1,70 @@
+"""Slice selection and splicing of the fixer's slice mode."""
+import pytest
+
+from src.orcherstrateur import graph
+from src.tools.ast_slicer import build_context, select_units, splice, top_level_units
+
+SOURCE = '''import math
+
+
+def area(r):
+    return math.pi * r
+
+
+def area(r):
+    return math.pi * r * r
+
+
+def perimeter(r):
+    return 2 * math.pi * r
+'''
+
+
+def failing(message):
+    return {"success": False, "failure_details": [{"message": message, "traceback": ""}]}
+
+
+def test_redefined_names_get_distinct_keys():
+    units = top_level_units(SOURCE)
+    assert [u.key for u in units] == ["<header>", "area@4", "area@8", "perimeter"]
+
+
+def test_issue_line_selects_only_its_definition():
+    units = top_level_units(SOURCE)
+    selected = select_units(units, {"issues": [{"line": 9, "description": "wrong"}]}, None, "geo.py")
+    assert [u.key for u in selected] == ["<header>", "area@8"]
+
+
+def test_splice_replaces_the_right_redefinition():
+    units = top_level_units(SOURCE)
+    selected = [units[0], units[2]]
+    assert "slice: area@8 (lines 8-9)" in build_context(SOURCE, units, selected)
+
+    result = splice(SOURCE, selected, {"area@8": "def area(r):\n    return math.pi * r ** 2"})
+    assert "return math.pi * r\n" in result  # first definition untouched
+    assert "return math.pi * r ** 2\n" in result
+    assert "return math.pi * r * r" not in result
+
+
+def test_splice_rejects_an_ambiguous_name():
+    units = top_level_units(SOURCE)
+    with pytest.raises(ValueError):
+        splice(SOURCE, units, {"area": "def area(r):\n    return 0"})
+
+
+def test_audit_lines_are_ignored_after_the_first_iteration():
+    # line 13 was perimeter in the audited file; the fixer has since rewritten it
+    state = {
+        "fixer_mode": "slice",
+        "fix_plan": {"issues": [{"line": 13, "description": "wrong constant"}]},
+        "test_results": failing("AssertionError: assert area(2) == 12.56"),
+        "file_path": "geo.py",
+        "iteration": 1,
+    }
+    _, selected = graph.plan_slices(state, SOURCE)
+    assert [u.key for u in selected] == ["<header>", "area@4", "area@8"]
+
+    state["iteration"] = 0
+    state["test_results"] = None
+    _, selected = graph.plan_slices(state, SOURCE)
+    assert [u.key for u in selected] == ["<header>", "perimeter"]
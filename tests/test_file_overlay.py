@@ -0,0 +1,16 @@
+"""The file overlay never bypasses the sandbox check."""
+import pytest
+
+from src.tools.file_tools import FileTools, SecurityError
+
+
+def test_overlay_read_is_checked_first(tmp_path):
+    fl = FileTools(sandbox_path=str(tmp_path / "sandbox"), prompts_path=str(tmp_path / "prompts"),
+                   overlay=True)
+    outside = tmp_path / "secret.py"
+    outside.write_text("TOKEN = 1\n")
+    # e.g. left by a path that resolved inside the sandbox when it was read
+    fl._overlay[fl._overlay_key(str(outside))] = ["TOKEN = 1\n", False]
+
+    with pytest.raises(SecurityError):
+        fl.read_file(fl, str(outside))
@@ -0,0 +1,49 @@
+"""Keys, bounds and cross-file results of the lint cache."""
+import pytest
+
+from src.tools.lint_cache import LintCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LintCache(str(tmp_path / "lint_cache.sqlite"), max_entries=2)
+
+
+def result(*symbols):
+    return {"status": "success", "score": 10.0,
+            "errors": [{"symbol": symbol} for symbol in symbols],
+            "warnings": [], "conventions": [], "refactors": []}
+
+
+def test_same_bytes_elsewhere_get_their_own_key(cache, tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    first, second = tmp_path / "a" / "mod.py", tmp_path / "b" / "mod.py"
+    first.write_text("x = 1\n")
+    second.write_text("x = 1\n")
+    cache.put(cache.key_for(str(first)), result())
+    assert cache.get(cache.key_for(str(second))) is None
+    assert cache.get(cache.key_for(str(first))) == result()
+
+
+def test_cross_file_messages_are_not_stored(cache, tmp_path):
+    target = tmp_path / "mod.py"
+    target.write_text("import sibling\n")
+    key = cache.key_for(str(target))
+    assert cache.put(key, result("import-error")) is False
+    assert cache.get(key) is None
+
+
+def test_bounded_by_entries_and_age(cache, tmp_path):
+    keys = []
+    for i in range(3):
+        target = tmp_path / f"mod{i}.py"
+        target.write_text(f"x = {i}\n")
+        keys.append(cache.key_for(str(target)))
+        cache.put(keys[-1], result())
+    assert cache.evict() == 1
+    assert cache.get(keys[0]) is None
+
+    cache.max_age = 0
+    assert cache.get(keys[2]) is None
+    assert cache.evict() == 2
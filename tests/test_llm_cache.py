@@ -0,0 +1,71 @@
+"""Cached LLM calls: async lookups and unusable audit answers."""
+import asyncio
+import threading
+
+import pytest
+
+from src.orcherstrateur.agents.auditor import AuditorAgent
+from src.utils.llm_cache import CachedLLM, LLMCache
+
+
+class FakeModel:
+    def __init__(self, content):
+        self.content = content
+        self.calls = 0
+
+    def _respond(self):
+        self.calls += 1
+        return type("Response", (), {"content": self.content})()
+
+    def invoke(self, prompt):
+        return self._respond()
+
+    async def ainvoke(self, prompt):
+        return self._respond()
+
+
+class RecordingCache(LLMCache):
+    """Records the thread of every sqlite lookup and write."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.current_thread())
+        return super().get(key)
+
+    def put(self, key, model, content):
+        self.threads.append(threading.current_thread())
+        super().put(key, model, content)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RecordingCache(str(tmp_path / "llm_cache.sqlite"))
+
+
+def test_ainvoke_keeps_sqlite_off_the_event_loop(cache):
+    llm = CachedLLM(FakeModel("answer"), "fake", cache)
+
+    async def run():
+        first = await llm.ainvoke("prompt")
+        second = await llm.ainvoke("prompt")
+        return first.content, second.content, threading.current_thread()
+
+    first, second, loop_thread = asyncio.run(run())
+    assert (first, second) == ("answer", "answer")
+    assert len(cache.threads) == 3
+    assert loop_thread not in cache.threads
+
+
+@pytest.mark.parametrize("content, cached", [('{"issues": []}', True), ("Sorry, no JSON", False)])
+def test_only_parsable_audits_stay_cached(cache, content, cached):
+    model = FakeModel(content)
+    auditor = AuditorAgent.__new__(AuditorAgent)
+    auditor.llm = CachedLLM(model, "fake", cache)
+    auditor.chunk_lines = 400
+    prompt = auditor.build_prompt("x = 1\n", {}, "calc.py")
+
+    assert auditor.analyze("x = 1\n", {}, "calc.py") == content
+    assert (cache.get(LLMCache.make_key("fake", prompt)) is not None) == cached
@@ -0,0 +1,40 @@
+"""Restarts of the warm pylint engine."""
+import pytest
+
+from src.tools.pylint_engine import PylintEngine, _evict_stale_modules
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = PylintEngine(workers=1, sandbox_path=str(tmp_path))
+    yield engine
+    engine.close()
+
+
+def test_lints_in_flight_survive_a_restart(engine, tmp_path):
+    files = []
+    for i in range(3):
+        path = tmp_path / f"mod{i}.py"
+        path.write_text(f'"""Module {i}."""\nVALUE = {i}\n')
+        files.append(str(path))
+    stuck = engine.submit(files[0])
+    others = [engine.submit(path) for path in files[1:]]
+
+    # what lint() does when the first one times out
+    stuck.cancel()
+    engine.restart()
+
+    assert [future.result(timeout=120).path for future in others] == files[1:]
+    assert stuck.cancelled()
+
+
+def test_eviction_matches_whole_directories(tmp_path, monkeypatch):
+    astroid = pytest.importorskip("astroid")
+    sandbox, sibling = tmp_path / "sandbox", tmp_path / "sandbox_old"
+    modules = {
+        "inside": type("M", (), {"file": str(sandbox / "a.py")})(),
+        "lookalike": type("M", (), {"file": str(sibling / "a.py")})(),
+    }
+    monkeypatch.setattr(astroid.MANAGER, "astroid_cache", dict(modules))
+    _evict_stale_modules(str(sandbox))
+    assert list(astroid.MANAGER.astroid_cache) == ["lookalike"]
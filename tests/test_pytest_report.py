@@ -0,0 +1,38 @@
+"""Structured pytest report: counts match pytest's own summary."""
+import pytest
+
+from src.tools import testing_tools
+
+TESTS = '''import pytest
+
+
+@pytest.fixture
+def broken_teardown():
+    yield
+    raise RuntimeError("teardown broke")
+
+
+def test_fails_then_teardown_fails(broken_teardown):
+    assert 1 == 2
+
+
+def test_passes_then_teardown_fails(broken_teardown):
+    pass
+'''
+
+
+@pytest.mark.parametrize("use_fork_server", [False, True])
+def test_teardown_error_keeps_the_call_failure(tmp_path, use_fork_server):
+    sandbox = tmp_path / "sandbox"
+    sandbox.mkdir()
+    test_file = sandbox / "test_teardown.py"
+    test_file.write_text(TESTS)
+
+    tools = testing_tools.TestingTools(sandbox_path=str(sandbox), use_fork_server=use_fork_server)
+    result = tools.run_pytest(str(test_file))
+
+    # pytest: "1 failed, 1 passed, 2 errors"
+    assert (result["failed"], result["passed"], result["errors"]) == (1, 1, 2)
+    failure = next(d for d in result["failure_details"] if d["outcome"] == "failed")
+    assert "assert 1 == 2" in failure["traceback"]
+    assert sum("teardown broke" in d["traceback"] for d in result["failure_details"]) == 2
@@ -0,0 +1,91 @@
+"""Recovery of the pytest fork server."""
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import pytest
+
+from src.tools import pytest_server, testing_tools
+
+pytestmark = pytest.mark.skipif(not pytest_server.PytestForkServer.is_supported(),
+                                reason="fork server is POSIX only")
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = pytest_server.PytestForkServer()
+    monkeypatch.setattr(testing_tools, "get_server", lambda: server)
+    yield server
+    server.close()
+
+
+def test_server_dying_mid_run_is_restarted_once(server, tmp_path):
+    sandbox = tmp_path / "sandbox"
+    sandbox.mkdir()
+    test_file = sandbox / "test_slow.py"
+    test_file.write_text("import time\n\n\ndef test_slow():\n    time.sleep(1)\n")
+    tools = testing_tools.TestingTools(sandbox_path=str(sandbox), use_fork_server=True)
+
+    results = []
+    run = threading.Thread(target=lambda: results.append(tools.run_pytest(str(test_file))))
+    run.start()
+    while not server._pending:
+        time.sleep(0.01)
+    os.killpg(server._process.pid, signal.SIGKILL)
+    run.join()
+
+    assert results[0]["passed"] == 1
+    assert tools.use_fork_server
+    assert server.generation == 2
+
+
+class NeverAnswered(Future):
+    def result(self, timeout=None):
+        raise FutureTimeout()
+
+
+class HungOnceServer:
+    """First run never answers, the run after a restart does."""
+
+    def __init__(self):
+        self.generation = 1
+        self.restarts = []
+
+    def submit(self, args, cwd, timeout):
+        future = NeverAnswered() if not self.restarts else Future()
+        future.generation = self.generation
+        if self.restarts:
+            future.set_result({"timed_out": False, "return_code": 0, "output": "1 passed in 0.01s"})
+        return future
+
+    def restart(self, generation):
+        self.restarts.append(generation)
+        self.generation += 1
+
+
+def test_hung_server_is_restarted_not_abandoned(tmp_path, monkeypatch):
+    server = HungOnceServer()
+    monkeypatch.setattr(testing_tools, "get_server", lambda: server)
+    tools = testing_tools.TestingTools(sandbox_path=str(tmp_path), use_fork_server=True)
+
+    result = tools.run_pytest(str(tmp_path / "test_x.py"))
+    assert result["passed"] == 1
+    assert server.restarts == [1]
+    assert tools.use_fork_server
+
+
+def test_late_answer_to_a_cancelled_run_does_not_stop_the_reader():
+    server = pytest_server.PytestForkServer()
+    server.generation = 1
+    cancelled, waiting = Future(), Future()
+    for request_id, future in ((1, cancelled), (2, waiting)):
+        future.generation = 1
+        server._pending[request_id] = future
+    cancelled.cancel()  # what asyncio.wait_for does on timeout
+    process = type("Process", (), {"stdout": ['{"id": 1, "return_code": 0}\n']})()
+
+    server._read_responses(process, 1)
+    with pytest.raises(RuntimeError):
+        waiting.result(timeout=0)
@@ -0,0 +1,40 @@
+"""Roll-back of the snapshot store."""
+import os
+
+import pytest
+
+from src.tools.snapshot_store import SnapshotStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(str(tmp_path / "snapshots"))
+
+
+def replace(target, content):
+    # the store hardlinks files: versions are written as FileTools does, new inode
+    tmp = target.with_suffix(".tmp")
+    tmp.write_text(content)
+    os.replace(tmp, target)
+
+
+def record(store, target, versions):
+    for iteration, content in enumerate(versions):
+        replace(target, content)
+        store.snapshot(str(target), iteration)
+
+
+def test_failed_run_restores_the_original(store, tmp_path):
+    target = tmp_path / "calc.py"
+    record(store, target, ["original\n", "fix 1\n", "fix 2\n"])
+
+    assert store.restore(str(target))["iteration"] == 0
+    assert target.read_text() == "original\n"
+
+
+def test_explicit_iteration_is_restored(store, tmp_path):
+    target = tmp_path / "calc.py"
+    record(store, target, ["original\n", "fix 1\n"])
+
+    store.restore(str(target), iteration=1)
+    assert target.read_text() == "fix 1\n"
@@ -0,0 +1,137 @@
+"""A stored test suite that ended a workflow in failure is never replayed."""
+import json
+
+import pytest
+
+from src.orcherstrateur import graph
+from src.orcherstrateur.agents.judge import JudgeAgent
+from src.tools.file_tools import FileTools
+from src.tools.snapshot_store import SnapshotStore
+from src.tools.test_store import TestSuiteStore, public_signatures
+from src.tools import testing_tools
+from src.utils import llm_cache, metrics
+
+SOURCE = "def add(a, b):\n    return a - b\n"
+TESTS = "from calc import add\n\n\ndef test_add():\n    assert add(7, 3) == 10\n"
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch):
+    root = tmp_path / "sandbox"
+    root.mkdir()
+    monkeypatch.setattr(graph, "fl", FileTools(sandbox_path=str(root), prompts_path=str(tmp_path)), raising=False)
+    monkeypatch.setattr(graph, "ft", testing_tools.TestingTools(sandbox_path=str(root), use_fork_server=False), raising=False)
+    monkeypatch.setattr(graph, "snapshots", SnapshotStore(str(tmp_path / "snapshots")), raising=False)
+    monkeypatch.setattr(graph, "test_store", TestSuiteStore(str(tmp_path / "tests.sqlite")), raising=False)
+    target = root / "calc.py"
+    target.write_text(SOURCE)
+    graph.test_store.update(str(target), public_signatures(SOURCE), TESTS, ["add"])
+    return target
+
+
+def failed_state(target, iteration):
+    return {
+        "file_path": str(target),
+        "test_path": str(target.parent / "test_swarm_calc.py"),
+        "test_results": {"success": False, "collect_errors": 0},
+        "iteration": iteration,
+        "max_iterations": 5,
+        "workspace": None,
+    }
+
+
+def test_stored_suite_is_reused_while_it_is_valid(sandbox):
+    assert graph.plan_tests(str(sandbox), SOURCE) == (public_signatures(SOURCE), [])
+
+
+def test_suite_is_regenerated_after_max_iterations(sandbox):
+    assert graph.should_continue(failed_state(sandbox, 5)) == "end"
+
+    assert not graph.test_store.has_suite(str(sandbox))
+    signatures, stale = graph.plan_tests(str(sandbox), SOURCE)
+    assert stale == ["add"]
+    assert graph.partial_only(signatures, stale) is None  # the whole file is generated again
+
+
+def test_suite_survives_a_failed_iteration_before_the_limit(sandbox):
+    assert graph.should_continue(failed_state(sandbox, 1)) == "fixer"
+    assert graph.test_store.has_suite(str(sandbox))
+
+
+def test_reused_suite_with_collection_errors_is_dropped(sandbox):
+    assert graph.check_reused_tests(str(sandbox), {"success": False, "collect_errors": 1})
+    assert graph.plan_tests(str(sandbox), SOURCE)[1] == ["add"]
+
+
+def test_reused_suite_with_failing_tests_is_kept(sandbox):
+    assert not graph.check_reused_tests(str(sandbox), {"success": False, "failed": 1, "collect_errors": 0})
+    assert graph.test_store.has_suite(str(sandbox))
+
+
+def test_generated_tests_leave_the_user_tests_alone(sandbox):
+    user_tests = sandbox.parent / "test_calc.py"
+    user_tests.write_text("def test_mine():\n    pass\n")
+    state = failed_state(sandbox, 1)
+    graph.write_tests(state, TESTS)
+    state["test_results"] = {"success": True}
+
+    assert graph.should_continue(state) == "end"
+    assert user_tests.read_text() == "def test_mine():\n    pass\n"
+
+
+def test_collection_errors_are_parsed_from_terminal_output():
+    output = "ERROR sandbox/test_calc.py\n!!! Interrupted: 1 error during collection !!!\n1 error in 0.05s"
+    assert testing_tools.TestingTools(use_fork_server=False).parse_pytest_output(output, 2)["collect_errors"] == 1
+
+
+class FakeModel:
+    def __init__(self, content):
+        self.content = content
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return type("Response", (), {"content": self.content})()
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "_enabled", False)
+    monkeypatch.setattr(llm_cache, "_enabled", True)
+    cache = llm_cache.LLMCache(str(tmp_path / "llm_cache.sqlite"))
+    monkeypatch.setattr(llm_cache, "_shared_cache", cache)
+    return cache
+
+
+def test_dropped_suite_is_not_read_back_from_the_llm_cache(sandbox, cache, monkeypatch):
+    model = FakeModel(json.dumps({"test_code": TESTS}))
+    judge = JudgeAgent.__new__(JudgeAgent)
+    judge.llm = llm_cache.CachedLLM(model, "fake")
+    # setattr would build the real (Gemini) judge to save the old value
+    monkeypatch.setitem(vars(graph), "judge_agent", judge)
+    graph.test_store.invalidate(str(sandbox))
+
+    state = graph.judge_node(dict(failed_state(sandbox, 4), test_results=None))
+    assert not state["test_results"]["success"]
+    assert graph.should_continue(state) == "end"
+
+    # the next run asks the judge again instead of replaying the wrong suite
+    graph.judge_node(dict(failed_state(sandbox, 0), test_results=None))
+    assert model.calls == 2
+
+
+def test_answers_of_a_failed_workflow_are_discarded(sandbox, cache):
+    model = FakeModel('{"issues": []}')
+    llm = llm_cache.CachedLLM(model, "fake")
+
+    @graph.records_llm_keys
+    def node(state):
+        llm.invoke(f"audit iteration {state['iteration']}")
+        return state
+
+    state = failed_state(sandbox, 4)
+    state = node(node(state))
+    assert len(state["llm_keys"]) == 1 and cache.stats()["entries"] == 1
+    state["iteration"] = 5
+    assert graph.should_continue(state) == "end"
+    assert cache.stats()["entries"] == 0
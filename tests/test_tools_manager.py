@@ -0,0 +1,20 @@
+"""Smoke test of the ToolsManager workflow helpers."""
+from src.tools import lint_cache
+from src.tools.tools_manager import ToolsManager
+
+
+def test_full_analysis_workflow(tmp_path, monkeypatch):
+    monkeypatch.setattr(lint_cache, "DEFAULT_CACHE_PATH", str(tmp_path / "lint_cache.sqlite"))
+    sandbox = tmp_path / "sandbox"
+    sandbox.mkdir()
+    (sandbox / "calc.py").write_text('"""Calculator."""\n\n\ndef add(a, b):\n    """Sum."""\n    return a + b\n')
+    (sandbox / "test_calc.py").write_text("from calc import add\n\n\ndef test_add():\n    assert add(1, 2) == 3\n")
+
+    manager = ToolsManager(str(sandbox))
+    result = manager.full_analysis_workflow(str(sandbox))
+
+    assert sorted(result["files"]) == sorted([str(sandbox / "calc.py"), str(sandbox / "test_calc.py")])
+    assert set(result["analysis"]) == set(result["files"])
+    assert result["summary"]
+    assert result["test_files"] == [str(sandbox / "test_calc.py")]
+    assert result["test_results"]["passed"] == 1
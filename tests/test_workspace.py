@@ -0,0 +1,83 @@
+"""Workspace naming, locking and cleanup."""
+import sqlite3
+
+import pytest
+
+from src.tools.workspace import Workspace
+
+
+@pytest.fixture
+def sandbox(tmp_path):
+    root = tmp_path / "sandbox"
+    (root / "a").mkdir(parents=True)
+    for name in ("a/b.py", "a__b.py", "x-y.py", "x_y.py"):
+        (root / name).write_text("x = 1\n")
+    return root
+
+
+def open_in(sandbox, name):
+    return Workspace(str(sandbox / name), str(sandbox), str(sandbox.parent / "workspaces"))
+
+
+@pytest.mark.parametrize("first, second", [("a/b.py", "a__b.py"), ("x-y.py", "x_y.py")])
+def test_lookalike_paths_get_distinct_workspaces(sandbox, first, second):
+    one, two = open_in(sandbox, first), open_in(sandbox, second)
+    try:
+        assert one.root != two.root
+        assert (one.root / "sandbox").is_dir() and (two.root / "sandbox").is_dir()
+    finally:
+        one.close()
+        two.close()
+
+
+def test_workspace_in_use_is_not_wiped(sandbox):
+    first = open_in(sandbox, "a/b.py")
+    marker = first.root / "sandbox" / "a" / "test_b.py"
+    marker.write_text("def test_b():\n    pass\n")
+    try:
+        with pytest.raises(RuntimeError):
+            open_in(sandbox, "a/b.py")
+        assert marker.exists()
+    finally:
+        first.close()
+
+    again = open_in(sandbox, "a/b.py")  # released by close()
+    again.close()
+
+
+def test_stale_lock_is_taken_over(sandbox):
+    workspace = open_in(sandbox, "x_y.py")
+    workspace.lock_path.write_text("999999999")  # a pid that is not running
+    try:
+        open_in(sandbox, "x_y.py").close()
+    finally:
+        workspace.close()
+
+
+def test_close_releases_the_lint_cache(sandbox):
+    workspace = open_in(sandbox, "x_y.py")
+    lint_cache = workspace.fa.lint_cache
+    workspace.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        lint_cache.stats()
+
+
+def test_workspaces_mirror_the_sandbox_of_the_graph(tmp_path, monkeypatch):
+    import main
+    from src.orcherstrateur import graph
+    from src.tools import workspace
+    from src.tools.file_tools import FileTools
+
+    sandbox = tmp_path / "elsewhere"
+    sandbox.mkdir()
+    (sandbox / "mod.py").write_text("x = 1\n")
+    monkeypatch.setitem(vars(graph), "fl", FileTools(sandbox_path=str(sandbox)))
+    monkeypatch.setattr(workspace, "DEFAULT_WORKSPACES_DIR", str(tmp_path / "workspaces"))
+    monkeypatch.setenv("SWARM_WORKSPACES", "1")
+
+    opened = main.open_workspace(str(sandbox / "mod.py"))
+    try:
+        assert opened.sandbox_path == sandbox.resolve()
+        assert (opened.mirror / "mod.py").read_text() == "x = 1\n"
+    finally:
+        opened.close()
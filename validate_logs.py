@@ -1,53 +1,241 @@
+import argparse
+import codecs
 import json
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 LOG_FILE = "logs/experiment_data.json"
 
-def validate_logs():
-    if not os.path.exists(LOG_FILE):
+REQUIRED_FIELDS = ["id", "timestamp", "agent", "model", "action", "details", "status"]
+REQUIRED_DETAILS = ["input_prompt", "output_response"]
+LLM_ACTIONS = ["CODE_ANALYSIS", "CODE_GEN", "DEBUG", "FIX"]
+
+CHUNK_SIZE = 1024 * 1024
+# Below this size a JSONL file is validated in-process even with --workers
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+
+
+class LogFormatError(Exception):
+    """Raised when the log cannot be parsed at all (offset = byte position)"""
+    def __init__(self, message, offset):
+        super().__init__(f"{message} (byte {offset})")
+        self.offset = offset
+
+
+def check_entry(entry):
+    """Return the rule violations of one entry (messages without location)."""
+    if not isinstance(entry, dict):
+        return [" should be an object"]
+
+    errors = []
+    # Check top-level fields
+    missing = [field for field in REQUIRED_FIELDS if field not in entry]
+    if missing:
+        errors.append(f" missing fields: {missing}")
+
+    # Check details fields for relevant actions
+    action = entry.get("action")
+    if action in LLM_ACTIONS:
+        if not isinstance(entry.get("details"), dict):
+            errors.append(f" (action={action}): details should be a dict")
+        else:
+            missing_details = [d for d in REQUIRED_DETAILS if d not in entry["details"]]
+            if missing_details:
+                errors.append(f" (action={action}) missing details: {missing_details}")
+    return errors
+
+
+def format_error(error):
+    i, offset, message = error
+    return f" Entry {i} (byte {offset}){message}"
+
+
+def detect_format(path):
+    """'array' for the JSON list written by export_to_json, 'jsonl' otherwise."""
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(4096)
+            if not block:
+                return "empty"
+            stripped = block.lstrip()
+            if stripped:
+                return "array" if stripped[:1] == b"[" else "jsonl"
+
+
+def iter_json_array(f):
+    """
+    Yield (byte_offset, entry) from a JSON array without loading it whole.
+
+    Only the entry being decoded (plus one read chunk) is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0       # parse position in buf
+    base = 0      # byte offset of buf[pos]
+    eof = False
+
+    def fill():
+        # drop the consumed prefix, then append one more chunk
+        nonlocal buf, pos, eof
+        buf = buf[pos:]
+        pos = 0
+        block = f.read(CHUNK_SIZE)
+        if not block:
+            eof = True
+            buf += utf8.decode(b"", final=True)
+            return False
+        buf += utf8.decode(block)
+        return True
+
+    def advance(new_pos):
+        nonlocal pos, base
+        base += len(buf[pos:new_pos].encode("utf-8"))
+        pos = new_pos
+
+    def next_token():
+        # skip whitespace, return first significant char ('' at EOF)
+        while True:
+            end = len(buf)
+            while pos < end and buf[pos] in " \t\r\n":
+                advance(pos + 1)
+            if pos < end or not fill():
+                return buf[pos:pos + 1]
+
+    if next_token() != "[":
+        raise LogFormatError("Log file should contain a list of entries", base)
+    advance(pos + 1)
+    if next_token() == "]":
+        return
+
+    while True:
+        if not next_token():
+            raise LogFormatError("Unexpected end of file inside the list", base)
+        while True:
+            try:
+                entry, end = decoder.raw_decode(buf, pos)
+                break
+            except json.JSONDecodeError as e:
+                if eof or not fill():
+                    raise LogFormatError(f"Invalid JSON: {e.msg}", base + len(buf[pos:e.pos].encode("utf-8")))
+        yield base, entry
+        advance(end)
+
+        token = next_token()
+        if token == ",":
+            advance(pos + 1)
+        elif token == "]":
+            return
+        else:
+            raise LogFormatError("Expected ',' or ']' after entry", base)
+
+
+def iter_jsonl(f, start=0, end=None):
+    """
+    Yield (byte_offset, entry_or_error) for each line in [start, end).
+
+    `start` must be at a line boundary; a decode failure is yielded as a
+    LogFormatError so one bad line does not stop validation.
+    """
+    f.seek(start)
+    offset = start
+    while end is None or offset < end:
+        line = f.readline()
+        if not line:
+            break
+        if line.strip():
+            try:
+                yield offset, json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                yield offset, LogFormatError(f"Invalid JSON line: {e}", offset)
+        offset += len(line)
+
+
+def validate_stream(items):
+    """Check (offset, entry) pairs; return (entry_count, [(index, offset, message)])."""
+    count = 0
+    errors = []
+    for offset, entry in items:
+        if isinstance(entry, LogFormatError):
+            errors.append((count, offset, f": {entry}"))
+        else:
+            errors.extend((count, offset, message) for message in check_entry(entry))
+        count += 1
+    return count, errors
+
+
+def _validate_jsonl_range(args):
+    path, start, end = args
+    with open(path, 'rb') as f:
+        return validate_stream(iter_jsonl(f, start, end))
+
+
+def _line_aligned_ranges(path, parts):
+    """Split a file into `parts` byte ranges that start at line boundaries."""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as f:
+        for k in range(1, parts):
+            f.seek(max(size * k // parts, bounds[-1]))
+            f.readline()
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [(path, a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def validate_file(path, workers=1):
+    """
+    Validate a log file in constant memory.
+
+    Returns:
+        (entry_count, [(index, byte_offset, message)])
+    """
+    fmt = detect_format(path)
+    if fmt == "empty":
+        raise LogFormatError("Log file is empty", 0)
+
+    if fmt == "array":
+        with open(path, 'rb') as f:
+            return validate_stream(iter_json_array(f))
+
+    if workers <= 1 or os.path.getsize(path) < PARALLEL_MIN_BYTES:
+        return _validate_jsonl_range((path, 0, None))
+
+    # Large JSONL: validate line-aligned chunks in separate processes,
+    # then renumber entries with the running count of previous chunks.
+    count = 0
+    errors = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk_count, chunk_errors in pool.map(_validate_jsonl_range, _line_aligned_ranges(path, workers * 4)):
+            errors.extend((i + count, offset, message) for i, offset, message in chunk_errors)
+            count += chunk_count
+    return count, errors
+
+
+def validate_logs(log_file=LOG_FILE, workers=1):
+    if not os.path.exists(log_file):
         print(" Log file does not exist.")
         sys.exit(1)
-    
-    with open(LOG_FILE, 'r', encoding='utf-8') as f:
-        try:
-            data = json.load(f)
-        except json.JSONDecodeError:
-            print(" Log file is not valid JSON.")
-            sys.exit(1)
-    
-    if not isinstance(data, list):
-        print(" Log file should contain a list of entries.")
+
+    try:
+        total, errors = validate_file(log_file, workers)
+    except LogFormatError as e:
+        print(f" Log file is not valid JSON: {e}")
         sys.exit(1)
-    
-    required_fields = ["id", "timestamp", "agent", "model", "action", "details", "status"]
-    required_details = ["input_prompt", "output_response"]
-    
-    errors = []
-    
-    for i, entry in enumerate(data):
-        # Check top-level fields
-        missing = [field for field in required_fields if field not in entry]
-        if missing:
-            errors.append(f" Entry {i} missing fields: {missing}")
-        
-        # Check details fields for relevant actions
-        action = entry["action"]
-        if action in ["CODE_ANALYSIS", "CODE_GEN", "DEBUG", "FIX"]:
-            if not isinstance(entry.get("details"), dict):
-                errors.append(f" Entry {i} (action={action}): details should be a dict")
-            else:
-                missing_details = [d for d in required_details if d not in entry["details"]]
-                if missing_details:
-                    errors.append(f" Entry {i} (action={action}) missing details: {missing_details}")
-    
+
     if errors:
         for err in errors:
-            print(err)
+            print(format_error(err))
         sys.exit(1)
-    
-    print(f" Log validation passed. Total entries: {len(data)}")
+
+    print(f" Log validation passed. Total entries: {total}")
     return True
 
 if __name__ == "__main__":
-    validate_logs()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Validate experiment logs (JSON list or JSON Lines)")
+    parser.add_argument("log_file", nargs="?", default=LOG_FILE)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes used for large JSON Lines files (default: 1)")
+    args = parser.parse_args()
+    validate_logs(args.log_file, args.workers)